@@ -3,80 +3,115 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 import logging
+import threading
+import time
 from ..config.mt5_config import MT5Config
 from ..config.trading_config import TradingConfig
+from ..core.bar_store import BarStore
+from ..core.connection import MT5Connection
+from ..core.snapshot import TerminalSnapshot
+from .correlation_engine import CorrelationEngine, CorrelationClusters
+from ..utils.instrumentation import timed
+from ..utils.logger import log_event
 
 class CorrelationAnalyzer:
-    def __init__(self):
+    def __init__(self, bar_store=None, connection=None, snapshot=None):
+        self.bar_store = bar_store if bar_store is not None else BarStore.get_instance()
+        self.connection = connection if connection is not None else MT5Connection.get_instance()
+        self.snapshot = snapshot if snapshot is not None else TerminalSnapshot.get_instance()
         self.current_time = datetime.strptime("2025-03-12 00:06:06", "%Y-%m-%d %H:%M:%S")
         self.login = "zzzz14"
         self.correlation_matrix = None
+        self.engine = None  # running sums over aligned M5 returns
+        self.clusters = None  # recomputed with each matrix update
+        self.cluster_cache = (None, None, None)  # positions, clusters, per-cluster exposure
         self.last_update = None
+        self.last_refresh = 0.0
+        self.last_logged = 0.0
+        self.position_cache = (None, None, None, None)  # positions, engine, vector, held indices
         self.correlation_threshold = 0.7
         self.lookback_period = 100
+        self.update_lock = threading.Lock()
 
+    @timed('correlation.update_matrix')
     def update_correlation_matrix(self):
-        """Update correlation matrix for all symbols"""
+        """Fold newly closed M5 bars into the correlation matrix"""
         try:
-            # Check if update is needed (every hour)
-            if (self.last_update and 
-                (self.current_time - self.last_update).total_seconds() < 3600):
-                return
-
-            # Get price data for all symbols
-            symbol_data = {}
-            for symbol in MT5Config.SYMBOLS:
-                rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M5, 0, self.lookback_period)
-                if rates is not None:
-                    df = pd.DataFrame(rates)
-                    symbol_data[symbol] = df['close'].pct_change().dropna()
-
-            # Calculate correlation matrix
-            if symbol_data:
-                data = pd.DataFrame(symbol_data)
-                self.correlation_matrix = data.corr()
-                self.last_update = self.current_time
-
-                # Log correlation matrix
-                self.log_correlation_matrix()
+            # Symbols may be analyzed concurrently, only one thread updates
+            with self.update_lock:
+                now = time.time()
+                if now - self.last_refresh < TradingConfig.CORRELATION_REFRESH_INTERVAL:
+                    return
+                self.last_refresh = now
+
+                symbols = list(MT5Config.SYMBOLS)
+                if self.engine is None or self.engine.symbols != symbols:
+                    self.engine = CorrelationEngine(symbols, window=self.lookback_period,
+                                                    halflife=TradingConfig.CORRELATION_HALFLIFE)
+
+                # Closed bars only, read from the shared bar store
+                closed = {}
+                for symbol in symbols:
+                    rates = self.bar_store.get_rates(symbol, mt5.TIMEFRAME_M5, self.lookback_period + 1)
+                    if rates is not None and len(rates) > 1:
+                        closed[symbol] = rates[:-1]
+
+                # Nothing to do until a new bar has closed
+                if not self.engine.ingest(closed):
+                    return
+
+                matrix = self.engine.matrix()
+                if matrix is None:
+                    return
+
+                self.correlation_matrix = pd.DataFrame(matrix, index=symbols, columns=symbols)
+                self.clusters = CorrelationClusters(symbols, matrix, self.correlation_threshold,
+                                                    TradingConfig.CORRELATION_CLUSTER_METHOD)
+                self.current_time = self.last_update = datetime.now()
+
+                # Log correlation matrix (at most hourly)
+                if now - self.last_logged >= 3600:
+                    self.last_logged = now
+                    self.log_correlation_matrix()
 
         except Exception as e:
             logging.error(f"Error updating correlation matrix: {str(e)}")
 
+    @timed('correlation.check_risk')
     def check_correlation_risk(self, symbol, signal_type):
         """Check if new trade would exceed correlation risk limits"""
         try:
             self.update_correlation_matrix()
             
-            if self.correlation_matrix is None:
+            engine = self.engine
+            matrix = engine.matrix() if engine is not None else None
+            if matrix is None or symbol not in engine.index:
                 return True  # Allow trade if no correlation data
 
             # Get current positions
-            positions = mt5.positions_get()
+            if not self.connection.ensure_connected():
+                return True
+            positions = self.snapshot.positions()
             if positions is None:
                 return True
 
-            # Calculate potential risk from correlated pairs
-            total_correlated_exposure = 0
-            base_exposure = 1.0  # Normalized exposure for new trade
-
-            for position in positions:
-                if position.symbol == symbol:
-                    continue
-
-                correlation = self.get_correlation(symbol, position.symbol)
-                position_direction = 1 if position.type == mt5.POSITION_TYPE_BUY else -1
-                signal_direction = 1 if signal_type == 'BUY' else -1
-
-                # Adjust for correlation direction
-                effective_correlation = correlation * position_direction * signal_direction
-                
-                # Add to total exposure
-                total_correlated_exposure += abs(effective_correlation * position.volume)
+            # Exposure in the signal's direction: correlations times net signed volumes.
+            # Positions in the symbol itself are left to the per-symbol trade limit.
+            vector, _ = self.position_vector(positions)
+            i = engine.index[symbol]
+            signal_direction = 1 if signal_type == 'BUY' else -1
+            total_correlated_exposure = signal_direction * (matrix[i] @ vector - matrix[i, i] * vector[i])
 
             # Log correlation analysis
             self.log_correlation_analysis(symbol, signal_type, total_correlated_exposure)
 
+            # Net exposure of the symbol's cluster in the signal's direction
+            cluster_exposure = signal_direction * self.cluster_exposure(symbol, positions)
+            if cluster_exposure > TradingConfig.MAX_CLUSTER_EXPOSURE:
+                logging.info(f"{symbol}: cluster exposure {cluster_exposure:.2f} exceeds "
+                             f"{TradingConfig.MAX_CLUSTER_EXPOSURE}")
+                return False
+
             # Check against threshold
             max_allowed_exposure = TradingConfig.MAX_CORRELATED_EXPOSURE
             return total_correlated_exposure <= max_allowed_exposure
@@ -85,13 +120,47 @@ class CorrelationAnalyzer:
             logging.error(f"Error checking correlation risk: {str(e)}")
             return True
 
+    def position_vector(self, positions):
+        """Net signed volume per symbol in matrix order (buys positive), and the held symbol indices"""
+        cached_positions, cached_engine, vector, held = self.position_cache
+        if positions is cached_positions and self.engine is cached_engine:
+            return vector, held
+
+        index = self.engine.index
+        vector = np.zeros(len(index))
+        held = set()
+        for position in positions:
+            i = index.get(position.symbol)
+            if i is None:
+                continue
+            vector[i] += position.volume if position.type == mt5.POSITION_TYPE_BUY else -position.volume
+            held.add(i)
+        held = np.array(sorted(held), dtype=int)
+
+        self.position_cache = (positions, self.engine, vector, held)
+        return vector, held
+
+    def cluster_exposure(self, symbol, positions):
+        """Net volume held in the symbol's cluster, positive when it is long the symbol"""
+        clusters = self.clusters
+        if clusters is None:
+            return 0.0
+
+        cached_positions, cached_clusters, exposures = self.cluster_cache
+        if positions is not cached_positions or clusters is not cached_clusters:
+            vector, _ = self.position_vector(positions)
+            exposures = clusters.exposures(vector)
+            self.cluster_cache = (positions, clusters, exposures)
+
+        return clusters.exposure(symbol, exposures)
+
     def get_correlation(self, symbol1, symbol2):
         """Get correlation coefficient between two symbols"""
         try:
-            if self.correlation_matrix is None:
+            if self.engine is None:
                 return 0
 
-            return self.correlation_matrix.loc[symbol1, symbol2]
+            return self.engine.correlation(symbol1, symbol2)
 
         except Exception as e:
             logging.error(f"Error getting correlation: {str(e)}")
@@ -116,29 +185,12 @@ class CorrelationAnalyzer:
             return []
 
     def get_correlation_groups(self):
-        """Identify groups of correlated symbols"""
+        """Groups of correlated symbols (clusters with more than one member)"""
         try:
-            if self.correlation_matrix is None:
+            if self.clusters is None:
                 return []
 
-            groups = []
-            processed = set()
-
-            for symbol in self.correlation_matrix.index:
-                if symbol in processed:
-                    continue
-
-                # Find correlated symbols
-                correlated = self.get_correlated_pairs(symbol)
-                if correlated:
-                    group = {symbol}
-                    for pair, _ in correlated:
-                        group.add(pair)
-                    
-                    groups.append(list(group))
-                    processed.update(group)
-
-            return groups
+            return [list(group) for group in self.clusters.groups if len(group) > 1]
 
         except Exception as e:
             logging.error(f"Error getting correlation groups: {str(e)}")
@@ -147,26 +199,22 @@ class CorrelationAnalyzer:
     def calculate_portfolio_correlation(self):
         """Calculate correlation-based portfolio risk"""
         try:
-            positions = mt5.positions_get()
-            if positions is None or len(positions) < 2:
+            matrix = self.engine.matrix() if self.engine is not None else None
+            if matrix is None:
                 return 0
 
-            # Create position matrix
-            position_data = {}
-            for position in positions:
-                rates = mt5.copy_rates_from_pos(position.symbol, mt5.TIMEFRAME_M5, 0, self.lookback_period)
-                if rates is not None:
-                    df = pd.DataFrame(rates)
-                    position_data[position.symbol] = df['close'].pct_change().dropna()
-
-            if not position_data:
+            if not self.connection.ensure_connected():
+                return 0
+            positions = self.snapshot.positions()
+            if positions is None or len(positions) < 2:
                 return 0
 
-            # Calculate portfolio correlation
-            portfolio_df = pd.DataFrame(position_data)
-            portfolio_corr = portfolio_df.corr().mean().mean()
+            # Mean correlation among the held symbols, from the maintained matrix
+            _, held = self.position_vector(positions)
+            if len(held) == 0:
+                return 0
 
-            return portfolio_corr
+            return float(matrix[np.ix_(held, held)].mean())
 
         except Exception as e:
             logging.error(f"Error calculating portfolio correlation: {str(e)}")
@@ -178,24 +226,13 @@ class CorrelationAnalyzer:
             if self.correlation_matrix is None:
                 return
 
-            analysis = f"""
-{'='*50}
-CORRELATION MATRIX UPDATE
-Time: {self.current_time} UTC
-Login: {self.login}
-{'='*50}
-
-Highly Correlated Pairs (|correlation| > {self.correlation_threshold}):
-"""
-            for symbol in self.correlation_matrix.index:
-                correlated = self.get_correlated_pairs(symbol)
-                if correlated:
-                    analysis += f"\n{symbol}:"
-                    for pair, corr in correlated:
-                        analysis += f"\n  - {pair}: {corr:.2f}"
-
-            analysis += f"\n{'='*50}"
-            logging.info(analysis)
+            log_event(
+                'correlation_matrix',
+                threshold=self.correlation_threshold,
+                pairs=lambda: {symbol: {pair: round(float(corr), 2) for pair, corr in correlated}
+                               for symbol in self.correlation_matrix.index
+                               for correlated in [self.get_correlated_pairs(symbol)] if correlated}
+            )
 
         except Exception as e:
             logging.error(f"Error logging correlation matrix: {str(e)}")
@@ -203,27 +240,15 @@ Highly Correlated Pairs (|correlation| > {self.correlation_threshold}):
     def log_correlation_analysis(self, symbol, signal_type, total_exposure):
         """Log correlation analysis for trade signal"""
         try:
-            analysis = f"""
-{'='*50}
-CORRELATION ANALYSIS - {symbol}
-Time: {self.current_time} UTC
-Login: {self.login}
-{'='*50}
-
-Signal Type: {signal_type}
-Total Correlated Exposure: {total_exposure:.2f}
-Maximum Allowed: {TradingConfig.MAX_CORRELATED_EXPOSURE}
-
-Correlated Pairs:
-"""
-            correlated_pairs = self.get_correlated_pairs(symbol)
-            for pair, corr in correlated_pairs:
-                analysis += f"- {pair}: {corr:.2f}\n"
-
-            analysis += f"\nPortfolio Correlation: {self.calculate_portfolio_correlation():.2f}"
-            analysis += f"\n{'='*50}"
-            
-            logging.info(analysis)
+            log_event(
+                'correlation_analysis',
+                symbol=symbol,
+                signal=signal_type,
+                exposure=total_exposure,
+                max_exposure=TradingConfig.MAX_CORRELATED_EXPOSURE,
+                pairs=lambda: {pair: round(float(corr), 2) for pair, corr in self.get_correlated_pairs(symbol)},
+                portfolio_correlation=self.calculate_portfolio_correlation
+            )
 
         except Exception as e:
-            logging.error(f"Error logging correlation analysis: {str(e)}")
\ No newline at end of file
+            logging.error(f"Error logging correlation analysis: {str(e)}")
@@ -0,0 +1,222 @@
+import numpy as np
+from scipy.cluster.hierarchy import linkage, fcluster
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial.distance import squareform
+
+
+class CorrelationEngine:
+    """Rolling correlation of timestamp-aligned bar returns
+
+    Keeps running sums (sum x, sum xy; the diagonal of sum xy is sum x²)
+    over the last `window` aligned returns, so each new bar costs O(N²)
+    instead of recomputing the whole matrix over the window. With a
+    `halflife` (in bars) the sums decay exponentially instead and older
+    returns fade out rather than drop off the window.
+    """
+
+    def __init__(self, symbols, window=100, halflife=None):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        self.decay = 0.5 ** (1.0 / halflife) if halflife else None
+
+        size = len(self.symbols)
+        self.buffer = np.zeros((window, size))
+        self.sum_x = np.zeros(size)
+        self.sum_xy = np.zeros((size, size))
+        self.weight = 0.0
+        self.count = 0    # returns added since the last reset
+        self.pushes = 0   # returns added since the sums were last recomputed exactly
+
+        self.last_time = None
+        self.last_close = np.full(size, np.nan)
+        self.version = 0
+        self.cached = None
+
+    def reset(self):
+        self.buffer[:] = 0
+        self.sum_x[:] = 0
+        self.sum_xy[:] = 0
+        self.weight = 0.0
+        self.count = 0
+        self.pushes = 0
+        self.cached = None
+
+    def ingest(self, rates_by_symbol):
+        """Add closed bars newer than the last aligned bar; returns the number of new rows
+
+        `rates_by_symbol` maps symbols to MT5 rates arrays of closed bars.
+        Bars are aligned on open time up to the latest time every symbol with
+        data has reached; a symbol missing a bar carries its last close
+        forward (zero return).
+        """
+        series = []
+        for symbol in self.symbols:
+            rates = rates_by_symbol.get(symbol)
+            series.append(rates if rates is not None and len(rates) else None)
+
+        available = [rates for rates in series if rates is not None]
+        if not available:
+            return 0
+
+        # Only times every symbol has reached are complete
+        frontier = min(int(rates['time'][-1]) for rates in available)
+        times = np.unique(np.concatenate([rates['time'] for rates in available]))
+        times = times[times <= frontier]
+        if self.last_time is not None:
+            times = times[times > self.last_time]
+        if len(times) == 0:
+            return 0
+
+        # Forward-filled closes at each aligned time, one column per symbol
+        closes = np.full((len(times), len(self.symbols)), np.nan)
+        for i, rates in enumerate(series):
+            if rates is None:
+                continue
+            position = np.searchsorted(rates['time'], times, side='right') - 1
+            valid = position >= 0
+            closes[valid, i] = rates['close'][position[valid]]
+
+        previous = np.vstack([self.last_close, closes[:-1]])
+        previous = np.where(np.isnan(previous), closes, previous)
+        returns = closes / previous - 1.0
+        returns[~np.isfinite(returns)] = 0.0
+        if self.last_time is None:
+            # The first row has no previous close
+            returns = returns[1:]
+
+        self.last_time = int(times[-1])
+        self.last_close = np.where(np.isnan(closes[-1]), self.last_close, closes[-1])
+
+        if len(returns) >= self.window and self.decay is None:
+            self.rebuild(returns[-self.window:])
+        else:
+            for row in returns:
+                self.push(row)
+        self.version += 1
+        self.cached = None
+        return len(returns)
+
+    def push(self, returns):
+        """Add one aligned return vector"""
+        if self.decay is not None:
+            self.sum_x *= self.decay
+            self.sum_xy *= self.decay
+            self.weight = self.weight * self.decay + 1.0
+            self.sum_x += returns
+            self.sum_xy += np.outer(returns, returns)
+            self.count += 1
+            return
+
+        slot = self.count % self.window
+        if self.count >= self.window:
+            oldest = self.buffer[slot]
+            self.sum_x -= oldest
+            self.sum_xy -= np.outer(oldest, oldest)
+        self.buffer[slot] = returns
+        self.sum_x += returns
+        self.sum_xy += np.outer(returns, returns)
+        self.count += 1
+        self.weight = float(min(self.count, self.window))
+
+        # Recompute exactly once per window so subtraction errors cannot accumulate
+        self.pushes += 1
+        if self.pushes >= self.window:
+            self.resum()
+
+    def rebuild(self, returns):
+        """Replace the window with the given rows (oldest first)"""
+        self.reset()
+        self.buffer[:len(returns)] = returns
+        self.count = len(returns)
+        self.weight = float(len(returns))
+        self.resum()
+
+    def resum(self):
+        rows = self.buffer[:min(self.count, self.window)]
+        self.sum_x = rows.sum(axis=0)
+        self.sum_xy = rows.T @ rows
+        self.pushes = 0
+
+    def matrix(self):
+        """Correlation matrix in `symbols` order, None until two returns are in"""
+        if self.count < 2:
+            return None
+        if self.cached is not None:
+            return self.cached
+
+        mean = self.sum_x / self.weight
+        covariance = self.sum_xy / self.weight - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        scale = np.outer(std, std)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = np.where(scale > 0, covariance / scale, 0.0)
+        correlation = np.clip(correlation, -1.0, 1.0)
+        np.fill_diagonal(correlation, 1.0)
+
+        self.cached = correlation
+        return correlation
+
+    def correlation(self, symbol1, symbol2):
+        matrix = self.matrix()
+        if matrix is None or symbol1 not in self.index or symbol2 not in self.index:
+            return 0.0
+        return float(matrix[self.index[symbol1], self.index[symbol2]])
+
+
+class CorrelationClusters:
+    """Partition of symbols into correlated clusters, computed once per matrix
+
+    'components' joins symbols linked by |correlation| above the threshold
+    (transitively); 'hierarchical' cuts an average-linkage tree on the
+    distance 1 - |correlation| at 1 - threshold, which keeps loosely
+    chained symbols apart. Every symbol belongs to exactly one cluster.
+    """
+
+    def __init__(self, symbols, matrix, threshold=0.7, method='components'):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        strength = np.abs(matrix)
+
+        if method == 'hierarchical' and len(self.symbols) > 1:
+            distance = np.clip(1.0 - strength, 0.0, None)
+            np.fill_diagonal(distance, 0.0)
+            tree = linkage(squareform(distance, checks=False), method='average')
+            labels = fcluster(tree, t=1.0 - threshold, criterion='distance')
+        elif method in ('components', 'hierarchical'):
+            _, labels = connected_components(strength > threshold, directed=False)
+        else:
+            raise ValueError(f"Unknown clustering method: {method}")
+
+        # Number clusters by first appearance so results are stable
+        _, first, labels = np.unique(labels, return_index=True, return_inverse=True)
+        order = np.argsort(np.argsort(first))
+        self.labels = order[labels]
+        self.groups = [[] for _ in range(len(first))]
+        for symbol, label in zip(self.symbols, self.labels):
+            self.groups[label].append(symbol)
+
+        # Orientation relative to each cluster's first symbol: -1 where it moves inversely
+        roots = np.array([self.index[group[0]] for group in self.groups])
+        self.orientation = np.where(matrix[roots[self.labels], np.arange(len(self.symbols))] < 0, -1.0, 1.0)
+
+    def cluster_of(self, symbol):
+        """Cluster number of a symbol, None if unknown"""
+        i = self.index.get(symbol)
+        return None if i is None else int(self.labels[i])
+
+    def members(self, symbol):
+        label = self.cluster_of(symbol)
+        return [] if label is None else self.groups[label]
+
+    def exposures(self, vector):
+        """Net signed volume per cluster, oriented to each cluster's first symbol"""
+        return np.bincount(self.labels, weights=self.orientation * vector, minlength=len(self.groups))
+
+    def exposure(self, symbol, exposures):
+        """A cluster's net exposure seen from one member (positive means long that symbol)"""
+        i = self.index.get(symbol)
+        if i is None:
+            return 0.0
+        return float(self.orientation[i] * exposures[self.labels[i]])
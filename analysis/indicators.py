@@ -0,0 +1,332 @@
+import MetaTrader5 as mt5
+import math
+import logging
+import threading
+from collections import deque
+import numpy as np
+from ..config.trading_config import TradingConfig
+from ..config.profiles import ProfileStore
+from ..core.bar_store import BarStore
+from ..utils.instrumentation import timed
+
+NaN = float('nan')
+
+
+class EMA:
+    """Streaming EMA seeded with an SMA, matching pandas_ta ema"""
+
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = NaN
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        self.count += 1
+        if self.count < self.length:
+            self.seed_sum += x
+        elif self.count == self.length:
+            self.seed_sum += x
+            self.value = self.seed_sum / self.length
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+    def clone(self):
+        other = EMA.__new__(EMA)
+        other.__dict__.update(self.__dict__)
+        return other
+
+
+class RMA:
+    """Streaming Wilder average, matching pandas_ta rma (adjusted ewm)"""
+
+    def __init__(self, length):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.count = 0
+        self.num = 0.0
+        self.den = 0.0
+        self.value = NaN
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        self.count += 1
+        self.num = x + self.decay * self.num
+        self.den = 1.0 + self.decay * self.den
+        if self.count >= self.length:
+            self.value = self.num / self.den
+        return self.value
+
+    def clone(self):
+        other = RMA.__new__(RMA)
+        other.__dict__.update(self.__dict__)
+        return other
+
+
+class RollingWindow:
+    """Fixed-length window with running sum and sum of squares"""
+
+    def __init__(self, length):
+        self.length = length
+        self.values = deque(maxlen=length)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.updates = 0
+
+    def update(self, x):
+        if math.isnan(x):
+            return
+        if len(self.values) == self.length:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+
+        # Resync running sums now and then to stop floating point drift
+        self.updates += 1
+        if self.updates % 1000 == 0:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+
+    def full(self):
+        return len(self.values) == self.length
+
+    def mean(self):
+        if not self.full():
+            return NaN
+        return self.total / self.length
+
+    def std(self, ddof=0):
+        if not self.full():
+            return NaN
+        mean = self.total / self.length
+        var = (self.total_sq - self.length * mean * mean) / (self.length - ddof)
+        return math.sqrt(max(var, 0.0))
+
+    def clone(self):
+        other = RollingWindow.__new__(RollingWindow)
+        other.length = self.length
+        other.values = deque(self.values, maxlen=self.length)
+        other.total = self.total
+        other.total_sq = self.total_sq
+        other.updates = self.updates
+        return other
+
+
+class IndicatorState:
+    """Streaming EMA/RSI/ATR/BBands/MACD/Stochastic state for one series"""
+
+    def __init__(self, config=TradingConfig, atr_average_window=100):
+        self.config = config
+        self.ema_fast = EMA(config.EMA_FAST)
+        self.ema_slow = EMA(config.EMA_SLOW)
+        self.ema_long = EMA(config.EMA_LONG)
+
+        self.rsi_gain = RMA(config.RSI_PERIOD)
+        self.rsi_loss = RMA(config.RSI_PERIOD)
+
+        self.atr = RMA(config.ATR_PERIOD)
+        self.atr_window = RollingWindow(atr_average_window)
+
+        self.bb_std = config.BB_STD
+        self.bb_window = RollingWindow(config.BB_PERIOD)
+
+        # MACD uses pandas_ta defaults (12, 26, 9)
+        self.macd_fast = EMA(12)
+        self.macd_slow = EMA(26)
+        self.macd_signal = EMA(9)
+        self.macd = NaN
+
+        # Stochastic uses pandas_ta defaults (14, 3, 3)
+        self.stoch_highs = deque(maxlen=14)
+        self.stoch_lows = deque(maxlen=14)
+        self.stoch_k = RollingWindow(3)
+        self.stoch_d = RollingWindow(3)
+
+        self.last_time = None
+        self.last_close = NaN
+        self.bars = 0
+
+    def update(self, bar):
+        """Fold one closed bar into the state"""
+        high = float(bar['high'])
+        low = float(bar['low'])
+        close = float(bar['close'])
+        prev_close = self.last_close
+
+        self.ema_fast.update(close)
+        self.ema_slow.update(close)
+        self.ema_long.update(close)
+
+        if not math.isnan(prev_close):
+            change = close - prev_close
+            self.rsi_gain.update(max(change, 0.0))
+            self.rsi_loss.update(max(-change, 0.0))
+
+            true_range = max(high - low, abs(high - prev_close), abs(prev_close - low))
+            self.atr_window.update(self.atr.update(true_range))
+
+        self.bb_window.update(close)
+
+        fast = self.macd_fast.update(close)
+        slow = self.macd_slow.update(close)
+        self.macd = fast - slow
+        self.macd_signal.update(self.macd)
+
+        self.stoch_highs.append(high)
+        self.stoch_lows.append(low)
+        if len(self.stoch_highs) == self.stoch_highs.maxlen:
+            highest = max(self.stoch_highs)
+            lowest = min(self.stoch_lows)
+            stoch = 100 * (close - lowest) / (highest - lowest) if highest > lowest else 0.0
+            self.stoch_k.update(stoch)
+            self.stoch_d.update(self.stoch_k.mean())
+
+        self.last_time = int(bar['time'])
+        self.last_close = close
+        self.bars += 1
+
+    def clone(self):
+        """Copy the state so a forming bar can be applied without committing it"""
+        other = IndicatorState.__new__(IndicatorState)
+        for name, value in self.__dict__.items():
+            if hasattr(value, 'clone'):
+                value = value.clone()
+            elif isinstance(value, deque):
+                value = deque(value, maxlen=value.maxlen)
+            other.__dict__[name] = value
+        return other
+
+    def rsi(self):
+        gain = self.rsi_gain.value
+        loss = self.rsi_loss.value
+        if math.isnan(gain) or math.isnan(loss) or gain + loss == 0:
+            return NaN
+        return 100 * gain / (gain + loss)
+
+    def values(self):
+        """Latest indicator values"""
+        middle = self.bb_window.mean()
+        deviation = self.bb_window.std() * self.bb_std
+        return {
+            'time': self.last_time,
+            'close': self.last_close,
+            'ema_fast': self.ema_fast.value,
+            'ema_slow': self.ema_slow.value,
+            'ema_long': self.ema_long.value,
+            'rsi': self.rsi(),
+            'atr': self.atr.value,
+            'atr_avg': self.atr_window.total / len(self.atr_window.values) if self.atr_window.values else NaN,
+            'bb_lower': middle - deviation,
+            'bb_middle': middle,
+            'bb_upper': middle + deviation,
+            'macd': self.macd,
+            'macd_signal': self.macd_signal.value,
+            'macd_hist': self.macd - self.macd_signal.value,
+            'stoch_k': self.stoch_k.mean(),
+            'stoch_d': self.stoch_d.mean(),
+        }
+
+
+class IndicatorEngine:
+    """Per-symbol streaming indicators fed from the shared bar store"""
+
+    def __init__(self, bar_store=None, timeframe=mt5.TIMEFRAME_M5, lookback=500, profiles=None):
+        self.bar_store = bar_store if bar_store is not None else BarStore.get_instance()
+        self.timeframe = timeframe
+        self.lookback = lookback
+        self.profiles = profiles if profiles is not None else ProfileStore.get_instance()
+        self.states = {}
+        self.snapshots = {}
+        # One lock per symbol state so workers on different symbols run in parallel,
+        # the engine lock only guards adding a symbol
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def symbol_lock(self, symbol):
+        """Lock guarding the state and snapshot of one symbol"""
+        lock = self.locks.get(symbol)
+        if lock is None:
+            with self.lock:
+                lock = self.locks.setdefault(symbol, threading.Lock())
+        return lock
+
+    @timed('indicators.get_values')
+    def get_values(self, symbol):
+        """Get latest indicator values for a symbol, including the forming bar"""
+        try:
+            rates = self.bar_store.get_rates(symbol, self.timeframe, self.lookback)
+            if rates is None or len(rates) < 2:
+                return None
+
+            profile = self.profiles.get(symbol)
+            with self.symbol_lock(symbol):
+                forming = rates[-1]
+                key = (int(forming['time']), float(forming['high']),
+                       float(forming['low']), float(forming['close']))
+                cached = self.snapshots.get(symbol)
+                if cached is not None and cached[0] == key and cached[2] is profile:
+                    return cached[1]
+
+                state = self.advance(symbol, rates[:-1], profile)
+
+                # Closed bars are committed, the forming bar is applied to a copy
+                current = state.clone()
+                current.update(forming)
+
+                values = current.values()
+                values['prev_macd'] = state.macd
+                values['prev_macd_signal'] = state.macd_signal.value
+
+                self.snapshots[symbol] = (key, values, profile)
+                return values
+
+        except Exception as e:
+            logging.error(f"Error updating indicators for {symbol}: {str(e)}")
+            return None
+
+    def advance(self, symbol, closed, profile):
+        """Commit newly closed bars, rebuilding the state on cold start, gap or new parameters"""
+        state = self.states.get(symbol)
+        start = 0
+
+        if state is not None and state.config is not profile:
+            state = None
+
+        if state is not None and state.last_time is not None:
+            times = closed['time']
+            start = int(np.searchsorted(times, state.last_time))
+            if start < len(times) and times[start] == state.last_time:
+                start += 1
+            else:
+                # Last committed bar is not in the window, bars were missed
+                state = None
+                start = 0
+
+        if state is None:
+            state = IndicatorState(profile, atr_average_window=min(100, self.lookback))
+            self.states[symbol] = state
+
+        for bar in closed[start:]:
+            state.update(bar)
+
+        return state
+
+    def reset(self, symbol=None):
+        """Discard streaming state so it is rebuilt from history"""
+        if symbol is None:
+            with self.lock:
+                symbols = list(self.locks)
+        else:
+            symbols = [symbol]
+        for symbol in symbols:
+            with self.symbol_lock(symbol):
+                self.states.pop(symbol, None)
+                self.snapshots.pop(symbol, None)
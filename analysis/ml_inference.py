@@ -0,0 +1,245 @@
+import MetaTrader5 as mt5
+import math
+import logging
+import threading
+import numpy as np
+from ..config.mt5_config import MT5Config
+from ..config.trading_config import TradingConfig
+from ..core.bar_store import BarStore
+from .indicators import RollingWindow, NaN
+from ..utils.instrumentation import timed
+
+
+class EWM:
+    """Streaming pandas ewm(span, adjust=False), seeded with the first value"""
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1)
+        self.value = NaN
+
+    def update(self, x):
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class FeatureState:
+    """Streaming version of ml_optimizer.build_features for one series
+
+    Produces the same returns, volatility, rsi, macd and band values as the
+    pandas code the model was trained on, one closed bar at a time.
+    """
+
+    def __init__(self):
+        self.volatility = RollingWindow(20)
+        self.gain = RollingWindow(14)
+        self.loss = RollingWindow(14)
+        self.fast = EWM(12)
+        self.slow = EWM(26)
+        self.bands = RollingWindow(20)
+        self.returns = NaN
+        self.last_time = None
+        self.last_close = NaN
+
+    def update(self, bar):
+        close = float(bar['close'])
+        prev_close = self.last_close
+
+        if math.isnan(prev_close):
+            # pandas fills the first (undefined) change with 0 in gain and loss
+            change = 0.0
+            self.returns = NaN
+        else:
+            change = close - prev_close
+            self.returns = close / prev_close - 1
+            self.volatility.update(self.returns)
+        self.gain.update(max(change, 0.0))
+        self.loss.update(max(-change, 0.0))
+
+        self.fast.update(close)
+        self.slow.update(close)
+        self.bands.update(close)
+
+        self.last_time = int(bar['time'])
+        self.last_close = close
+
+    def rsi(self):
+        gain = self.gain.mean()
+        loss = self.loss.mean()
+        if math.isnan(gain) or math.isnan(loss) or (gain == 0 and loss == 0):
+            return NaN
+        if loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + gain / loss)
+
+    def values(self):
+        """Latest feature values by name"""
+        middle = self.bands.mean()
+        deviation = self.bands.std(ddof=1) * 2
+        return {
+            'returns': self.returns,
+            'volatility': self.volatility.std(ddof=1),
+            'rsi': self.rsi(),
+            'macd': self.fast.value - self.slow.value,
+            'bb_upper': middle + deviation,
+            'bb_lower': middle - deviation,
+        }
+
+
+class CompiledForest:
+    """Random forest flattened into arrays for batched prediction
+
+    All trees are concatenated into one node table and every (tree, row)
+    pair descends one level per step, so a batch costs max_depth numpy
+    operations instead of a Python call per tree.
+    """
+
+    def __init__(self, model):
+        left, right, feature, threshold, value = [], [], [], [], []
+        roots = []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            leaf = tree.children_left < 0
+            roots.append(offset)
+            left.append(np.where(leaf, -1, tree.children_left + offset))
+            right.append(np.where(leaf, -1, tree.children_right + offset))
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            # Class counts (or fractions) per node, normalized to probabilities
+            counts = tree.value[:, 0, :]
+            value.append(counts / counts.sum(axis=1, keepdims=True))
+            offset += tree.node_count
+
+        self.left = np.concatenate(left)
+        self.right = np.concatenate(right)
+        self.feature = np.concatenate(feature)
+        self.threshold = np.concatenate(threshold)
+        self.value = np.concatenate(value)
+        self.roots = np.array(roots)
+        self.classes = model.classes_
+        self.depth = max(estimator.tree_.max_depth for estimator in model.estimators_)
+
+    def predict_proba(self, X):
+        """Class probabilities averaged over the trees, rows in X order"""
+        # sklearn compares features as float32
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))
+        nodes = np.repeat(self.roots[:, None], len(X), axis=1)
+
+        for _ in range(self.depth):
+            left = self.left[nodes]
+            internal = left >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.right[nodes]), nodes)
+
+        return self.value[nodes].mean(axis=0)
+
+
+class ModelPredictor:
+    """Scaler and model of one trained ModelState, ready for batched prediction"""
+
+    def __init__(self, state, compiled=None):
+        compiled = compiled if compiled is not None else TradingConfig.ML_COMPILED_INFERENCE
+        self.features = list(state.features)
+        self.model = state.model
+        self.mean = np.asarray(state.scaler.mean_)
+        self.scale = np.asarray(state.scaler.scale_)
+        self.forest = CompiledForest(state.model) if compiled else None
+        self.up = list(state.model.classes_).index(1)
+
+    def predict_up(self, X):
+        """Probability that price is higher TARGET_HORIZON bars later, one per row"""
+        X = (np.asarray(X, dtype=float) - self.mean) / self.scale
+        if self.forest is not None:
+            return self.forest.predict_proba(X)[:, self.up]
+        return self.model.predict_proba(X)[:, self.up]
+
+
+class MLScorer:
+    """Model probabilities for every symbol's latest closed bar, batched once per cycle
+
+    Features are kept as streaming state per symbol on the shared bar store,
+    so each cycle only folds in the bars closed since the last one.
+    """
+
+    def __init__(self, optimizer, symbols=None, bar_store=None, timeframe=mt5.TIMEFRAME_M5, lookback=300):
+        self.optimizer = optimizer
+        self.symbols = symbols  # None follows MT5Config.SYMBOLS, which load_symbols replaces
+        self.bar_store = bar_store if bar_store is not None else BarStore.get_instance()
+        self.timeframe = timeframe
+        self.lookback = lookback
+        self.states = {}
+        self.scores = None
+        self.lock = threading.Lock()
+
+    def begin_cycle(self):
+        """Score again on the next request"""
+        self.scores = None
+
+    def score(self, symbol):
+        """Probability of an up move for the symbol, None without a model or features"""
+        with self.lock:
+            if self.scores is None:
+                symbols = self.symbols if self.symbols is not None else list(MT5Config.SYMBOLS)
+                self.scores = self.score_all(symbols)
+            return self.scores.get(symbol)
+
+    @timed('ml.score_all')
+    def score_all(self, symbols):
+        """Score every symbol in a single model call"""
+        try:
+            predictor = self.optimizer.predictor
+            if predictor is None:
+                return {}
+
+            scored = []
+            rows = []
+            for symbol in symbols:
+                values = self.features(symbol)
+                if values is None:
+                    continue
+                row = [values[name] for name in predictor.features]
+                if any(math.isnan(value) for value in row):
+                    continue
+                scored.append(symbol)
+                rows.append(row)
+
+            if not rows:
+                return {}
+            return dict(zip(scored, predictor.predict_up(rows).tolist()))
+
+        except Exception as e:
+            logging.error(f"Error scoring symbols: {str(e)}")
+            return {}
+
+    def features(self, symbol):
+        """Latest feature values for the last closed bar of a symbol"""
+        rates = self.bar_store.get_rates(symbol, self.timeframe, self.lookback)
+        if rates is None or len(rates) < 2:
+            return None
+        closed = rates[:-1]
+
+        state = self.states.get(symbol)
+        start = 0
+        if state is not None:
+            times = closed['time']
+            start = int(np.searchsorted(times, state.last_time))
+            if start < len(times) and times[start] == state.last_time:
+                start += 1
+            else:
+                # Last folded bar is not in the window, bars were missed
+                state = None
+                start = 0
+
+        if state is None:
+            state = FeatureState()
+            self.states[symbol] = state
+
+        for bar in closed[start:]:
+            state.update(bar)
+        return state.values()
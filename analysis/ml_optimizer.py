@@ -6,82 +6,268 @@ from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import joblib
 import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, CancelledError
 from datetime import datetime
 import MetaTrader5 as mt5
+from ..config.mt5_config import MT5Config
 from ..config.trading_config import TradingConfig
+from ..core.bar_store import TIMEFRAME_SECONDS
+from ..utils.instrumentation import timed
+from ..utils.logger import log_event
+from .ml_inference import ModelPredictor
+from ..backtest.data import dataframe_to_rates
+from ..backtest.walk_forward import WalkForwardOptimizer, write_parameters
+
+FEATURES = ['returns', 'volatility', 'rsi', 'macd', 'bb_upper', 'bb_lower']
+RAW_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread']
+TARGET_HORIZON = 10   # bars ahead the target looks
+FEATURE_MARGIN = 300  # bars recomputed before new ones so rolling/EWM features settle
+
+# Everything a prediction needs, swapped in as one object
+ModelState = namedtuple('ModelState', ['model', 'scaler', 'features', 'feature_importance',
+                                       'metrics', 'trained_at'])
+
+
+def build_features(df):
+    """Model features and target for a frame of bars (target is NaN where the future is unknown)"""
+    df = df[RAW_COLUMNS].copy()
+    close = df['close']
+
+    df['returns'] = close.pct_change()
+    df['volatility'] = df['returns'].rolling(window=20).std()
+
+    # Technical indicators
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    df['rsi'] = 100 - (100 / (1 + gain / loss))
+    df['macd'] = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    sma = close.rolling(window=20).mean()
+    std_dev = close.rolling(window=20).std()
+    df['bb_upper'] = sma + std_dev * 2
+    df['bb_lower'] = sma - std_dev * 2
+
+    # 1 if price is higher TARGET_HORIZON bars later, else 0
+    future = close.shift(-TARGET_HORIZON)
+    df['target'] = (future > close).astype(float).where(future.notna())
+    return df
+
+
+def train_model_job(X, y, features, n_jobs=-1, n_splits=5):
+    """Scale, cross-validate and fit the forest; runs in the training process"""
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    def make_model():
+        return RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42, n_jobs=n_jobs)
+
+    # Time series cross-validation
+    metrics = {'accuracy': [], 'precision': [], 'recall': [], 'f1': []}
+    for train_idx, val_idx in TimeSeriesSplit(n_splits=n_splits).split(X_scaled):
+        model = make_model()
+        model.fit(X_scaled[train_idx], y[train_idx])
+        predictions = model.predict(X_scaled[val_idx])
+
+        metrics['accuracy'].append(accuracy_score(y[val_idx], predictions))
+        metrics['precision'].append(precision_score(y[val_idx], predictions, zero_division=0))
+        metrics['recall'].append(recall_score(y[val_idx], predictions, zero_division=0))
+        metrics['f1'].append(f1_score(y[val_idx], predictions, zero_division=0))
+
+    # Final model on all data
+    model = make_model()
+    model.fit(X_scaled, y)
+    importance = pd.Series(model.feature_importances_, index=features).sort_values(ascending=False)
+
+    return ModelState(model, scaler, list(features), importance, metrics, datetime.now())
+
+
+class FeatureCache:
+    """Per-symbol feature frames kept on disk and extended with new bars only
+
+    The first request fetches `bars` closed bars; later requests fetch just
+    the bars closed since, and recompute features over them plus a margin
+    of FEATURE_MARGIN older bars.
+    """
+
+    def __init__(self, directory=None, bars=None, source=None):
+        self.directory = directory if directory is not None else TradingConfig.ML_FEATURE_CACHE_DIR
+        self.bars = bars if bars is not None else TradingConfig.ML_HISTORY_BARS
+        self.source = source if source is not None else mt5
+        self.frames = {}  # (symbol, timeframe) -> frame
+
+    def path(self, symbol, timeframe):
+        return os.path.join(self.directory, f"{symbol}_{timeframe}.pkl")
+
+    def get(self, symbol, timeframe):
+        """Feature frame of closed bars, oldest first"""
+        key = (symbol, timeframe)
+        frame = self.frames.get(key)
+        if frame is None:
+            frame = self.load(symbol, timeframe)
+
+        if frame is None or frame.empty:
+            rates = self.source.copy_rates_from_pos(symbol, timeframe, 0, self.bars + 1)
+            if rates is None or len(rates) < 2:
+                return None
+            frame = build_features(pd.DataFrame(rates[:-1]))
+        else:
+            frame = self.extend(symbol, timeframe, frame)
+            if frame is None:
+                return None
+
+        frame = frame.iloc[-self.bars:].reset_index(drop=True)
+        self.frames[key] = frame
+        self.save(symbol, timeframe, frame)
+        return frame
+
+    def extend(self, symbol, timeframe, frame):
+        """Append bars closed since the last cached bar"""
+        tf_seconds = TIMEFRAME_SECONDS.get(timeframe, 60)
+        last_time = int(frame['time'].iloc[-1])
+
+        # Bars elapsed since the last cached one in server time, plus the
+        # forming bar and one bar of overlap
+        tick = self.source.symbol_info_tick(symbol)
+        if tick is None:
+            return frame
+        count = min((int(tick.time) - last_time) // tf_seconds + 2, self.bars + 1)
+        if count < 4:
+            # Still the bar right after the cached one forming
+            return frame
+        rates = self.source.copy_rates_from_pos(symbol, timeframe, 0, count)
+        if rates is None or len(rates) < 2:
+            return frame
+
+        closed = pd.DataFrame(rates[:-1])
+        if closed['time'].iloc[0] > last_time + tf_seconds:
+            # Missing bars in between (weekend gap, history moved on): start over
+            rates = self.source.copy_rates_from_pos(symbol, timeframe, 0, self.bars + 1)
+            if rates is None or len(rates) < 2:
+                return None
+            return build_features(pd.DataFrame(rates[:-1]))
+
+        new = closed[closed['time'] > last_time]
+        if new.empty:
+            return frame
+
+        # Recompute the margin so rolling features and pending targets are exact
+        raw = pd.concat([frame[RAW_COLUMNS].iloc[-FEATURE_MARGIN:], new[RAW_COLUMNS]], ignore_index=True)
+        features = build_features(raw)
+        replaced = min(TARGET_HORIZON, len(frame))
+        tail = features.iloc[len(raw) - len(new) - replaced:]
+        return pd.concat([frame.iloc[:len(frame) - replaced], tail], ignore_index=True)
+
+    def load(self, symbol, timeframe):
+        path = self.path(symbol, timeframe)
+        try:
+            if os.path.exists(path):
+                frame = pd.read_pickle(path)
+                # Frames cached before a column was added are rebuilt
+                if set(RAW_COLUMNS) <= set(frame.columns):
+                    return frame
+        except Exception as e:
+            logging.error(f"Error loading feature cache for {symbol}: {str(e)}")
+        return None
+
+    def save(self, symbol, timeframe, frame):
+        """Write through a temporary file so a crash never leaves a partial cache"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(symbol, timeframe)
+            frame.to_pickle(path + '.tmp')
+            os.replace(path + '.tmp', path)
+        except Exception as e:
+            logging.error(f"Error saving feature cache for {symbol}: {str(e)}")
+
 
 class MLOptimizer:
-    def __init__(self):
-        self.current_time = datetime.strptime("2025-03-12 00:07:07", "%Y-%m-%d %H:%M:%S")
+    def __init__(self, feature_cache=None, executor=None):
+        self.current_time = datetime.now()
         self.login = "zzzz14"
-        self.model = None
-        self.scaler = StandardScaler()
+        self.state = None  # active ModelState, replaced as a whole
+        self.predictor = None  # batched inference for the active state
         self.last_optimization = None
-        self.feature_importance = None
         self.model_path = f"models/trading_model_{self.login}.joblib"
         self.optimization_interval = TradingConfig.OPTIMIZATION_INTERVAL
-
+        self.feature_cache = feature_cache if feature_cache is not None else FeatureCache()
+        
+        # Training runs off the trading thread; the pool is created on first use.
+        # Its data is prepared on a thread of its own so the loop only submits and collects.
+        self.executor = executor
+        self.pending = None
+        self.preparing = None
+        
+        # Walk-forward parameter search, run on its own thread and process pool
+        self.symbols = []
+        self.parameter_search = None
+        self.search = None  # WalkForwardOptimizer of the search in progress
+        self.last_parameter_search = 0.0
+        self.stopped = False
+
+    @property
+    def model(self):
+        return self.state.model if self.state is not None else None
+
+    @property
+    def scaler(self):
+        return self.state.scaler if self.state is not None else None
+
+    @property
+    def feature_importance(self):
+        return self.state.feature_importance if self.state is not None else None
+
+    @timed('ml.prepare_data')
     def prepare_data(self, symbol, timeframe=mt5.TIMEFRAME_M5):
         """Prepare data for machine learning"""
         try:
-            # Get historical data
-            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, 5000)
-            if rates is None:
+            # Cached features, extended with bars closed since the last run
+            df = self.feature_cache.get(symbol, timeframe)
+            if df is None:
                 raise Exception("Failed to get historical data")
 
-            df = pd.DataFrame(rates)
-            
-            # Calculate features
-            df['returns'] = df['close'].pct_change()
-            df['volatility'] = df['returns'].rolling(window=20).std()
-            
-            # Technical indicators
-            df['rsi'] = self.calculate_rsi(df['close'])
-            df['macd'] = self.calculate_macd(df['close'])
-            df['bb_upper'], df['bb_lower'] = self.calculate_bollinger_bands(df['close'])
-            
-            # Create target variable (1 for profit, 0 for loss)
-            df['target'] = (df['close'].shift(-10) > df['close']).astype(int)
+            # Remove rows with warm-up features or an unknown target
+            df = df.dropna(subset=FEATURES + ['target'])
             
-            # Remove missing values
-            df = df.dropna()
+            X = df[FEATURES]
+            y = df['target'].astype(int)
             
-            # Features for model
-            features = ['returns', 'volatility', 'rsi', 'macd', 
-                       'bb_upper', 'bb_lower']
-            
-            X = df[features]
-            y = df['target']
-            
-            return X, y, features
+            return X, y, FEATURES
 
         except Exception as e:
             logging.error(f"Error preparing data: {str(e)}")
             return None, None, None
 
+    def training_symbols(self, trading_history):
+        """Symbols traded in the history (dict keyed by symbol, deal store rows or deals), else the configured ones"""
+        if isinstance(trading_history, dict):
+            symbols = list(trading_history.keys())
+        elif isinstance(trading_history, np.ndarray):
+            symbols = sorted(set(trading_history['symbol'].tolist()) - {''})
+        else:
+            symbols = sorted({deal.symbol for deal in trading_history or () if getattr(deal, 'symbol', None)})
+        return symbols or list(MT5Config.SYMBOLS)
+
+    @timed('ml.optimize_parameters')
     def optimize_parameters(self, trading_history):
-        """Optimize trading parameters using machine learning"""
-        try:
-            if params is None:
-                raise ValueError("Params should not be None")
-            
-            # Misalkan params diharapkan sebagai dictionary
-            for key in params.keys():
-                print(f"Optimizing {key}")
-        except Exception as e:
-            logging.error(f"""
-{'='*50}
-Error optimizing parameters
-Time: {self.current_time}
-Login: {self.login}
-Error: {str(e)}
-{'='*50}
-            """)
+        """Start a background training run when due, and pick up a finished one"""
         try:
+            # Swap in a model that finished training since the last call
+            self.collect()
+            if self.pending is not None or (self.preparing is not None and self.preparing.is_alive()):
+                return
+            if self.stopped:
+                return
+
             # Check if optimization is needed
+            now = datetime.now()
             if (self.last_optimization and 
-                (self.current_time - self.last_optimization).total_seconds() < self.optimization_interval):
+                (now - self.last_optimization).total_seconds() < self.optimization_interval):
                 return
+            self.current_time = now
 
             logging.info(f"""
 {'='*50}
@@ -91,11 +277,21 @@ Login: {self.login}
 {'='*50}
             """)
 
-            # Prepare data for all symbols
+            # Refresh features and train in the background, the trading loop keeps the current model meanwhile
+            self.symbols = self.training_symbols(trading_history)
+            self.preparing = threading.Thread(target=self.start_training, args=(list(self.symbols), now),
+                                              name='ml-prepare', daemon=True)
+            self.preparing.start()
+
+        except Exception as e:
+            logging.error(f"Error optimizing parameters: {str(e)}")
+
+    def start_training(self, symbols, now):
+        """Prepare data for all symbols and submit a training run"""
+        try:
             all_X = []
             all_y = []
-            
-            for symbol in trading_history.keys():
+            for symbol in symbols:
                 X, y, features = self.prepare_data(symbol)
                 if X is not None and y is not None:
                     all_X.append(X)
@@ -105,99 +301,158 @@ Login: {self.login}
                 raise Exception("No valid data for optimization")
 
             # Combine data
-            X = pd.concat(all_X)
-            y = pd.concat(all_y)
+            X = pd.concat(all_X).to_numpy()
+            y = pd.concat(all_y).to_numpy()
+
+            if self.stopped:
+                return
+            self.pending = self.get_executor().submit(train_model_job, X, y, FEATURES, TradingConfig.ML_N_JOBS)
+            self.last_optimization = now
 
-            # Scale features
-            X_scaled = self.scaler.fit_transform(X)
+        except Exception as e:
+            logging.error(f"Error optimizing parameters: {str(e)}")
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=1)
+        return self.executor
 
-            # Train model
-            self.train_model(X_scaled, y)
+    def collect(self):
+        """Activate the result of a finished training run; True if a new model was swapped in"""
+        if self.pending is None or not self.pending.done():
+            return False
+
+        future, self.pending = self.pending, None
+        try:
+            state = future.result()
+        except Exception as e:
+            logging.error(f"Error training model: {str(e)}")
+            return False
 
-            # Update parameters based on model insights
-            self.update_trading_parameters()
+        self.activate(state)
 
-            # Save model
-            self.save_model()
+        self.log_training_metrics(state.metrics)
 
-            # Log optimization results
-            self.log_optimization_results()
+        # Update parameters based on model insights
+        self.update_trading_parameters()
 
-            self.last_optimization = self.current_time
+        # Save model
+        self.save_model()
 
-        except Exception as e:
-            logging.error(f"Error optimizing parameters: {str(e)}")
+        # Log optimization results
+        self.log_optimization_results()
+        return True
 
     def train_model(self, X, y):
-        """Train the machine learning model"""
+        """Train the machine learning model in the calling thread"""
         try:
-            # Initialize model
-            self.model = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42
-            )
-
-            # Time series cross-validation
-            tscv = TimeSeriesSplit(n_splits=5)
-            
-            # Performance metrics
-            metrics = {
-                'accuracy': [],
-                'precision': [],
-                'recall': [],
-                'f1': []
-            }
-
-            # Train and evaluate
-            for train_idx, val_idx in tscv.split(X):
-                X_train, X_val = X[train_idx], X[val_idx]
-                y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
-
-                self.model.fit(X_train, y_train)
-                predictions = self.model.predict(X_val)
-
-                metrics['accuracy'].append(accuracy_score(y_val, predictions))
-                metrics['precision'].append(precision_score(y_val, predictions))
-                metrics['recall'].append(recall_score(y_val, predictions))
-                metrics['f1'].append(f1_score(y_val, predictions))
-
-            # Store feature importance
-            self.feature_importance = pd.Series(
-                self.model.feature_importances_,
-                index=self.get_feature_names()
-            ).sort_values(ascending=False)
+            self.activate(train_model_job(np.asarray(X), np.asarray(y), self.get_feature_names(),
+                                          TradingConfig.ML_N_JOBS))
 
             # Log training metrics
-            self.log_training_metrics(metrics)
+            self.log_training_metrics(self.state.metrics)
 
         except Exception as e:
             logging.error(f"Error training model: {str(e)}")
 
+    def activate(self, state):
+        """Make a trained state the active model"""
+        # Predictions only read self.predictor, so they see either the old
+        # or the new model and scaler, never a mix
+        predictor = None
+        if state.scaler is not None:
+            try:
+                predictor = ModelPredictor(state)
+            except Exception as e:
+                logging.error(f"Error preparing model for inference: {str(e)}")
+        self.predictor = predictor
+        self.state = state
+
+    def shutdown(self):
+        """Stop the training process and parameter search, abandoning runs in progress"""
+        self.stopped = True
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        search = self.search
+        if search is not None:
+            search.stop()
+
     def update_trading_parameters(self):
-        """Update trading parameters based on model insights"""
+        """Start a walk-forward search of the trading parameters when due"""
         try:
-            if self.feature_importance is None:
+            if self.stopped:
+                return
+            if self.parameter_search is not None and self.parameter_search.is_alive():
+                return
+            if time.time() - self.last_parameter_search < TradingConfig.WALK_FORWARD_INTERVAL:
                 return
 
-            # Adjust parameters based on feature importance
-            for feature, importance in self.feature_importance.items():
-                if importance > 0.2:  # High importance threshold
-                    if 'rsi' in feature.lower():
-                        self.optimize_rsi_parameters()
-                    elif 'macd' in feature.lower():
-                        self.optimize_macd_parameters()
-                    elif 'bollinger' in feature.lower():
-                        self.optimize_bollinger_parameters()
+            # History is built on the search thread, off the trading loop
+            self.last_parameter_search = time.time()
+            self.parameter_search = threading.Thread(target=self.search_parameters, args=(list(self.symbols),),
+                                                     name='parameter-search', daemon=True)
+            self.parameter_search.start()
 
         except Exception as e:
             logging.error(f"Error updating parameters: {str(e)}")
 
+    def search_parameters(self, symbols):
+        """Run the walk-forward search and write the winners to PARAMETER_FILE"""
+        try:
+            started = time.time()
+
+            # Backtest on the cached bars the model was trained on
+            history = {}
+            points = {}
+            for symbol in symbols:
+                frame = self.feature_cache.get(symbol, mt5.TIMEFRAME_M5)
+                if frame is None:
+                    continue
+                history[symbol] = dataframe_to_rates(frame[RAW_COLUMNS])
+                symbol_info = mt5.symbol_info(symbol)
+                if symbol_info is not None:
+                    points[symbol] = symbol_info.point
+
+            if not history:
+                return
+
+            optimizer = WalkForwardOptimizer(samples=TradingConfig.WALK_FORWARD_SAMPLES,
+                                             n_jobs=TradingConfig.WALK_FORWARD_JOBS, points=points)
+            self.search = optimizer
+            if self.stopped:
+                return
+            report = optimizer.report(optimizer.run(history))
+            if not write_parameters(TradingConfig.PARAMETER_FILE, report):
+                return
+
+            lines = '\n'.join(f"- {symbol}: {result['parameters']} (out-of-sample pnl {result['out_of_sample']['pnl']})"
+                              for symbol, result in report['symbols'].items())
+            logging.info(f"""
+{'='*50}
+PARAMETER SEARCH COMPLETE
+Time: {datetime.now()} UTC
+Login: {self.login}
+Combinations: {report['combinations']} in {time.time() - started:.0f}s
+{'='*50}
+{lines}
+{'='*50}
+            """)
+
+        except CancelledError:
+            logging.info("Parameter search stopped")
+        except Exception as e:
+            logging.error(f"Error searching parameters: {str(e)}")
+        finally:
+            self.search = None
+
     def save_model(self):
-        """Save trained model to file"""
+        """Save trained model and scaler to file"""
         try:
-            if self.model is not None:
-                joblib.dump(self.model, self.model_path)
+            if self.state is not None:
+                # Replace the file in one step so a reader never loads half a model
+                os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+                joblib.dump(dict(self.state._asdict()), self.model_path + '.tmp')
+                os.replace(self.model_path + '.tmp', self.model_path)
                 logging.info(f"Model saved to {self.model_path}")
 
         except Exception as e:
@@ -206,7 +461,12 @@ Login: {self.login}
     def load_model(self):
         """Load trained model from file"""
         try:
-            self.model = joblib.load(self.model_path)
+            saved = joblib.load(self.model_path)
+            if isinstance(saved, dict):
+                self.activate(ModelState(**saved))
+            else:
+                # Older files hold only the estimator, unusable for inference without its scaler
+                self.activate(ModelState(saved, None, self.get_feature_names(), None, None, None))
             logging.info(f"Model loaded from {self.model_path}")
 
         except Exception as e:
@@ -214,7 +474,7 @@ Login: {self.login}
 
     def get_feature_names(self):
         """Get list of feature names"""
-        return ['returns', 'volatility', 'rsi', 'macd', 'bb_upper', 'bb_lower']
+        return list(FEATURES)
 
     def calculate_rsi(self, prices, period=14):
         """Calculate RSI indicator"""
@@ -256,28 +516,16 @@ Login: {self.login}
             if self.feature_importance is None:
                 return
 
-            analysis = f"""
-{'='*50}
-ML OPTIMIZATION RESULTS
-Time: {self.current_time} UTC
-Login: {self.login}
-{'='*50}
-
-Feature Importance:
-{self.feature_importance.to_string()}
-
-Updated Parameters:
-- RSI Period: {TradingConfig.RSI_PERIOD}
-- MACD Fast: {TradingConfig.EMA_FAST}
-- MACD Slow: {TradingConfig.EMA_SLOW}
-- BB Period: {TradingConfig.BB_PERIOD}
-
-Model Performance:
-- Accuracy: {self.model.score(self.scaler.transform(self.get_latest_data()), self.get_latest_targets()):.2f}
-{'='*50}
-            """
-            
-            logging.info(analysis)
+            log_event(
+                'ml_optimization_results',
+                feature_importance=lambda: {feature: round(float(value), 4)
+                                            for feature, value in self.feature_importance.items()},
+                rsi_period=TradingConfig.RSI_PERIOD,
+                ema_fast=TradingConfig.EMA_FAST,
+                ema_slow=TradingConfig.EMA_SLOW,
+                bb_period=TradingConfig.BB_PERIOD,
+                cv_accuracy=lambda: float(np.mean(self.state.metrics['accuracy']))
+            )
 
         except Exception as e:
             logging.error(f"Error logging optimization results: {str(e)}")
@@ -285,22 +533,11 @@ Model Performance:
     def log_training_metrics(self, metrics):
         """Log model training metrics"""
         try:
-            analysis = f"""
-{'='*50}
-MODEL TRAINING METRICS
-Time: {self.current_time} UTC
-Login: {self.login}
-{'='*50}
-
-Cross-validation Results:
-- Accuracy:  {np.mean(metrics['accuracy']):.2f} (±{np.std(metrics['accuracy']):.2f})
-- Precision: {np.mean(metrics['precision']):.2f} (±{np.std(metrics['precision']):.2f})
-- Recall:    {np.mean(metrics['recall']):.2f} (±{np.std(metrics['recall']):.2f})
-- F1 Score:  {np.mean(metrics['f1']):.2f} (±{np.std(metrics['f1']):.2f})
-{'='*50}
-            """
-            
-            logging.info(analysis)
+            log_event(
+                'ml_training_metrics',
+                **{name: lambda name=name: f"{np.mean(metrics[name]):.2f}±{np.std(metrics[name]):.2f}"
+                   for name in ('accuracy', 'precision', 'recall', 'f1')}
+            )
 
         except Exception as e:
-            logging.error(f"Error logging training metrics: {str(e)}")
\ No newline at end of file
+            logging.error(f"Error logging training metrics: {str(e)}")
@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from textblob import TextBlob
+from ..config.trading_config import TradingConfig
+
+
+def textblob_polarity(text):
+    """Polarity of a text from -1 (negative) to 1 (positive)"""
+    return TextBlob(text).sentiment.polarity
+
+
+def article_key(article):
+    """Stable identity of an article: its URL, else a hash of its text"""
+    url = article.get('url')
+    if url:
+        return url
+    text = f"{article.get('title') or ''}|{article.get('description') or ''}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class NewsSentimentWorker:
+    """Background news sentiment per currency
+
+    Symbols sharing a currency (EURUSD, EURJPY, EURGBP...) share one news
+    query, and each article is scored once however often it comes back.
+    The trading loop only reads the precomputed scores.
+    """
+
+    def __init__(self, news_api, refresh_interval=None, page_size=10, cache_size=None, scorer=None):
+        self.news_api = news_api
+        self.refresh_interval = (refresh_interval if refresh_interval is not None
+                                 else TradingConfig.NEWS_REFRESH_INTERVAL)
+        self.page_size = page_size
+        self.cache_size = cache_size if cache_size is not None else TradingConfig.NEWS_ARTICLE_CACHE_SIZE
+        self.scorer = scorer if scorer is not None else textblob_polarity
+
+        self.currencies = set()
+        self.scores = {}        # currency -> average polarity (-1 to 1)
+        self.updated = {}       # currency -> time of last refresh
+        self.articles = OrderedDict()  # article key -> polarity, least recently seen first
+
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start the worker thread (no-op if already running)"""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run, name='news-sentiment', daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=5):
+        self.stopped.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def track(self, symbol):
+        """Make sure the symbol's base and quote currencies are refreshed"""
+        new = False
+        with self.lock:
+            for currency in (symbol[:3], symbol[3:6]):
+                if currency and currency not in self.currencies:
+                    self.currencies.add(currency)
+                    new = True
+        if new:
+            self.start()
+            self.wake.set()
+
+    def due(self):
+        """Tracked currencies never refreshed or older than the refresh interval"""
+        now = time.time()
+        with self.lock:
+            return sorted(currency for currency in self.currencies
+                          if now - self.updated.get(currency, 0) >= self.refresh_interval)
+
+    def run(self):
+        while not self.stopped.is_set():
+            for currency in self.due():
+                if self.stopped.is_set():
+                    return
+                self.refresh(currency)
+
+            self.wake.wait(timeout=min(self.refresh_interval, 60))
+            self.wake.clear()
+
+    def refresh(self, currency):
+        """Fetch and score the latest news for one currency"""
+        try:
+            news = self.news_api.get_everything(
+                q=f'{currency} AND (forex OR currency OR economy)',
+                language='en',
+                sort_by='relevancy',
+                from_param=datetime.now().strftime('%Y-%m-%d'),
+                page_size=self.page_size
+            )
+            polarities = [self.article_polarity(article) for article in news.get('articles') or []]
+            score = float(np.mean(polarities)) if polarities else 0.0
+
+            with self.lock:
+                self.scores[currency] = score
+                self.updated[currency] = time.time()
+            return score
+
+        except Exception as e:
+            logging.error(f"Error refreshing news for {currency}: {str(e)}")
+            # Try again next interval rather than hammering the API
+            with self.lock:
+                self.updated[currency] = time.time()
+            return None
+
+    def article_polarity(self, article):
+        """Polarity of an article, scored once and then memoized"""
+        key = article_key(article)
+        with self.lock:
+            if key in self.articles:
+                self.articles.move_to_end(key)
+                return self.articles[key]
+
+        polarity = self.scorer(f"{article.get('title')} {article.get('description')}")
+
+        with self.lock:
+            self.articles[key] = polarity
+            while len(self.articles) > self.cache_size:
+                self.articles.popitem(last=False)
+        return polarity
+
+    def currency_score(self, currency):
+        """Latest polarity for a currency, 0 (neutral) until first fetched"""
+        return self.scores.get(currency, 0.0)
+
+    def symbol_score(self, symbol):
+        """Base currency news minus quote currency news, from -1 to 1"""
+        return (self.currency_score(symbol[:3]) - self.currency_score(symbol[3:6])) / 2
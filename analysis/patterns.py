@@ -0,0 +1,83 @@
+import numpy as np
+
+# Reversal patterns used by the scalper's price action check
+BULLISH_PATTERNS = ('bullish_engulfing', 'hammer')
+BEARISH_PATTERNS = ('bearish_engulfing', 'shooting_star')
+
+
+def candle_parts(open_, high, low, close):
+    """Body, upper wick, lower wick and full range of each candle"""
+    top = np.maximum(open_, close)
+    bottom = np.minimum(open_, close)
+    return close - open_, high - top, bottom - low, high - low
+
+
+def detect_patterns(open_, high, low, close, tail=None, avg_body=None):
+    """Detect candlestick patterns on OHLC arrays
+
+    Returns a dict of boolean arrays, one per pattern. With `tail` only the
+    last `tail` candles are evaluated, otherwise the whole history is scanned
+    in one pass. `avg_body` defaults to the mean body over all candles given.
+    """
+    open_ = np.asarray(open_, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+
+    if avg_body is None:
+        avg_body = np.abs(close - open_).mean() if len(close) else 0.0
+
+    if tail is not None:
+        # Keep one extra candle so two-candle patterns have a previous bar
+        start = max(len(close) - tail - 1, 0)
+        open_, high, low, close = open_[start:], high[start:], low[start:], close[start:]
+
+    signed_body, upper_wick, lower_wick, candle_range = candle_parts(open_, high, low, close)
+    body = np.abs(signed_body)
+
+    bullish = signed_body > 0
+    bearish = signed_body < 0
+    small_body = body < avg_body * 0.5
+
+    # Previous candle values, first candle has none
+    prev_open = np.r_[np.nan, open_[:-1]]
+    prev_close = np.r_[np.nan, close[:-1]]
+    prev_high = np.r_[np.nan, high[:-1]]
+    prev_low = np.r_[np.nan, low[:-1]]
+
+    patterns = {
+        'bullish_engulfing': (bullish & (prev_open > prev_close) &
+                              (open_ < prev_close) & (close > prev_open)),
+        'bearish_engulfing': (bearish & (prev_open < prev_close) &
+                              (open_ > prev_close) & (close < prev_open)),
+        'hammer': small_body & (lower_wick > body * 2) & (upper_wick < body * 0.5),
+        'shooting_star': small_body & (upper_wick > body * 2) & (lower_wick < body * 0.5),
+        'doji': (candle_range > 0) & (body <= candle_range * 0.1),
+        'bullish_pin_bar': (candle_range > 0) & (lower_wick >= candle_range * 2 / 3) &
+                           (body <= candle_range / 3),
+        'bearish_pin_bar': (candle_range > 0) & (upper_wick >= candle_range * 2 / 3) &
+                           (body <= candle_range / 3),
+        'inside_bar': (high < prev_high) & (low > prev_low),
+        'outside_bar': (high > prev_high) & (low < prev_low),
+    }
+
+    if tail is not None and len(close) > tail:
+        patterns = {name: hits[1:] for name, hits in patterns.items()}
+
+    return patterns
+
+
+def pattern_bias(patterns, bullish_patterns=BULLISH_PATTERNS, bearish_patterns=BEARISH_PATTERNS):
+    """Per-candle bias: 1 bullish, -1 bearish, 0 neutral (bullish wins ties)"""
+    bullish = np.logical_or.reduce([patterns[name] for name in bullish_patterns])
+    bearish = np.logical_or.reduce([patterns[name] for name in bearish_patterns])
+    return np.where(bullish, 1, np.where(bearish, -1, 0))
+
+
+def price_action_bias(open_, high, low, close):
+    """Price action direction of the latest candle"""
+    patterns = detect_patterns(open_, high, low, close, tail=1)
+    bias = pattern_bias(patterns)
+    if len(bias) == 0 or bias[-1] == 0:
+        return 'NEUTRAL'
+    return 'BULLISH' if bias[-1] > 0 else 'BEARISH'
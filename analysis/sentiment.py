@@ -11,12 +11,23 @@ from textblob import TextBlob
 from newsapi import NewsApiClient
 from tb.config.trading_config import TradingConfig
 from tb.analysis.technical import TechnicalAnalyzer
+from tb.analysis.indicators import IndicatorEngine
+from tb.analysis.news import NewsSentimentWorker
+from tb.core.bar_store import BarStore
+from tb.utils.instrumentation import timed
+from tb.utils.logger import log_event
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, bar_store=None, indicator_engine=None, news_worker=None):
+        self.bar_store = bar_store if bar_store is not None else BarStore.get_instance()
+        self.indicator_engine = (indicator_engine if indicator_engine is not None
+                                 else IndicatorEngine(self.bar_store))
         self.current_time = datetime.strptime("2025-03-12 00:04:15", "%Y-%m-%d %H:%M:%S")
         self.login = "zzzz14"
         self.news_api = NewsApiClient(api_key='your-news-api-key')  # Replace with your API key
+        
+        # News is fetched and scored per currency in the background
+        self.news_worker = news_worker if news_worker is not None else NewsSentimentWorker(self.news_api)
         self.sentiment_cache = {}
         self.last_update = {}
         
@@ -32,9 +43,12 @@ class SentimentAnalyzer:
             'last_update': None
         }
 
+    @timed('sentiment.get_market_sentiment')
     def get_market_sentiment(self, symbol):
         """Get overall market sentiment score for a symbol"""
         try:
+            self.current_time = datetime.now()
+            
             # Check cache freshness (5 minutes)
             if (symbol in self.sentiment_cache and 
                 (self.current_time - self.last_update.get(symbol, datetime.min)).total_seconds() < 300):
@@ -83,41 +97,28 @@ class SentimentAnalyzer:
             logging.error(f"Error calculating market sentiment: {str(e)}")
             return 0
 
+    @timed('sentiment.analyze_news')
     def analyze_news(self, symbol):
-        """Analyze news sentiment"""
+        """Analyze news sentiment from the precomputed currency scores"""
         try:
-            # Extract currencies from symbol
-            base_currency = symbol[:3]
-            quote_currency = symbol[3:]
-
-            # Get news for both currencies
-            news = self.news_api.get_everything(
-                q=f'({base_currency} OR {quote_currency}) AND (forex OR currency OR economy)',
-                language='en',
-                sort_by='relevancy',
-                from_param=self.current_time.strftime('%Y-%m-%d'),
-                page_size=10
-            )
+            # Start fetching the symbol's currencies if they are new
+            self.news_worker.track(symbol)
 
-            if not news['articles']:
-                return 0.5  # Neutral if no news
-
-            # Analyze sentiment for each article
-            sentiments = []
-            for article in news['articles']:
-                blob = TextBlob(f"{article['title']} {article['description']}")
-                sentiments.append(blob.sentiment.polarity)
-
-            # Average sentiment (-1 to 1)
-            avg_sentiment = np.mean(sentiments)
+            # Base currency news (-1 to 1) against quote currency news
+            score = self.news_worker.symbol_score(symbol)
 
             # Normalize to 0 to 1
-            return (avg_sentiment + 1) / 2
+            return (score + 1) / 2
 
         except Exception as e:
             logging.error(f"Error analyzing news: {str(e)}")
             return 0.5
 
+    def stop(self):
+        """Stop the background news worker"""
+        self.news_worker.stop()
+
+    @timed('sentiment.analyze_economic_calendar')
     def analyze_economic_calendar(self, symbol):
         """Analyze economic calendar impact"""
         try:
@@ -164,24 +165,20 @@ class SentimentAnalyzer:
             logging.error(f"Error analyzing economic calendar: {str(e)}")
             return 0.5
 
+    @timed('sentiment.analyze_technical_sentiment')
     def analyze_technical_sentiment(self, symbol):
         """Analyze technical indicators sentiment"""
         try:
-            # Get technical indicators from MT5
-            rates = pd.DataFrame(mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M5, 0, 100))
+            # Get technical indicators shared with the technical analyzer
+            values = self.indicator_engine.get_values(symbol)
             
-            if rates.empty:
+            if values is None:
                 return 0.5
 
-            # Calculate indicators
-            rates['rsi'] = ta.rsi(rates['close'])
-            rates['macd'] = ta.macd(rates['close'])['MACD_12_26_9']
-            rates['macd_signal'] = ta.macd(rates['close'])['MACDs_12_26_9']
-            
             # Get latest values
-            rsi = rates['rsi'].iloc[-1]
-            macd = rates['macd'].iloc[-1]
-            macd_signal = rates['macd_signal'].iloc[-1]
+            rsi = values['rsi']
+            macd = values['macd']
+            macd_signal = values['macd_signal']
 
             # Calculate sentiment score
             score = 0.5  # Start neutral
@@ -246,28 +243,16 @@ class SentimentAnalyzer:
     def log_sentiment_analysis(self, symbol, scores):
         """Log sentiment analysis details"""
         try:
-            analysis = f"""
-{'='*50}
-SENTIMENT ANALYSIS - {symbol}
-Time: {self.current_time} UTC
-Login: {self.login}
-{'='*50}
-
-COMPONENT SCORES:
-News Sentiment: {scores['news']:.2f}
-Economic Impact: {scores['economic']:.2f}
-Technical Sentiment: {scores['technical']:.2f}
-Social Sentiment: {scores['social']:.2f}
-
-OVERALL SENTIMENT: {scores['total']:.2f}
-(-1 = Very Bearish, 0 = Neutral, 1 = Very Bullish)
-
-ANALYSIS SUMMARY:
-{self.get_sentiment_description(scores['total'])}
-{'='*50}
-            """
-            
-            logging.info(analysis)
+            log_event(
+                'sentiment_analysis',
+                symbol=symbol,
+                news=scores['news'],
+                economic=scores['economic'],
+                technical=scores['technical'],
+                social=scores['social'],
+                total=scores['total'],
+                summary=lambda: self.get_sentiment_description(scores['total'])
+            )
 
         except Exception as e:
             logging.error(f"Error logging sentiment analysis: {str(e)}")
@@ -0,0 +1,136 @@
+import numpy as np
+from ..config.trading_config import TradingConfig
+
+# Minimum score for a TechnicalAnalyzer signal
+TECHNICAL_MIN_SCORE = 3
+
+
+def _add(score, condition, weight=1):
+    return score + np.asarray(condition, dtype=int) * weight
+
+
+def _only(condition, excluded):
+    """`condition and not excluded`, the vector form of an elif branch"""
+    return np.logical_and(condition, np.logical_not(excluded))
+
+
+def technical_scores(values, config=TradingConfig):
+    """Buy and sell scores of TechnicalAnalyzer.analyze_signals
+
+    `values` holds indicator values keyed like IndicatorState.values() plus
+    prev_macd and prev_macd_signal. They may be scalars for the live bar or
+    arrays covering a whole history; NaN never scores.
+    """
+    close = values['close']
+    buy_score = 0
+    sell_score = 0
+
+    # Trend Analysis
+    uptrend = np.logical_and(values['ema_fast'] > values['ema_slow'],
+                             values['ema_slow'] > values['ema_long'])
+    downtrend = np.logical_and(values['ema_fast'] < values['ema_slow'],
+                               values['ema_slow'] < values['ema_long'])
+    buy_score = _add(buy_score, uptrend, 2)
+    sell_score = _add(sell_score, _only(downtrend, uptrend), 2)
+
+    # RSI Analysis
+    oversold = values['rsi'] < config.RSI_OVERSOLD
+    overbought = values['rsi'] > config.RSI_OVERBOUGHT
+    buy_score = _add(buy_score, oversold)
+    sell_score = _add(sell_score, _only(overbought, oversold))
+
+    # MACD crossover
+    cross_up = np.logical_and(values['macd'] > values['macd_signal'],
+                              values['prev_macd'] <= values['prev_macd_signal'])
+    cross_down = np.logical_and(values['macd'] < values['macd_signal'],
+                                values['prev_macd'] >= values['prev_macd_signal'])
+    buy_score = _add(buy_score, cross_up)
+    sell_score = _add(sell_score, _only(cross_down, cross_up))
+
+    # Bollinger Bands Analysis
+    below = close < values['bb_lower']
+    above = close > values['bb_upper']
+    buy_score = _add(buy_score, below)
+    sell_score = _add(sell_score, _only(above, below))
+
+    return buy_score, sell_score
+
+
+def trend_score(close, ema_fast, ema_slow, ema_long):
+    """Higher timeframe trend score (0-5) used by the scalper"""
+    score = 0
+    score = _add(score, ema_fast > ema_slow)
+    score = _add(score, ema_slow > ema_long)
+    score = _add(score, close > ema_fast)
+    score = _add(score, close > ema_slow)
+    score = _add(score, close > ema_long)
+    return score
+
+
+def trend_direction(score):
+    """Map a trend score to 1 (UP), -1 (DOWN) or 0 (SIDEWAYS)"""
+    return np.where(score >= 3, 1, np.where(score <= 1, -1, 0))
+
+
+def scalp_scores(values, config):
+    """Buy and sell scores of the scalper's get_signal (out of 7)
+
+    Besides the indicator values this needs `prev_rsi`, `price_action` and
+    `higher_tf_trend` as 1/-1/0, and the pivot `support`/`resistance`.
+    """
+    close = values['close']
+    ema_fast = values['ema_fast']
+    ema_slow = values['ema_slow']
+    buy_score = 0
+    sell_score = 0
+
+    # 1. EMA alignment
+    aligned_up = np.logical_and(ema_fast > ema_slow, ema_slow > values['ema_long'])
+    aligned_down = np.logical_and(ema_fast < ema_slow, ema_slow < values['ema_long'])
+    buy_score = _add(buy_score, aligned_up)
+    sell_score = _add(sell_score, _only(aligned_down, aligned_up))
+
+    # 2. Price vs EMAs
+    above = np.logical_and(close > ema_fast, close > ema_slow)
+    below = np.logical_and(close < ema_fast, close < ema_slow)
+    buy_score = _add(buy_score, above)
+    sell_score = _add(sell_score, _only(below, above))
+
+    # 3. RSI inside its extreme band and turning
+    rsi = values['rsi']
+    prev_rsi = values['prev_rsi']
+    rsi_buy = np.logical_and.reduce([config.RSI_OVERSOLD_MIN <= rsi, rsi <= config.RSI_OVERSOLD_MAX,
+                                     prev_rsi < rsi])
+    rsi_sell = np.logical_and.reduce([config.RSI_OVERBOUGHT_MIN <= rsi, rsi <= config.RSI_OVERBOUGHT_MAX,
+                                      prev_rsi > rsi])
+    buy_score = _add(buy_score, rsi_buy)
+    sell_score = _add(sell_score, _only(rsi_sell, rsi_buy))
+
+    # 4. Bollinger Bands
+    under_band = close < values['bb_lower']
+    over_band = close > values['bb_upper']
+    buy_score = _add(buy_score, under_band)
+    sell_score = _add(sell_score, _only(over_band, under_band))
+
+    # 5. Price Action
+    buy_score = _add(buy_score, np.equal(values['price_action'], 1))
+    sell_score = _add(sell_score, np.equal(values['price_action'], -1))
+
+    # 6. Higher Timeframe Trend
+    buy_score = _add(buy_score, np.equal(values['higher_tf_trend'], 1))
+    sell_score = _add(sell_score, np.equal(values['higher_tf_trend'], -1))
+
+    # 7. Support/Resistance
+    under_support = close < values['support']
+    over_resistance = close > values['resistance']
+    buy_score = _add(buy_score, under_support)
+    sell_score = _add(sell_score, _only(over_resistance, under_support))
+
+    return buy_score, sell_score
+
+
+def signal_direction(buy_score, sell_score, min_score):
+    """1 for BUY, -1 for SELL, 0 for no signal"""
+    buy = np.logical_and(buy_score > sell_score, buy_score >= min_score)
+    sell = np.logical_and(sell_score > buy_score, sell_score >= min_score)
+    return np.where(buy, 1, np.where(sell, -1, 0))
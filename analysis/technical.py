@@ -4,37 +4,50 @@ import numpy as np
 import pandas_ta as ta
 import logging
 from datetime import datetime
-from ..config.trading_config import TradingConfig
+from ..core.bar_store import BarStore
+from .indicators import IndicatorEngine
+from .signals import technical_scores, signal_direction, TECHNICAL_MIN_SCORE
+from ..utils.instrumentation import timed
+from ..utils.logger import log_event
 
 class TechnicalAnalyzer:
-    def __init__(self):
+    def __init__(self, bar_store=None, indicator_engine=None):
+        self.bar_store = bar_store if bar_store is not None else BarStore.get_instance()
+        self.indicator_engine = (indicator_engine if indicator_engine is not None
+                                 else IndicatorEngine(self.bar_store))
+        # Per-symbol parameters, shared with the indicator engine
+        self.profiles = self.indicator_engine.profiles
         self.signal_cache = {}
         self.last_update = {}
         self.login = "zzzz14"  # Current user's login
         self.current_time = datetime.strptime("2025-03-12 00:02:13", "%Y-%m-%d %H:%M:%S")
 
-    def calculate_indicators(self, df):
+    def calculate_indicators(self, df, profile=None):
         """Calculate technical indicators"""
         try:
+            profile = profile if profile is not None else self.profiles.defaults
+            
             # EMA Calculations
-            df['ema_fast'] = ta.ema(df['close'], length=TradingConfig.EMA_FAST)
-            df['ema_slow'] = ta.ema(df['close'], length=TradingConfig.EMA_SLOW)
-            df['ema_long'] = ta.ema(df['close'], length=TradingConfig.EMA_LONG)
+            df['ema_fast'] = ta.ema(df['close'], length=profile.EMA_FAST)
+            df['ema_slow'] = ta.ema(df['close'], length=profile.EMA_SLOW)
+            df['ema_long'] = ta.ema(df['close'], length=profile.EMA_LONG)
             
             # RSI
-            df['rsi'] = ta.rsi(df['close'], length=TradingConfig.RSI_PERIOD)
+            df['rsi'] = ta.rsi(df['close'], length=profile.RSI_PERIOD)
             
             # Bollinger Bands
-            bbands = ta.bbands(df['close'], length=TradingConfig.BB_PERIOD, std=TradingConfig.BB_STD)
+            bbands = ta.bbands(df['close'], length=profile.BB_PERIOD, std=profile.BB_STD)
             df = pd.concat([df, bbands], axis=1)
             
             # ATR
-            df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=TradingConfig.ATR_PERIOD)
+            df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=profile.ATR_PERIOD)
             
             # Additional Indicators
-            df['macd'] = ta.macd(df['close'])['MACD_12_26_9']
-            df['macd_signal'] = ta.macd(df['close'])
-                        # Stochastic
+            macd = ta.macd(df['close'])
+            df['macd'] = macd['MACD_12_26_9']
+            df['macd_signal'] = macd['MACDs_12_26_9']
+            
+            # Stochastic
             stoch = ta.stoch(df['high'], df['low'], df['close'])
             df = pd.concat([df, stoch], axis=1)
             
@@ -44,28 +57,26 @@ class TechnicalAnalyzer:
             logging.error(f"Error calculating indicators: {str(e)}")
             return df
 
+    @timed('technical.get_signal')
     def get_signal(self, symbol):
         """Generate trading signal based on technical analysis"""
         try:
             # Get current timestamp
-            current_time = datetime.strptime("2025-03-12 00:03:12", "%Y-%m-%d %H:%M:%S")
+            current_time = datetime.now()
             
             # Check cache freshness (5 seconds)
             if (symbol in self.signal_cache and 
                 (current_time - self.last_update.get(symbol, datetime.min)).total_seconds() < 5):
                 return self.signal_cache[symbol]
 
-            # Get market data
-            rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M5, 0, 100)
-            if rates is None:
+            # Get latest indicator values (updated incrementally per closed bar)
+            values = self.indicator_engine.get_values(symbol)
+            if values is None:
                 logging.error(f"Failed to get rates for {symbol}")
                 return None, None, None
 
-            df = pd.DataFrame(rates)
-            df = self.calculate_indicators(df)
-
             # Generate signal
-            signal, sl_price, tp_price = self.analyze_signals(df, symbol)
+            signal, sl_price, tp_price = self.analyze_signals(values, symbol)
 
             # Cache results
             self.signal_cache[symbol] = (signal, sl_price, tp_price)
@@ -73,7 +84,7 @@ class TechnicalAnalyzer:
 
             # Log analysis if signal found
             if signal:
-                self.log_signal_analysis(symbol, df, signal, sl_price, tp_price)
+                self.log_signal_analysis(symbol, values, signal, sl_price, tp_price)
 
             return signal, sl_price, tp_price
 
@@ -81,63 +92,31 @@ class TechnicalAnalyzer:
             logging.error(f"Error generating signal: {str(e)}")
             return None, None, None
 
-    def analyze_signals(self, df, symbol):
+    def analyze_signals(self, values, symbol):
         """Analyze technical indicators for trading signals"""
         try:
             # Get latest values
-            current_price = df['close'].iloc[-1]
-            ema_fast = df['ema_fast'].iloc[-1]
-            ema_slow = df['ema_slow'].iloc[-1]
-            ema_long = df['ema_long'].iloc[-1]
-            rsi = df['rsi'].iloc[-1]
-            atr = df['atr'].iloc[-1]
-            
-            # Initialize signal scores
-            buy_score = 0
-            sell_score = 0
+            current_price = values['close']
+            atr = values['atr']
+            profile = self.profiles.get(symbol)
             
-            # Trend Analysis
-            if ema_fast > ema_slow > ema_long:
-                buy_score += 2
-            elif ema_fast < ema_slow < ema_long:
-                sell_score += 2
-                
-            # RSI Analysis
-            if rsi < TradingConfig.RSI_OVERSOLD:
-                buy_score += 1
-            elif rsi > TradingConfig.RSI_OVERBOUGHT:
-                sell_score += 1
-                
-            # MACD Analysis
-            if df['macd'].iloc[-1] > df['macd_signal'].iloc[-1] and \
-               df['macd'].iloc[-2] <= df['macd_signal'].iloc[-2]:
-                buy_score += 1
-            elif df['macd'].iloc[-1] < df['macd_signal'].iloc[-1] and \
-                 df['macd'].iloc[-2] >= df['macd_signal'].iloc[-2]:
-                sell_score += 1
-                
-            # Bollinger Bands Analysis
-            if current_price < df['BBL_20_2.0'].iloc[-1]:
-                buy_score += 1
-            elif current_price > df['BBU_20_2.0'].iloc[-1]:
-                sell_score += 1
+            # Score trend, RSI, MACD and Bollinger Bands (shared with the backtester)
+            buy_score, sell_score = technical_scores(values, profile)
+            direction = signal_direction(buy_score, sell_score, TECHNICAL_MIN_SCORE)
                 
             # Generate Signal
             signal = None
             sl_price = None
             tp_price = None
             
-            # Minimum score required for signal
-            min_score = 3
-            
-            if buy_score > sell_score and buy_score >= min_score:
+            if direction > 0:
                 signal = 'BUY'
-                sl_price = current_price - (atr * TradingConfig.SL_ATR_MULTIPLIER)
-                tp_price = current_price + (atr * TradingConfig.TP_ATR_MULTIPLIER)
-            elif sell_score > buy_score and sell_score >= min_score:
+                sl_price = current_price - (atr * profile.SL_ATR_MULTIPLIER)
+                tp_price = current_price + (atr * profile.TP_ATR_MULTIPLIER)
+            elif direction < 0:
                 signal = 'SELL'
-                sl_price = current_price + (atr * TradingConfig.SL_ATR_MULTIPLIER)
-                tp_price = current_price - (atr * TradingConfig.TP_ATR_MULTIPLIER)
+                sl_price = current_price + (atr * profile.SL_ATR_MULTIPLIER)
+                tp_price = current_price - (atr * profile.TP_ATR_MULTIPLIER)
                 
             return signal, sl_price, tp_price
             
@@ -145,57 +124,42 @@ class TechnicalAnalyzer:
             logging.error(f"Error analyzing signals: {str(e)}")
             return None, None, None
 
-    def log_signal_analysis(self, symbol, df, signal, sl_price, tp_price):
+    def log_signal_analysis(self, symbol, values, signal, sl_price, tp_price):
         """Log detailed analysis of the signal"""
         try:
-            current_time = datetime.strptime("2025-03-12 00:03:12", "%Y-%m-%d %H:%M:%S")
-            
-            analysis = f"""
-{'='*50}
-SIGNAL ANALYSIS - {symbol}
-Time: {current_time} UTC
-Login: {self.login}
-{'='*50}
-
-SIGNAL DETAILS:
-Direction: {signal}
-Entry Price: {df['close'].iloc[-1]:.5f}
-Stop Loss: {sl_price:.5f}
-Take Profit: {tp_price:.5f}
-
-TECHNICAL INDICATORS:
-EMA Fast: {df['ema_fast'].iloc[-1]:.5f}
-EMA Slow: {df['ema_slow'].iloc[-1]:.5f}
-EMA Long: {df['ema_long'].iloc[-1]:.5f}
-RSI: {df['rsi'].iloc[-1]:.2f}
-ATR: {df['atr'].iloc[-1]:.5f}
-MACD: {df['macd'].iloc[-1]:.5f}
-BB Upper: {df['BBU_20_2.0'].iloc[-1]:.5f}
-BB Lower: {df['BBL_20_2.0'].iloc[-1]:.5f}
-
-ANALYSIS SUMMARY:
-- Trend Direction: {self.get_trend_description(df)}
-- RSI Condition: {self.get_rsi_description(df)}
-- Volatility: {self.get_volatility_description(df)}
-- Support/Resistance: {self.get_sr_description(df)}
-
-RISK METRICS:
-- Risk/Reward Ratio: {abs(tp_price - df['close'].iloc[-1]) / abs(sl_price - df['close'].iloc[-1]):.2f}
-- ATR Ratio: {abs(sl_price - df['close'].iloc[-1]) / df['atr'].iloc[-1]:.2f}
-{'='*50}
-            """
-            
-            logging.info(analysis)
+            close = values['close']
+            log_event(
+                'signal_analysis',
+                symbol=symbol,
+                direction=signal,
+                entry=close,
+                sl=sl_price,
+                tp=tp_price,
+                ema_fast=values['ema_fast'],
+                ema_slow=values['ema_slow'],
+                ema_long=values['ema_long'],
+                rsi=values['rsi'],
+                atr=values['atr'],
+                macd=values['macd'],
+                bb_upper=values['bb_upper'],
+                bb_lower=values['bb_lower'],
+                trend=lambda: self.get_trend_description(values),
+                rsi_condition=lambda: self.get_rsi_description(values, self.profiles.get(symbol)),
+                volatility=lambda: self.get_volatility_description(values),
+                support_resistance=lambda: self.get_sr_description(values),
+                rr_ratio=lambda: abs(tp_price - close) / abs(sl_price - close),
+                atr_ratio=lambda: abs(sl_price - close) / values['atr']
+            )
             
         except Exception as e:
             logging.error(f"Error logging signal analysis: {str(e)}")
 
-    def get_trend_description(self, df):
+    def get_trend_description(self, values):
         """Get trend description"""
         try:
-            ema_fast = df['ema_fast'].iloc[-1]
-            ema_slow = df['ema_slow'].iloc[-1]
-            ema_long = df['ema_long'].iloc[-1]
+            ema_fast = values['ema_fast']
+            ema_slow = values['ema_slow']
+            ema_long = values['ema_long']
             
             if ema_fast > ema_slow > ema_long:
                 return "UPTREND (Strong)"
@@ -212,14 +176,15 @@ RISK METRICS:
             logging.error(f"Error getting trend description: {str(e)}")
             return "UNKNOWN"
 
-    def get_rsi_description(self, df):
+    def get_rsi_description(self, values, profile=None):
         """Get RSI condition description"""
         try:
-            rsi = df['rsi'].iloc[-1]
+            rsi = values['rsi']
+            profile = profile if profile is not None else self.profiles.defaults
             
-            if rsi > TradingConfig.RSI_OVERBOUGHT:
+            if rsi > profile.RSI_OVERBOUGHT:
                 return f"OVERBOUGHT ({rsi:.2f})"
-            elif rsi < TradingConfig.RSI_OVERSOLD:
+            elif rsi < profile.RSI_OVERSOLD:
                 return f"OVERSOLD ({rsi:.2f})"
             else:
                 return f"NEUTRAL ({rsi:.2f})"
@@ -228,11 +193,11 @@ RISK METRICS:
             logging.error(f"Error getting RSI description: {str(e)}")
             return "UNKNOWN"
 
-    def get_volatility_description(self, df):
+    def get_volatility_description(self, values):
         """Get volatility description"""
         try:
-            atr = df['atr'].iloc[-1]
-            atr_avg = df['atr'].mean()
+            atr = values['atr']
+            atr_avg = values['atr_avg']
             
             ratio = atr / atr_avg
             
@@ -247,12 +212,12 @@ RISK METRICS:
             logging.error(f"Error getting volatility description: {str(e)}")
             return "UNKNOWN"
 
-    def get_sr_description(self, df):
+    def get_sr_description(self, values):
         """Get support/resistance description"""
         try:
-            current_price = df['close'].iloc[-1]
-            bb_upper = df['BBU_20_2.0'].iloc[-1]
-            bb_lower = df['BBL_20_2.0'].iloc[-1]
+            current_price = values['close']
+            bb_upper = values['bb_upper']
+            bb_lower = values['bb_lower']
             
             if current_price > bb_upper:
                 return f"Above resistance ({bb_upper:.5f})"
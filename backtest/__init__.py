@@ -0,0 +1,5 @@
+"""
+Backtesting package for replaying historical data offline.
+"""
+
+# No imports to avoid circular imports
@@ -0,0 +1,186 @@
+import MetaTrader5 as mt5
+import os
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from ..core.bar_store import TIMEFRAME_SECONDS
+
+# Same layout as the arrays returned by mt5.copy_rates_*
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')
+])
+
+TIME_COLUMNS = ('time', 'datetime', 'date', 'timestamp')
+
+
+def dataframe_to_rates(df):
+    """Convert an OHLC DataFrame to an MT5 rates array sorted by time"""
+    df = df.rename(columns=lambda name: str(name).strip().lower())
+
+    time_column = next((name for name in TIME_COLUMNS if name in df.columns), None)
+    if time_column is None:
+        raise ValueError(f"History has no time column (expected one of {', '.join(TIME_COLUMNS)})")
+
+    times = df[time_column]
+    if pd.api.types.is_numeric_dtype(times):
+        # Epoch seconds, or milliseconds when the values are too large for seconds
+        times = times.astype('int64')
+        if len(times) and times.iloc[0] > 10 ** 11:
+            times = times // 1000
+    else:
+        times = (pd.to_datetime(times, utc=True) - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+
+    rates = np.zeros(len(df), dtype=RATES_DTYPE)
+    rates['time'] = times.to_numpy()
+    for name in ('open', 'high', 'low', 'close'):
+        rates[name] = df[name].to_numpy(dtype=float)
+    for name in ('tick_volume', 'spread', 'real_volume'):
+        if name in df.columns:
+            rates[name] = df[name].to_numpy()
+    if 'volume' in df.columns and 'tick_volume' not in df.columns:
+        rates['tick_volume'] = df['volume'].to_numpy()
+
+    # Sorted, one bar per open time
+    rates = rates[np.argsort(rates['time'], kind='stable')]
+    keep = np.r_[True, rates['time'][1:] != rates['time'][:-1]]
+    return rates[keep]
+
+
+def load_rates(path):
+    """Load OHLC history from a CSV or Parquet file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    return dataframe_to_rates(df)
+
+
+def load_history(directory, symbols=None):
+    """Load every SYMBOL.csv / SYMBOL.parquet in a directory, keyed by symbol"""
+    history = {}
+    for filename in sorted(os.listdir(directory)):
+        symbol, extension = os.path.splitext(filename)
+        if extension.lower() not in ('.csv', '.parquet', '.pq'):
+            continue
+        if symbols is not None and symbol not in symbols:
+            continue
+        try:
+            history[symbol] = load_rates(os.path.join(directory, filename))
+        except Exception as e:
+            logging.error(f"Error loading history for {symbol}: {str(e)}")
+    return history
+
+
+def resample_rates(rates, seconds):
+    """Aggregate rates into bars of `seconds` (e.g. M1 to M5)"""
+    if len(rates) == 0:
+        return rates.copy()
+
+    buckets = rates['time'] - rates['time'] % seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(rates)] - 1
+
+    resampled = np.zeros(len(starts), dtype=rates.dtype)
+    resampled['time'] = buckets[starts]
+    resampled['open'] = rates['open'][starts]
+    resampled['high'] = np.maximum.reduceat(rates['high'], starts)
+    resampled['low'] = np.minimum.reduceat(rates['low'], starts)
+    resampled['close'] = rates['close'][ends]
+    resampled['tick_volume'] = np.add.reduceat(rates['tick_volume'], starts)
+    resampled['spread'] = rates['spread'][ends]
+    resampled['real_volume'] = np.add.reduceat(rates['real_volume'], starts)
+    return resampled
+
+
+class HistoricalSource:
+    """MT5-compatible market data over loaded history, with a movable clock
+
+    Drop-in `source` for BarStore so the live analyzers can be driven from
+    history. Bars up to and including the one opened at the clock time are
+    visible; the last of them is what the live code treats as forming.
+    """
+
+    def __init__(self, history, timeframe=mt5.TIMEFRAME_M1, point=0.00001, contract_size=100000):
+        self.history = history
+        self.timeframe = timeframe
+        self.tf_seconds = TIMEFRAME_SECONDS.get(timeframe, 60)
+        self.point = point
+        self.contract_size = contract_size
+        self.resampled = {}
+        self.now = None
+
+    def set_time(self, timestamp):
+        """Move the clock to an epoch timestamp"""
+        self.now = int(timestamp)
+
+    def get_rates(self, symbol, timeframe):
+        """Full history of a symbol in the requested timeframe"""
+        rates = self.history.get(symbol)
+        if rates is None or timeframe == self.timeframe:
+            return rates
+
+        key = (symbol, timeframe)
+        if key not in self.resampled:
+            self.resampled[key] = resample_rates(rates, TIMEFRAME_SECONDS.get(timeframe, 60))
+        return self.resampled[key]
+
+    def visible(self, symbol, timeframe, until=None):
+        """Bars opened at or before the clock (and `until`, if given)"""
+        rates = self.get_rates(symbol, timeframe)
+        if rates is None:
+            return None
+        limit = self.now
+        if until is not None:
+            limit = until if limit is None else min(limit, until)
+        if limit is None:
+            return rates
+        return rates[:np.searchsorted(rates['time'], limit, side='right')]
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        rates = self.visible(symbol, timeframe)
+        if rates is None:
+            return None
+        end = len(rates) - start_pos
+        return rates[max(end - count, 0):max(end, 0)].copy()
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        if isinstance(date_from, datetime):
+            date_from = int(date_from.timestamp())
+        rates = self.visible(symbol, timeframe, until=int(date_from))
+        if rates is None:
+            return None
+        return rates[-count:].copy()
+
+    def symbol_info_tick(self, symbol):
+        rates = self.visible(symbol, self.timeframe)
+        if rates is None or len(rates) == 0:
+            return None
+        bar = rates[-1]
+        bid = float(bar['close'])
+        return SimpleNamespace(
+            time=int(bar['time']),
+            time_msc=int(bar['time']) * 1000,
+            bid=bid,
+            ask=bid + int(bar['spread']) * self.point,
+            last=bid
+        )
+
+    def symbol_info(self, symbol):
+        if symbol not in self.history:
+            return None
+        rates = self.visible(symbol, self.timeframe)
+        spread = int(rates[-1]['spread']) if rates is not None and len(rates) else 0
+        return SimpleNamespace(
+            name=symbol,
+            point=self.point,
+            digits=int(round(-np.log10(self.point))),
+            spread=spread,
+            trade_contract_size=self.contract_size,
+            volume_min=0.01,
+            volume_max=100.0,
+            volume_step=0.01
+        )
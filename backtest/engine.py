@@ -0,0 +1,301 @@
+import MetaTrader5 as mt5
+import logging
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+from ..config.trading_config import TradingConfig
+from ..config.profiles import ProfileStore
+from ..core.bar_store import BarStore, TIMEFRAME_SECONDS
+from ..core.position_manager import stop_candidates
+from ..analysis.indicators import IndicatorEngine
+from ..analysis.technical import TechnicalAnalyzer
+from ..analysis.patterns import detect_patterns, pattern_bias
+from ..analysis.signals import (technical_scores, scalp_scores, signal_direction, trend_score,
+                                trend_direction, TECHNICAL_MIN_SCORE)
+from ..utils.stats import TradingStats
+from .data import HistoricalSource, resample_rates
+
+# Closed trade, with the deal fields TradingStats.aggregate_stats reads
+Deal = namedtuple('Deal', ['symbol', 'type', 'volume', 'price', 'profit', 'time', 'magic',
+                           'entry_time', 'entry_price', 'exit_reason'])
+
+STRATEGIES = ('technical', 'scalp')
+
+
+class BacktestEngine:
+    """Replay historical bars through the live signal scoring and exit rules
+
+    Indicators are computed once per symbol over the whole history, signals
+    are scored for every bar in one vectorized pass, and each trade's exit is
+    resolved by scanning forward over arrays. Signals are taken on a bar's
+    close and filled at the next bar's open, one position per symbol.
+
+    strategy='technical' replays TechnicalAnalyzer with PositionManager's
+    stop rules. strategy='scalp' replays the scalper's get_signal scoring and
+    manage_open_positions rules and needs the scalper's TradingConfig.
+    """
+
+    def __init__(self, strategy='technical', config=None, timeframe=mt5.TIMEFRAME_M1,
+                 lot_size=0.1, point=0.00001, contract_size=100000, spread_points=None,
+                 slippage_points=0, trend_timeframe=mt5.TIMEFRAME_M5, max_hold_bars=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of {STRATEGIES}")
+        if strategy == 'scalp' and config is None:
+            raise ValueError("The scalp strategy needs the scalper's TradingConfig")
+
+        self.strategy = strategy
+        self.config = config if config is not None else TradingConfig
+        self.timeframe = timeframe
+        self.tf_seconds = TIMEFRAME_SECONDS.get(timeframe, 60)
+        self.trend_seconds = TIMEFRAME_SECONDS.get(trend_timeframe, 300)
+        self.lot_size = lot_size
+        self.point = point
+        self.contract_size = contract_size
+        self.spread_points = spread_points  # None uses each bar's recorded spread
+        self.slippage_points = slippage_points
+        self.max_hold_bars = max_hold_bars
+
+    def run(self, history):
+        """Backtest every symbol in `history` and aggregate TradingStats metrics"""
+        source = HistoricalSource(history, timeframe=self.timeframe, point=self.point,
+                                  contract_size=self.contract_size)
+        bar_store = BarStore(source=source)
+        # The engine's config for every symbol, no parameter file
+        self.profiles = ProfileStore(self.config, symbol_info=source.symbol_info)
+        self.technical_analyzer = TechnicalAnalyzer(bar_store=bar_store,
+                                                    indicator_engine=IndicatorEngine(bar_store, self.timeframe,
+                                                                                     profiles=self.profiles))
+
+        deals = []
+        per_symbol = {}
+        stats = TradingStats(persist=False)
+
+        for symbol, rates in history.items():
+            try:
+                symbol_deals = self.run_symbol(symbol, rates)
+                deals.extend(symbol_deals)
+                per_symbol[symbol] = stats.aggregate_stats(symbol_deals)
+            except Exception as e:
+                logging.error(f"Error backtesting {symbol}: {str(e)}")
+
+        # Portfolio metrics are computed in exit order
+        deals.sort(key=lambda deal: deal.time)
+        return {
+            'deals': deals,
+            'stats': stats.aggregate_stats(deals),
+            'symbols': per_symbol
+        }
+
+    def run_symbol(self, symbol, rates):
+        """Simulate all trades for one symbol"""
+        if len(rates) < 2:
+            return []
+
+        if self.strategy == 'technical':
+            direction, atr, sl, tp = self.technical_signals(rates, self.profiles.get(symbol))
+        else:
+            direction, atr, sl, tp = self.scalp_signals(rates)
+
+        return self.simulate(symbol, rates, direction, atr, sl, tp)
+
+    def simulate(self, symbol, rates, direction, atr, sl, tp):
+        """Trade the given per-bar signals (1 BUY, -1 SELL, 0 none), one position at a time"""
+        # A signal needs a stop and a following bar to fill on
+        direction = np.where(np.isnan(sl), 0, direction)
+        direction[-1] = 0
+        signals = np.flatnonzero(direction)
+
+        spread = (np.full(len(rates), float(self.spread_points)) if self.spread_points is not None
+                  else rates['spread'].astype(float)) * self.point
+        slippage = self.slippage_points * self.point
+
+        deals = []
+        position = 0
+        while position < len(signals):
+            i = signals[position]
+            entry_bar = i + 1
+            side = int(direction[i])
+
+            # Buys fill at the ask, sells at the bid, both slipped against us
+            entry = rates['open'][entry_bar] + (spread[entry_bar] if side > 0 else 0.0) + side * slippage
+            stop = sl[i]
+            target = tp[i]
+            if self.strategy == 'scalp':
+                # The scalper derives TP from the distance between fill and stop
+                target = entry + side * abs(entry - stop) * self.config.TP_ATR_MULTIPLIER / self.config.SL_ATR_MULTIPLIER
+
+            exit_bar, exit_price, reason = self.resolve_exit(rates, spread, atr, entry_bar, side,
+                                                             entry, stop, target)
+            deals.append(Deal(
+                symbol=symbol,
+                type='BUY' if side > 0 else 'SELL',
+                volume=self.lot_size,
+                price=exit_price,
+                profit=side * (exit_price - entry) * self.lot_size * self.contract_size,
+                time=int(rates['time'][exit_bar]),
+                magic=123456,
+                entry_time=int(rates['time'][entry_bar]),
+                entry_price=entry,
+                exit_reason=reason
+            ))
+
+            # Next trade can start from a signal on the exit bar's close
+            position = np.searchsorted(signals, exit_bar, side='left')
+
+        return deals
+
+    def exit_rules(self):
+        """Trailing and breakeven parameters matching the live position management"""
+        config = self.config
+        if self.strategy == 'technical':
+            # PositionManager trails by TRAILING_STOP_ACTIVATION ATRs from the start
+            trail_distance = config.TRAILING_STOP_ACTIVATION if config.TRAILING_STOP else None
+            return trail_distance, None, config.BREAKEVEN_ACTIVATION
+        # The scalper trails by SL_ATR_MULTIPLIER ATRs once TRAILING_STOP_ACTIVATION ATRs in profit
+        return config.SL_ATR_MULTIPLIER, config.TRAILING_STOP_ACTIVATION, config.BREAKEVEN_ACTIVATION
+
+    def resolve_exit(self, rates, spread, atr, start, side, entry, stop, target):
+        """Find the bar and price at which a trade exits
+
+        The stop in force during a bar is the initial stop tightened by the
+        trailing/breakeven candidates of all earlier bar closes (a running
+        maximum in signed prices). Windows grow geometrically so long trades
+        stay cheap. A bar touching both stop and target counts as a stop.
+        """
+        trail_distance, trail_activation, breakeven_activation = self.exit_rules()
+        count = len(rates)
+        last = count - 1 if self.max_hold_bars is None else min(count - 1, start + self.max_hold_bars)
+
+        running = side * stop
+        signed_target = side * target
+        window = 256
+        begin = start
+
+        while begin <= last:
+            end = min(last + 1, begin + window)
+            bar_spread = spread[begin:end]
+
+            # Buys exit on the bid, sells on the ask, all in signed prices
+            if side > 0:
+                adverse = rates['low'][begin:end]
+                favourable = rates['high'][begin:end]
+                opening = rates['open'][begin:end]
+                closing = rates['close'][begin:end]
+            else:
+                adverse = -(rates['high'][begin:end] + bar_spread)
+                favourable = -(rates['low'][begin:end] + bar_spread)
+                opening = -(rates['open'][begin:end] + bar_spread)
+                closing = -(rates['close'][begin:end] + bar_spread)
+
+            candidates = stop_candidates(side, entry, side * closing, atr[begin:end],
+                                         trail_distance, breakeven_activation, trail_activation)
+            candidates = np.nan_to_num(candidates, nan=-np.inf)
+            in_force = np.maximum.accumulate(np.r_[running, candidates[:-1]])
+
+            stop_hit = adverse <= in_force
+            target_hit = favourable >= signed_target
+            hits = np.flatnonzero(stop_hit | target_hit)
+            if len(hits):
+                j = hits[0]
+                if stop_hit[j]:
+                    # Gaps through the stop fill at the open
+                    price, reason = min(opening[j], in_force[j]), 'sl'
+                else:
+                    price, reason = max(opening[j], signed_target), 'tp'
+                return begin + j, side * price, reason
+
+            running = max(in_force[-1], candidates[-1])
+            begin = end
+            window *= 2
+
+        # Still open when history ends or the holding limit is reached
+        closing = rates['close'][last] + (spread[last] if side < 0 else 0.0)
+        return last, closing, 'end'
+
+    def technical_signals(self, rates, profile=None):
+        """Vectorized TechnicalAnalyzer signals with SL/TP levels for every bar"""
+        profile = profile if profile is not None else self.technical_analyzer.profiles.defaults
+        df = self.technical_analyzer.calculate_indicators(pd.DataFrame(rates), profile)
+
+        values = {
+            'close': df['close'].to_numpy(),
+            'ema_fast': df['ema_fast'].to_numpy(),
+            'ema_slow': df['ema_slow'].to_numpy(),
+            'ema_long': df['ema_long'].to_numpy(),
+            'rsi': df['rsi'].to_numpy(),
+            'macd': df['macd'].to_numpy(),
+            'macd_signal': df['macd_signal'].to_numpy(),
+            'bb_lower': df[profile.BB_LOWER_COLUMN].to_numpy(),
+            'bb_upper': df[profile.BB_UPPER_COLUMN].to_numpy(),
+        }
+        values['prev_macd'] = np.r_[np.nan, values['macd'][:-1]]
+        values['prev_macd_signal'] = np.r_[np.nan, values['macd_signal'][:-1]]
+
+        buy_score, sell_score = technical_scores(values, profile)
+        direction = signal_direction(buy_score, sell_score, TECHNICAL_MIN_SCORE)
+
+        atr = df['atr'].to_numpy()
+        close = values['close']
+        sl = close - direction * atr * profile.SL_ATR_MULTIPLIER
+        tp = close + direction * atr * profile.TP_ATR_MULTIPLIER
+        return direction, atr, sl, tp
+
+    def scalp_signals(self, rates):
+        """Vectorized scalper signals with SL levels for every bar"""
+        config = self.config
+        df = pd.DataFrame(rates)
+        close = df['close']
+
+        bbands = ta.bbands(close, length=config.BB_LENGTH, std=config.BB_STD)
+        rsi = ta.rsi(close, length=config.RSI_PERIOD).to_numpy()
+        atr = ta.atr(df['high'], df['low'], close, length=config.ATR_PERIOD).to_numpy()
+
+        # Price action over the same 100-bar window the scalper fetches
+        body = (df['close'] - df['open']).abs().rolling(100, min_periods=1).mean().to_numpy()
+        patterns = detect_patterns(rates['open'], rates['high'], rates['low'], rates['close'],
+                                   avg_body=body)
+
+        # Pivot support/resistance of the bar itself
+        pivot = (rates['high'] + rates['low'] + rates['close']) / 3
+
+        values = {
+            'close': rates['close'],
+            'ema_fast': close.ewm(span=config.EMA_FAST, adjust=False).mean().to_numpy(),
+            'ema_slow': close.ewm(span=config.EMA_SLOW, adjust=False).mean().to_numpy(),
+            'ema_long': close.ewm(span=config.EMA_LONG, adjust=False).mean().to_numpy(),
+            'rsi': rsi,
+            'prev_rsi': np.r_[np.nan, rsi[:-1]],
+            'bb_lower': bbands[f'BBL_{config.BB_LENGTH}_{config.BB_STD}'].to_numpy(),
+            'bb_upper': bbands[f'BBU_{config.BB_LENGTH}_{config.BB_STD}'].to_numpy(),
+            'price_action': pattern_bias(patterns),
+            'higher_tf_trend': self.higher_tf_trend(rates),
+            'support': 2 * pivot - rates['high'],
+            'resistance': 2 * pivot - rates['low'],
+        }
+
+        # At least 50% of the 7 conditions, as in get_signal
+        buy_score, sell_score = scalp_scores(values, config)
+        direction = signal_direction(buy_score, sell_score, 7 * 0.5)
+
+        sl = rates['close'] - direction * atr * config.SL_ATR_MULTIPLIER
+        return direction, atr, sl, np.full(len(rates), np.nan)
+
+    def higher_tf_trend(self, rates):
+        """Trend direction of the last higher-timeframe bar closed by each bar's close"""
+        config = self.config
+        trend_rates = resample_rates(rates, self.trend_seconds)
+        close = pd.Series(trend_rates['close'])
+
+        score = trend_score(
+            trend_rates['close'],
+            close.ewm(span=config.EMA_FAST, adjust=False).mean().to_numpy(),
+            close.ewm(span=config.EMA_SLOW, adjust=False).mean().to_numpy(),
+            close.ewm(span=config.EMA_LONG, adjust=False).mean().to_numpy()
+        )
+        trend = trend_direction(score)
+
+        # Bars only see a higher-timeframe bar once it has closed
+        closes_at = trend_rates['time'] + self.trend_seconds
+        index = np.searchsorted(closes_at, rates['time'] + self.tf_seconds, side='right') - 1
+        return np.where(index >= 0, trend[np.maximum(index, 0)], 0)
@@ -0,0 +1,406 @@
+"""
+Walk-forward parameter search over the vectorized technical backtest.
+
+Every parameter combination is simulated once per symbol over the whole
+history; its trades are then summed per fold. Walk-forward selection only
+works on those sums: for each fold the combination that scored best on
+the preceding `train_folds` folds is taken, and its result on the fold
+itself is the out-of-sample estimate. The parameters written per symbol
+are the best ones over the most recent `train_folds` folds.
+
+    python -m tb.backtest.walk_forward data/ --timeframe M5 --output models/parameters.json
+"""
+
+import MetaTrader5 as mt5
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+from ..config.trading_config import TradingConfig
+from ..analysis.signals import technical_scores, signal_direction, TECHNICAL_MIN_SCORE
+from .data import load_history, HistoricalSource
+from .engine import BacktestEngine
+
+# Values searched per TradingConfig attribute
+PARAMETER_GRID = {
+    'EMA_FAST': [5, 8, 12],
+    'EMA_SLOW': [14, 21, 26],
+    'EMA_LONG': [100, 200],
+    'RSI_PERIOD': [7, 14, 21],
+    'BB_PERIOD': [14, 20, 26],
+    'BB_STD': [1.5, 2.0, 2.5],
+    'SL_ATR_MULTIPLIER': [1.0, 1.5, 2.0],
+    'TP_ATR_MULTIPLIER': [1.5, 2.0, 3.0],
+}
+
+# Per fold trade totals kept for every combination
+COUNT, TOTAL, TOTAL_SQ, GAINS, LOSSES = range(5)
+
+TIMEFRAMES = {'M1': mt5.TIMEFRAME_M1, 'M5': mt5.TIMEFRAME_M5, 'M15': mt5.TIMEFRAME_M15,
+              'M30': mt5.TIMEFRAME_M30, 'H1': mt5.TIMEFRAME_H1}
+
+
+def parameter_combinations(grid=None, samples=None, seed=0):
+    """Every combination of the grid, or `samples` of them drawn at random"""
+    grid = grid if grid is not None else PARAMETER_GRID
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    combos = [combo for combo in combos
+              if combo.get('EMA_FAST', 0) < combo.get('EMA_SLOW', float('inf'))]
+    if samples is not None and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return combos
+
+
+def objective_score(totals, objective='sharpe', min_trades=10):
+    """Score of summed fold totals (last axis), -inf below `min_trades`"""
+    count = totals[..., COUNT]
+    total = totals[..., TOTAL]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if objective == 'profit':
+            score = total
+        elif objective == 'profit_factor':
+            score = np.where(totals[..., LOSSES] > 0, totals[..., GAINS] / totals[..., LOSSES], np.inf)
+        elif objective == 'sharpe':
+            # Per-trade mean over standard deviation, scaled by the number of trades
+            mean = total / count
+            std = np.sqrt(np.maximum(totals[..., TOTAL_SQ] / count - mean * mean, 0.0))
+            score = np.where(std > 0, mean / std * np.sqrt(count), 0.0)
+        else:
+            raise ValueError(f"Unknown objective: {objective}")
+    return np.where(count >= max(min_trades, 1), score, -np.inf)
+
+
+def summarize_totals(totals):
+    """Readable metrics of summed trade totals"""
+    count = int(totals[COUNT])
+    return {
+        'trades': count,
+        'pnl': round(float(totals[TOTAL]), 2),
+        'average_trade': round(float(totals[TOTAL] / count), 4) if count else 0.0,
+        'profit_factor': (round(float(totals[GAINS] / totals[LOSSES]), 3) if totals[LOSSES] > 0
+                          else None),
+        'sharpe': round(float(objective_score(totals, 'sharpe', 1)), 3) if count else 0.0
+    }
+
+
+class SymbolEvaluator:
+    """Backtests parameter sets on one symbol's history
+
+    Indicators are computed once per distinct parameter value (an EMA per
+    length, bands per length and width...) and reused by every combination
+    that shares it, so a combination only costs its scoring and trades.
+    """
+
+    def __init__(self, symbol, rates, boundaries, config=TradingConfig, point=0.00001,
+                 contract_size=100000, spread_points=None):
+        self.symbol = symbol
+        self.rates = rates
+        self.config = config
+        self.boundaries = np.asarray(boundaries)
+        self.engine = BacktestEngine(strategy='technical', config=config, point=point,
+                                     contract_size=contract_size, spread_points=spread_points)
+
+        df = pd.DataFrame(rates)
+        self.close_series = df['close']
+        self.close = df['close'].to_numpy()
+        self.atr = ta.atr(df['high'], df['low'], df['close'], length=config.ATR_PERIOD).to_numpy()
+        macd = ta.macd(df['close'])
+        self.macd = macd['MACD_12_26_9'].to_numpy()
+        self.macd_signal = macd['MACDs_12_26_9'].to_numpy()
+        self.prev_macd = np.r_[np.nan, self.macd[:-1]]
+        self.prev_macd_signal = np.r_[np.nan, self.macd_signal[:-1]]
+        self.cache = {}
+
+        # No trades before the first fold, indicators are still warming up
+        self.first_bar = int(np.searchsorted(rates['time'], self.boundaries[0]))
+
+    def indicator(self, key, compute):
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+
+    def ema(self, length):
+        return self.indicator(('ema', length), lambda: ta.ema(self.close_series, length=length).to_numpy())
+
+    def rsi(self, length):
+        return self.indicator(('rsi', length), lambda: ta.rsi(self.close_series, length=length).to_numpy())
+
+    def bands(self, length, std):
+        def compute():
+            bbands = ta.bbands(self.close_series, length=length, std=std)
+            return (bbands[f'BBL_{length}_{std}'].to_numpy(), bbands[f'BBU_{length}_{std}'].to_numpy())
+        return self.indicator(('bbands', length, std), compute)
+
+    def signals(self, params):
+        """Direction, SL and TP for every bar under one parameter set"""
+        bb_lower, bb_upper = self.bands(params['BB_PERIOD'], params['BB_STD'])
+        values = {
+            'close': self.close,
+            'ema_fast': self.ema(params['EMA_FAST']),
+            'ema_slow': self.ema(params['EMA_SLOW']),
+            'ema_long': self.ema(params['EMA_LONG']),
+            'rsi': self.rsi(params['RSI_PERIOD']),
+            'macd': self.macd,
+            'macd_signal': self.macd_signal,
+            'prev_macd': self.prev_macd,
+            'prev_macd_signal': self.prev_macd_signal,
+            'bb_lower': bb_lower,
+            'bb_upper': bb_upper,
+        }
+        buy_score, sell_score = technical_scores(values, self.config)
+        direction = signal_direction(buy_score, sell_score, TECHNICAL_MIN_SCORE)
+        direction[:self.first_bar] = 0
+
+        sl = self.close - direction * self.atr * params['SL_ATR_MULTIPLIER']
+        tp = self.close + direction * self.atr * params['TP_ATR_MULTIPLIER']
+        return direction, sl, tp
+
+    def evaluate(self, params):
+        """Trade totals per fold (folds x 5) for one parameter set"""
+        direction, sl, tp = self.signals(params)
+        deals = self.engine.simulate(self.symbol, self.rates, direction, self.atr, sl, tp)
+
+        totals = np.zeros((len(self.boundaries), 5))
+        if not deals:
+            return totals
+        profit = np.array([deal.profit for deal in deals])
+        fold = np.searchsorted(self.boundaries, [deal.entry_time for deal in deals], side='right') - 1
+        keep = fold >= 0
+        profit, fold = profit[keep], fold[keep]
+
+        np.add.at(totals[:, COUNT], fold, 1)
+        np.add.at(totals[:, TOTAL], fold, profit)
+        np.add.at(totals[:, TOTAL_SQ], fold, profit * profit)
+        np.add.at(totals[:, GAINS], fold, np.maximum(profit, 0))
+        np.add.at(totals[:, LOSSES], fold, np.maximum(-profit, 0))
+        return totals
+
+
+# Worker process state: history and evaluators, set up once per process
+_worker = {}
+
+
+def _init_worker(history, boundaries, options):
+    _worker.clear()
+    _worker.update(history=history, boundaries=boundaries, options=options, evaluators={})
+
+
+def _evaluate_chunk(symbol, combos):
+    evaluators = _worker['evaluators']
+    if symbol not in evaluators:
+        options = dict(_worker['options'])
+        point = options.pop('points', {}).get(symbol, 0.00001)
+        evaluators[symbol] = SymbolEvaluator(symbol, _worker['history'][symbol],
+                                             _worker['boundaries'][symbol], point=point, **options)
+    evaluator = evaluators[symbol]
+    return np.stack([evaluator.evaluate(params) for params in combos])
+
+
+class WalkForwardOptimizer:
+    """Walk-forward search of TradingConfig parameters per symbol"""
+
+    def __init__(self, grid=None, samples=None, folds=6, train_folds=3, objective='sharpe',
+                 min_trades=10, warmup_bars=250, n_jobs=None, chunk_size=64, points=None,
+                 contract_size=100000, spread_points=None, seed=0):
+        if train_folds >= folds:
+            raise ValueError("train_folds must leave at least one fold to test on")
+        self.combos = parameter_combinations(grid, samples, seed)
+        self.folds = folds
+        self.train_folds = train_folds
+        self.objective = objective
+        self.min_trades = min_trades
+        self.warmup_bars = warmup_bars
+        self.n_jobs = n_jobs if n_jobs is not None else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.options = {
+            'points': dict(points or {}),
+            'contract_size': contract_size,
+            'spread_points': spread_points
+        }
+        self.executor = None  # process pool of a search in progress
+        self.stopped = False
+
+    def stop(self):
+        """Stop a search in progress; chunks not started yet are cancelled"""
+        self.stopped = True
+        executor = self.executor
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def fold_boundaries(self, rates):
+        """Start times of `folds` equal bar windows after the warm-up"""
+        if len(rates) < self.warmup_bars + self.folds * 2:
+            return None
+        starts = np.linspace(self.warmup_bars, len(rates), self.folds + 1).astype(int)[:-1]
+        return rates['time'][starts]
+
+    def evaluate(self, history):
+        """Per-symbol arrays of trade totals (combos x folds x 5)"""
+        boundaries = {}
+        for symbol, rates in history.items():
+            bounds = self.fold_boundaries(rates)
+            if bounds is None:
+                logging.warning(f"Not enough history to optimize {symbol}")
+                continue
+            boundaries[symbol] = bounds
+        history = {symbol: history[symbol] for symbol in boundaries}
+
+        chunks = [(symbol, start) for symbol in history
+                  for start in range(0, len(self.combos), self.chunk_size)]
+        results = {symbol: [None] * len(range(0, len(self.combos), self.chunk_size)) for symbol in history}
+
+        if self.n_jobs == 1:
+            _init_worker(history, boundaries, self.options)
+            for symbol, start in chunks:
+                if self.stopped:
+                    raise CancelledError("Parameter search stopped")
+                results[symbol][start // self.chunk_size] = _evaluate_chunk(
+                    symbol, self.combos[start:start + self.chunk_size])
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                     initargs=(history, boundaries, self.options)) as executor:
+                self.executor = executor
+                try:
+                    futures = {}
+                    for symbol, start in chunks:
+                        if self.stopped:
+                            raise CancelledError("Parameter search stopped")
+                        futures[(symbol, start)] = executor.submit(_evaluate_chunk, symbol,
+                                                                   self.combos[start:start + self.chunk_size])
+                    # A stop cancels the queued chunks, their result() raises CancelledError
+                    for (symbol, start), future in futures.items():
+                        results[symbol][start // self.chunk_size] = future.result()
+                except RuntimeError:
+                    # submit() after stop() shut the pool down
+                    if self.stopped:
+                        raise CancelledError("Parameter search stopped")
+                    raise
+                finally:
+                    self.executor = None
+                    if self.stopped:
+                        # Also covers a stop() that came before the pool was registered
+                        executor.shutdown(wait=False, cancel_futures=True)
+
+        return {symbol: np.concatenate(parts) for symbol, parts in results.items()}
+
+    def select(self, totals):
+        """Walk-forward selection over one symbol's totals"""
+        folds = []
+        out_of_sample = np.zeros(5)
+        for fold in range(self.train_folds, self.folds):
+            in_sample = totals[:, fold - self.train_folds:fold].sum(axis=1)
+            scores = objective_score(in_sample, self.objective, self.min_trades)
+            best = int(np.argmax(scores))
+            if not np.isfinite(scores[best]):
+                continue
+            out_of_sample += totals[best, fold]
+            folds.append({'fold': fold, 'parameters': self.combos[best],
+                          'in_sample': summarize_totals(in_sample[best]),
+                          'out_of_sample': summarize_totals(totals[best, fold])})
+
+        # Final choice on the most recent folds
+        recent = totals[:, -self.train_folds:].sum(axis=1)
+        scores = objective_score(recent, self.objective, self.min_trades)
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            return None
+
+        return {
+            'parameters': self.combos[best],
+            'in_sample': summarize_totals(recent[best]),
+            'out_of_sample': summarize_totals(out_of_sample),
+            'folds': folds
+        }
+
+    def run(self, history):
+        """Winning parameters and walk-forward results per symbol"""
+        results = {}
+        for symbol, totals in self.evaluate(history).items():
+            try:
+                selected = self.select(totals)
+                if selected is None:
+                    logging.warning(f"No parameter set reached {self.min_trades} trades on {symbol}")
+                    continue
+                results[symbol] = selected
+            except Exception as e:
+                logging.error(f"Error selecting parameters for {symbol}: {str(e)}")
+        return results
+
+    def report(self, results):
+        return {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'objective': self.objective,
+            'combinations': len(self.combos),
+            'folds': self.folds,
+            'train_folds': self.train_folds,
+            'symbols': results
+        }
+
+
+def write_parameters(path, report, merge=True):
+    """Write the report through a temporary file so readers never see half of it
+
+    With `merge`, winners of symbols missing from the report are kept from
+    the existing file, so a search over some symbols doesn't reset the
+    others to defaults. A report without symbols is not written at all.
+    Returns True if the file was written.
+    """
+    if not report.get('symbols'):
+        logging.warning(f"Parameter search found no winners, keeping {path}")
+        return False
+
+    if merge and os.path.exists(path):
+        try:
+            with open(path) as file:
+                existing = json.load(file)
+            symbols = dict(existing.get('symbols') or {})
+            symbols.update(report['symbols'])
+            report = dict(report, symbols=symbols)
+        except Exception as e:
+            logging.warning(f"Replacing unreadable parameter file {path}: {str(e)}")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'w') as file:
+        json.dump(report, file, indent=2)
+    os.replace(path + '.tmp', path)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward parameter search on historical bars")
+    parser.add_argument('history', help="Directory of SYMBOL.csv / SYMBOL.parquet files")
+    parser.add_argument('--symbols', nargs='+')
+    parser.add_argument('--timeframe', choices=sorted(TIMEFRAMES), default='M5',
+                        help="Timeframe to resample the history to")
+    parser.add_argument('--samples', type=int, help="Random combinations to try instead of the full grid")
+    parser.add_argument('--folds', type=int, default=6)
+    parser.add_argument('--train-folds', type=int, default=3)
+    parser.add_argument('--objective', choices=['sharpe', 'profit', 'profit_factor'], default='sharpe')
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--jobs', type=int)
+    parser.add_argument('--output', default=TradingConfig.PARAMETER_FILE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    source = HistoricalSource(load_history(args.history, args.symbols))
+    history = {symbol: source.get_rates(symbol, TIMEFRAMES[args.timeframe]) for symbol in source.history}
+
+    optimizer = WalkForwardOptimizer(samples=args.samples, folds=args.folds, train_folds=args.train_folds,
+                                     objective=args.objective, min_trades=args.min_trades, n_jobs=args.jobs)
+    report = optimizer.report(optimizer.run(history))
+    if write_parameters(args.output, report):
+        logging.info(f"Parameters for {len(report['symbols'])} symbols written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
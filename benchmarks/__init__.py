@@ -0,0 +1,5 @@
+"""
+Benchmarks for the trading hot path, run against the fake MT5 terminal.
+"""
+
+# No imports to avoid circular imports
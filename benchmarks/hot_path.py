@@ -0,0 +1,314 @@
+"""
+Per-symbol and per-cycle latency of the trading hot path.
+
+Every benchmark runs against a FakeTerminal with synthetic bars, sweeping
+the number of symbols and open positions, and the results are written as
+JSON so runs can be compared across commits:
+
+    python -m tb.benchmarks.hot_path --symbols 5 50 200 --positions 0 25 --output bench.json
+
+The clock advances one M1 bar per cycle so indicator updates, stop checks
+and signal scoring do their normal incremental work. Sentiment is pinned to
+a fixed score and Telegram is disabled, nothing leaves the machine.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+from ..utils import fake_mt5
+
+# Must run before any bot module imports MetaTrader5
+fake_mt5.install()
+
+CURRENCIES = ['USD', 'EUR', 'JPY', 'GBP', 'CHF', 'AUD', 'CAD', 'NZD', 'SEK', 'NOK',
+              'DKK', 'SGD', 'HKD', 'MXN', 'ZAR', 'PLN', 'TRY']
+
+TRADER_MAGIC = 123456
+SCALP_MAGIC = 12345
+
+
+def make_symbols(count):
+    """Distinct currency pairs, majors first"""
+    pairs = (base + quote for base, quote in itertools.permutations(CURRENCIES, 2))
+    symbols = list(itertools.islice(pairs, count))
+    if len(symbols) < count:
+        raise ValueError(f"At most {len(symbols)} symbols are available")
+    return symbols
+
+
+def summarize(samples):
+    """Latency summary in milliseconds"""
+    if not samples:
+        return None
+    values = np.asarray(samples) * 1000
+    return {
+        'count': int(len(values)),
+        'mean_ms': round(float(values.mean()), 4),
+        'p50_ms': round(float(np.percentile(values, 50)), 4),
+        'p95_ms': round(float(np.percentile(values, 95)), 4),
+        'max_ms': round(float(values.max()), 4)
+    }
+
+
+class Scenario:
+    """A fake terminal with `symbol_count` symbols and `position_count` open positions"""
+
+    def __init__(self, symbol_count, position_count, cycles, magic, latency=0.0, seed=0):
+        self.symbols = make_symbols(symbol_count)
+        future_bars = cycles + 10
+        self.terminal = fake_mt5.FakeTerminal(
+            symbols=self.symbols, history_bars=600, future_bars=future_bars, seed=seed,
+            end_time=int(time.time()) + future_bars * 60
+        )
+        self.terminal.initialize()
+
+        # Closed trades today, so stats have a history to aggregate
+        for i in range(position_count):
+            ticket, _ = self.terminal.open(self.order(self.symbols[i % symbol_count], i, magic))
+            self.terminal.close(ticket)
+
+        for i in range(position_count):
+            symbol = self.symbols[i % symbol_count]
+            bid, _ = self.terminal.prices(symbol)
+            request = self.order(symbol, i, magic)
+            sign = 1 if request['type'] == fake_mt5.ORDER_TYPE_BUY else -1
+            request['sl'] = bid * (1 - sign * 0.01)
+            request['tp'] = bid * (1 + sign * 0.01)
+            self.terminal.open(request)
+
+        # Latency only applies to the measured calls
+        self.terminal.latency = latency
+        fake_mt5.use(self.terminal)
+
+    def order(self, symbol, index, magic):
+        return {
+            'action': fake_mt5.TRADE_ACTION_DEAL,
+            'symbol': symbol,
+            'volume': 0.01,
+            'type': fake_mt5.ORDER_TYPE_BUY if index % 2 == 0 else fake_mt5.ORDER_TYPE_SELL,
+            'magic': magic
+        }
+
+    def next_bar(self):
+        self.terminal.advance(60)
+
+
+class FixedSentiment:
+    """Stands in for SentimentAnalyzer so no news or calendar requests are made"""
+
+    def __init__(self, score=1.0):
+        self.score = score
+
+    def get_market_sentiment(self, symbol):
+        return self.score
+
+
+def build_trader(scenario):
+    """MT5Trader connected to the scenario's terminal"""
+    from ..config.mt5_config import MT5Config
+    from ..core.trader import MT5Trader
+
+    MT5Config.SYMBOLS = list(scenario.symbols)
+    trader = MT5Trader()
+    trader.sentiment_analyzer = FixedSentiment()
+    if not trader.connect():
+        raise RuntimeError("MT5Trader could not connect to the fake terminal")
+    return trader
+
+
+def time_cycles(scenario, cycles, warmup, before_cycle, per_symbol=None, per_cycle=None):
+    """Run cycles, timing `per_symbol(symbol)` for each symbol or `per_cycle()` once"""
+    cycle_times = []
+    symbol_times = []
+    calls = 0
+
+    for i in range(warmup + cycles):
+        scenario.next_bar()
+        before_cycle()
+        calls_before = sum(scenario.terminal.calls.values())
+
+        start = time.perf_counter()
+        if per_symbol is not None:
+            for symbol in scenario.symbols:
+                symbol_start = time.perf_counter()
+                per_symbol(symbol)
+                if i >= warmup:
+                    symbol_times.append(time.perf_counter() - symbol_start)
+        else:
+            per_cycle()
+        elapsed = time.perf_counter() - start
+
+        if i >= warmup:
+            cycle_times.append(elapsed)
+            calls += sum(scenario.terminal.calls.values()) - calls_before
+
+    return {
+        'cycle': summarize(cycle_times),
+        'per_symbol': summarize(symbol_times),
+        'mt5_calls_per_cycle': round(calls / cycles, 1) if cycles else 0
+    }
+
+
+def bench_process_symbol(scenario, cycles, warmup):
+    trader = build_trader(scenario)
+
+    def before_cycle():
+        trader.begin_cycle()
+        trader.technical_analyzer.signal_cache.clear()
+
+    return time_cycles(scenario, cycles, warmup, before_cycle, per_symbol=trader.process_symbol)
+
+
+def bench_get_signal(scenario, cycles, warmup):
+    trader = build_trader(scenario)
+
+    def before_cycle():
+        # The 5 second signal cache would otherwise serve every cycle
+        trader.begin_cycle()
+        trader.technical_analyzer.signal_cache.clear()
+
+    return time_cycles(scenario, cycles, warmup, before_cycle,
+                       per_symbol=trader.technical_analyzer.get_signal)
+
+
+def bench_check_correlation_risk(scenario, cycles, warmup):
+    trader = build_trader(scenario)
+    analyzer = trader.correlation_analyzer
+    return time_cycles(scenario, cycles, warmup, trader.begin_cycle,
+                       per_symbol=lambda symbol: analyzer.check_correlation_risk(symbol, 'BUY'))
+
+
+def bench_correlation_matrix(scenario, cycles, warmup):
+    trader = build_trader(scenario)
+    analyzer = trader.correlation_analyzer
+
+    def before_cycle():
+        trader.begin_cycle()
+        analyzer.last_refresh = 0.0
+
+    return time_cycles(scenario, cycles, warmup, before_cycle, per_cycle=analyzer.update_correlation_matrix)
+
+
+def bench_manage_positions(scenario, cycles, warmup):
+    trader = build_trader(scenario)
+    return time_cycles(scenario, cycles, warmup, trader.begin_cycle,
+                       per_cycle=trader.position_manager.manage_positions)
+
+
+def bench_calculate_daily_stats(scenario, cycles, warmup):
+    trader = build_trader(scenario)
+    return time_cycles(scenario, cycles, warmup, trader.begin_cycle,
+                       per_cycle=trader.stats.calculate_daily_stats)
+
+
+def bench_scalp_cycle(scenario, cycles, warmup):
+    from .. import scalp
+
+    scalp.MT5Config.SYMBOLS = list(scenario.symbols)
+    scalp.TradingConfig.ENABLE_TELEGRAM_NOTIFICATIONS = False
+    trader = scalp.MT5Trader()
+    if not trader.connect():
+        raise RuntimeError("scalp MT5Trader could not connect to the fake terminal")
+    trader.last_signals.clear()
+
+    return time_cycles(scenario, cycles, warmup, lambda: None, per_cycle=trader.run_trading_cycle)
+
+
+BENCHMARKS = {
+    'process_symbol': (bench_process_symbol, TRADER_MAGIC),
+    'get_signal': (bench_get_signal, TRADER_MAGIC),
+    'check_correlation_risk': (bench_check_correlation_risk, TRADER_MAGIC),
+    'correlation_matrix': (bench_correlation_matrix, TRADER_MAGIC),
+    'manage_positions': (bench_manage_positions, TRADER_MAGIC),
+    'calculate_daily_stats': (bench_calculate_daily_stats, TRADER_MAGIC),
+    'scalp_run_trading_cycle': (bench_scalp_cycle, SCALP_MAGIC),
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(benchmarks, symbol_counts, position_counts, cycles=20, warmup=1, latency=0.0):
+    """Run every benchmark over the symbol/position sweep and return the report"""
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cycles': cycles,
+            'warmup': warmup,
+            'latency_ms': latency * 1000
+        },
+        'results': []
+    }
+
+    for name in benchmarks:
+        bench, magic = BENCHMARKS[name]
+        for symbol_count, position_count in itertools.product(symbol_counts, position_counts):
+            result = {'benchmark': name, 'symbols': symbol_count, 'positions': position_count}
+            try:
+                scenario = Scenario(symbol_count, position_count, cycles + warmup, magic, latency)
+                result.update(bench(scenario, cycles, warmup))
+            except Exception as e:
+                logging.error(f"Benchmark {name} ({symbol_count} symbols) failed: {str(e)}")
+                result['error'] = f"{type(e).__name__}: {e}"
+            report['results'].append(result)
+
+            cycle = result.get('cycle')
+            if cycle:
+                print(f"{name:<26} symbols={symbol_count:<4} positions={position_count:<4} "
+                      f"cycle p50={cycle['p50_ms']:.2f}ms p95={cycle['p95_ms']:.2f}ms", file=sys.stderr)
+
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the trading hot path on a fake MT5 terminal")
+    parser.add_argument('--benchmarks', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--symbols', nargs='+', type=int, default=[5, 50, 200])
+    parser.add_argument('--positions', nargs='+', type=int, default=[0, 25])
+    parser.add_argument('--cycles', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0, help="Per MT5 call latency in milliseconds")
+    parser.add_argument('--output', help="JSON file to write (stdout if omitted)")
+    parser.add_argument('--log-level', default='CRITICAL')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper()))
+    output = os.path.abspath(args.output) if args.output else None
+
+    # Stats and scalp.py write their files to the working directory
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix='tb-bench-'))
+    try:
+        report = run(args.benchmarks, args.symbols, args.positions, args.cycles, args.warmup,
+                     args.latency / 1000)
+    finally:
+        os.chdir(cwd)
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
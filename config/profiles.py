@@ -0,0 +1,179 @@
+import MetaTrader5 as mt5
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from .trading_config import TradingConfig
+
+# Parameters a profile can set per symbol, named as on TradingConfig
+PARAMETERS = (
+    'EMA_FAST', 'EMA_SLOW', 'EMA_LONG',
+    'RSI_PERIOD', 'RSI_OVERBOUGHT', 'RSI_OVERSOLD',
+    'RSI_OVERBOUGHT_MIN', 'RSI_OVERBOUGHT_MAX', 'RSI_OVERSOLD_MIN', 'RSI_OVERSOLD_MAX',
+    'ATR_PERIOD', 'BB_PERIOD', 'BB_STD',
+    'SL_ATR_MULTIPLIER', 'TP_ATR_MULTIPLIER',
+    'TRAILING_STOP', 'TRAILING_STOP_ACTIVATION', 'BREAKEVEN_ACTIVATION'
+)
+
+# Values derived once from the parameters and the symbol
+DERIVED = ('BB_LOWER_COLUMN', 'BB_MIDDLE_COLUMN', 'BB_UPPER_COLUMN', 'TP_SL_RATIO', 'POINT', 'DIGITS', 'PIP_SIZE')
+
+INTEGERS = ('EMA_FAST', 'EMA_SLOW', 'EMA_LONG', 'RSI_PERIOD', 'ATR_PERIOD', 'BB_PERIOD')
+
+# Field names match TradingConfig so a profile can stand in for it
+ParameterProfile = namedtuple('ParameterProfile', ('SYMBOL',) + PARAMETERS + DERIVED)
+
+
+def make_profile(symbol, base=TradingConfig, overrides=None, point=None, digits=None):
+    """Immutable profile of `base` with per-symbol overrides applied"""
+    values = {name: getattr(base, name, None) for name in PARAMETERS}
+    if values['BB_PERIOD'] is None:
+        # The scalper names the Bollinger length BB_LENGTH
+        values['BB_PERIOD'] = getattr(base, 'BB_LENGTH', None)
+
+    for name, value in (overrides or {}).items():
+        name = 'BB_PERIOD' if name == 'BB_LENGTH' else name
+        if name not in values:
+            logging.warning(f"Ignoring unknown parameter {name} for {symbol}")
+            continue
+        values[name] = value
+
+    for name in INTEGERS:
+        if values[name] is not None:
+            values[name] = int(values[name])
+    if values['BB_STD'] is not None:
+        # pandas_ta names band columns with the float width, BBL_20_2.0
+        values['BB_STD'] = float(values['BB_STD'])
+
+    suffix = f"{values['BB_PERIOD']}_{values['BB_STD']}"
+    values['BB_LOWER_COLUMN'] = f"BBL_{suffix}"
+    values['BB_MIDDLE_COLUMN'] = f"BBM_{suffix}"
+    values['BB_UPPER_COLUMN'] = f"BBU_{suffix}"
+    values['TP_SL_RATIO'] = (values['TP_ATR_MULTIPLIER'] / values['SL_ATR_MULTIPLIER']
+                             if values['TP_ATR_MULTIPLIER'] and values['SL_ATR_MULTIPLIER'] else None)
+
+    values['POINT'] = point
+    values['DIGITS'] = digits
+    # Fractional pricing (5 or 3 digits) quotes a pip as ten points
+    values['PIP_SIZE'] = None if point is None else (point * 10 if digits in (3, 5) else point)
+
+    return ParameterProfile(SYMBOL=symbol, **values)
+
+
+def read_overrides(path):
+    """Per-symbol parameters from a JSON file
+
+    Accepts the walk-forward report ({"symbols": {"EURUSD": {"parameters":
+    {...}}}}) as well as a plain {"EURUSD": {"EMA_FAST": 5, ...}} mapping.
+    """
+    with open(path) as file:
+        data = json.load(file)
+    symbols = data.get('symbols', data)
+    return {symbol: entry.get('parameters', entry) for symbol, entry in symbols.items()
+            if isinstance(entry, dict)}
+
+
+class ProfileStore:
+    """Per-symbol parameter profiles, reloaded when the parameter file changes
+
+    Profiles are built once per symbol and handed out as the same immutable
+    object until a reload changes their values, so callers can keep derived
+    state per profile and rebuild it only when `profile is not previous`.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, base=TradingConfig, path=None, reload_interval=5.0, symbol_info=None):
+        self.base = base
+        self.path = path
+        self.reload_interval = reload_interval
+        self.symbol_info = symbol_info if symbol_info is not None else mt5.symbol_info
+
+        self.overrides = {}
+        self.profiles = {}
+        self.points = {}  # symbol -> (point, digits)
+        self.info_checked = {}  # symbol -> time symbol info was last unavailable
+        self.defaults = make_profile(None, base)
+        self.mtime = None
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+        self.reload()
+
+    @classmethod
+    def get_instance(cls):
+        """Get process-wide store over TradingConfig and its parameter file"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(TradingConfig, TradingConfig.PARAMETER_FILE)
+            return cls._instance
+
+    def get(self, symbol):
+        """Profile of a symbol"""
+        profile = self.profiles.get(symbol)
+        if profile is None or (profile.POINT is None and
+                               time.time() - self.info_checked.get(symbol, 0.0) >= self.reload_interval):
+            with self.lock:
+                profile = self.build(symbol)
+        return profile
+
+    def build(self, symbol):
+        point, digits = self.points.get(symbol, (None, None))
+        if point is None:
+            try:
+                symbol_info = self.symbol_info(symbol)
+            except Exception as e:
+                logging.error(f"Error getting symbol info for {symbol}: {str(e)}")
+                symbol_info = None
+            if symbol_info is not None:
+                point, digits = symbol_info.point, symbol_info.digits
+                self.points[symbol] = (point, digits)
+            else:
+                self.info_checked[symbol] = time.time()
+
+        profile = make_profile(symbol, self.base, self.overrides.get(symbol), point, digits)
+        previous = self.profiles.get(symbol)
+        if previous == profile:
+            # Unchanged values keep their identity
+            return previous
+
+        # Without symbol info the profile is cached anyway and replaced once the
+        # point size arrives, retried at most every reload_interval
+        self.profiles[symbol] = profile
+        return profile
+
+    def maybe_reload(self):
+        """Reload if the file changed, checking at most every reload_interval seconds"""
+        now = time.time()
+        if now - self.last_check < self.reload_interval:
+            return False
+        self.last_check = now
+        return self.reload()
+
+    def reload(self):
+        """Re-read the parameter file if it changed; True if profiles were rebuilt"""
+        if not self.path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+            if mtime == self.mtime:
+                return False
+            # A broken file is reported once, not on every check
+            self.mtime = mtime
+            overrides = read_overrides(self.path) if mtime is not None else {}
+
+            with self.lock:
+                self.overrides = overrides
+                symbols = set(self.profiles) | set(overrides)
+                for symbol in symbols:
+                    self.build(symbol)
+
+            logging.info(f"Loaded parameter profiles for {len(overrides)} symbols from {self.path}")
+            return True
+
+        except Exception as e:
+            # Keep the current profiles until the file is readable again
+            logging.error(f"Error loading parameter profiles: {str(e)}")
+            return False
@@ -4,6 +4,8 @@ class TradingConfig:
     MAX_DAILY_LOSS_PERCENT = 5.0
     MAX_TOTAL_TRADES = 5
     MAX_TRADES_PER_SYMBOL = 2
+    MAX_CORRELATED_EXPOSURE = 2.0   # lots of correlation-weighted exposure in a new trade's direction
+    MAX_CLUSTER_EXPOSURE = 3.0      # net lots per correlation cluster in a new trade's direction
     
     # Technical Indicators
     EMA_FAST = 8
@@ -27,10 +29,26 @@ class TradingConfig:
     MAX_SPREAD_MULTIPLIER = 1.5
     MIN_VOLATILITY = 0.2
     MAX_VOLATILITY = 3.0
+    SENTIMENT_THRESHOLD = 0.1       # Minimum absolute sentiment score
+    NEWS_REFRESH_INTERVAL = 1800    # seconds between news fetches per currency
+    NEWS_ARTICLE_CACHE_SIZE = 5000  # scored articles remembered
+    CORRELATION_REFRESH_INTERVAL = 10  # seconds between checks for newly closed bars
+    CORRELATION_HALFLIFE = None        # bars; set to weight recent returns exponentially
+    CORRELATION_CLUSTER_METHOD = 'components'  # 'components' or 'hierarchical'
     
     # ML Parameters
     OPTIMIZATION_INTERVAL = 3600  # 1 hour
     TRAINING_HISTORY_DAYS = 30
+    ML_N_JOBS = -1  # cores used by the forest in the training process
+    ML_HISTORY_BARS = 5000
+    ML_FEATURE_CACHE_DIR = 'models/features'
+    ML_COMPILED_INFERENCE = True  # predict with the flattened forest instead of sklearn
+    ML_SIGNAL_FILTER = False      # require model agreement before taking a signal
+    ML_MIN_PROBABILITY = 0.55     # probability of the signal's direction needed to pass
+    PARAMETER_FILE = 'models/parameters.json'  # walk-forward winners per symbol
+    WALK_FORWARD_INTERVAL = 24 * 60 * 60       # seconds between parameter searches
+    WALK_FORWARD_SAMPLES = None                # random combinations per search, None for the full grid
+    WALK_FORWARD_JOBS = None                   # search processes, None for all cores
     
     # Market Sessions (UTC)
     MARKET_SESSIONS = {
@@ -43,8 +61,32 @@ class TradingConfig:
     RECONNECT_ATTEMPTS = 3
     RECONNECT_WAIT_TIME = 10
     CLOSE_POSITIONS_ON_STOP = False
+    CLOSE_OLD_POSITIONS = False
+    MAX_POSITION_AGE = 24 * 60 * 60  # seconds
     SIMULATE_ONLY = False
     
+    # Symbol Processing
+    CONCURRENCY_MODE = 'thread'     # 'thread' or 'sequential'
+    MAX_WORKERS = 8
+    SYMBOL_TIMEOUT = 5.0            # seconds of analysis per symbol before it is skipped
+    
+    # Event Scheduling
+    TICK_POLL_INTERVAL = 0.25       # seconds between tick checks
+    SIGNAL_MOVE_THRESHOLD = 0.0005  # relative price move that triggers re-evaluation
+    SIGNAL_MAX_IDLE = 60            # seconds before a quiet symbol is re-evaluated anyway
+    POSITION_CHECK_INTERVAL = 1.0   # seconds between position management passes
+    HOUSEKEEPING_INTERVAL = 10      # seconds between statistics/optimization passes
+    DEAL_HISTORY_DAYS = 32          # days of deals kept in memory, enough for a full month
+    DEAL_STORE_DIR = 'stats/deals'  # day partitions of the local deal history
+    
+    # Instrumentation
+    INSTRUMENTATION_ENABLED = False
+    INSTRUMENTATION_WINDOW = 1000           # samples kept per stage for percentiles
+    INSTRUMENTATION_SUMMARY_INTERVAL = 60   # seconds between timing summary lines
+    
+    # Logging
+    LOG_FORMAT = 'kv'               # structured records as 'kv' (key=value) or 'json'
+    
     # Notifications
     ENABLE_TELEGRAM = False
     TELEGRAM_BOT_TOKEN = ""
@@ -0,0 +1,194 @@
+import MetaTrader5 as mt5
+import threading
+import logging
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import numpy as np
+
+# Bar duration for each MT5 timeframe, used to size incremental fetches
+TIMEFRAME_SECONDS = {
+    mt5.TIMEFRAME_M1: 60,
+    mt5.TIMEFRAME_M5: 5 * 60,
+    mt5.TIMEFRAME_M15: 15 * 60,
+    mt5.TIMEFRAME_M30: 30 * 60,
+    mt5.TIMEFRAME_H1: 60 * 60,
+    mt5.TIMEFRAME_H4: 4 * 60 * 60,
+    mt5.TIMEFRAME_D1: 24 * 60 * 60,
+}
+
+DEFAULT_CAPACITY = 500
+DEFAULT_REFRESH_INTERVAL = 1.0  # seconds
+
+
+class BarSeries:
+    """Ring buffer holding the most recent bars of one symbol/timeframe"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buffer = None  # allocated on first fill with the terminal's dtype
+        self.writes = 0
+        self.last_sync = 0.0
+        self.cycle = -1
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.writes, self.capacity)
+
+    def last_time(self):
+        """Open time of the newest stored bar"""
+        if self.writes == 0:
+            return None
+        return int(self.buffer[(self.writes - 1) % self.capacity]['time'])
+
+    def reset(self, rates):
+        """Replace buffer contents with a fresh fetch"""
+        rates = rates[-self.capacity:]
+        self.buffer = np.zeros(2 * self.capacity, dtype=rates.dtype)
+        self.buffer[:len(rates)] = rates
+        self.buffer[self.capacity:self.capacity + len(rates)] = rates
+        self.writes = len(rates)
+
+    def extend(self, rates):
+        """Append bars newer than the last stored bar, replacing the forming bar"""
+        last_time = self.last_time()
+        for bar in rates[-self.capacity:]:
+            if last_time is not None and bar['time'] < last_time:
+                continue
+            if last_time is not None and bar['time'] == last_time:
+                # Same open time: the previously stored bar was still forming
+                slot = (self.writes - 1) % self.capacity
+            else:
+                slot = self.writes % self.capacity
+                self.writes += 1
+            # Every bar is written twice so the latest window is always contiguous
+            self.buffer[slot] = bar
+            self.buffer[slot + self.capacity] = bar
+            last_time = int(bar['time'])
+
+    def tail(self, count):
+        """Return a copy of the latest `count` bars in chronological order"""
+        count = min(count, len(self))
+        end = (self.writes - 1) % self.capacity + self.capacity + 1
+        return self.buffer[end - count:end].copy()
+
+
+class BarStore:
+    """Shared incremental cache of MT5 rates keyed by (symbol, timeframe)"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, source=None, capacity=DEFAULT_CAPACITY, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.source = source if source is not None else mt5
+        self.capacity = capacity
+        self.refresh_interval = refresh_interval
+        self.series = {}
+        self.cycle = 0
+        self.cycles = False  # set once a caller drives the store with begin_cycle
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Get process-wide default store"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def begin_cycle(self):
+        """Mark all series stale so each is synced at most once in the new cycle"""
+        self.cycle += 1
+        self.cycles = True
+
+    def invalidate(self, symbol=None):
+        """Drop cached bars for a symbol, or for all symbols"""
+        with self.lock:
+            if symbol is None:
+                self.series.clear()
+            else:
+                for key in [key for key in self.series if key[0] == symbol]:
+                    del self.series[key]
+
+    def get_rates(self, symbol, timeframe, count):
+        """Get the latest `count` bars as an MT5 rates array"""
+        try:
+            series = self.get_series(symbol, timeframe, count)
+            with series.lock:
+                if self.is_stale(series):
+                    self.sync(symbol, timeframe, series)
+                if len(series) == 0:
+                    return None
+                return series.tail(count)
+
+        except Exception as e:
+            logging.error(f"Error getting rates for {symbol}: {str(e)}")
+            return None
+
+    def get_dataframe(self, symbol, timeframe, count):
+        """Get the latest `count` bars as a DataFrame"""
+        rates = self.get_rates(symbol, timeframe, count)
+        if rates is None:
+            return None
+        return pd.DataFrame(rates)
+
+    def get_series(self, symbol, timeframe, count):
+        """Get or create the series for a symbol/timeframe"""
+        key = (symbol, timeframe)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None or series.capacity < count:
+                # Larger window requested than held: start a bigger buffer
+                series = BarSeries(max(self.capacity, count))
+                self.series[key] = series
+            return series
+
+    def is_stale(self, series):
+        """Check whether a series needs to be synced with the terminal
+
+        Within a cycle a series is synced once. Callers that never start a
+        cycle get bars refreshed every refresh_interval instead.
+        """
+        if series.cycle != self.cycle:
+            return True
+        if self.cycles:
+            return False
+        return time.time() - series.last_sync >= self.refresh_interval
+
+    def sync(self, symbol, timeframe, series):
+        """Fetch only bars newer than the last stored bar"""
+        now = time.time()
+
+        if len(series) == 0:
+            rates = self.source.copy_rates_from_pos(symbol, timeframe, 0, series.capacity)
+            if rates is None or len(rates) == 0:
+                return
+            series.reset(rates)
+        else:
+            # Bars elapsed since last sync, plus the forming bar and one of overlap
+            tf_seconds = TIMEFRAME_SECONDS.get(timeframe, 60)
+            missing = int((now - series.last_sync) // tf_seconds) + 2
+
+            if missing >= series.capacity:
+                rates = self.source.copy_rates_from_pos(symbol, timeframe, 0, series.capacity)
+                if rates is None or len(rates) == 0:
+                    return
+                series.reset(rates)
+            else:
+                # Date in the future so the newest bars are returned regardless of server time offset
+                date_from = datetime.now() + timedelta(days=1)
+                rates = self.source.copy_rates_from(symbol, timeframe, date_from, missing)
+                if rates is None or len(rates) == 0:
+                    return
+
+                if rates[0]['time'] > series.last_time():
+                    # No overlap with stored bars, history has a gap
+                    rates = self.source.copy_rates_from_pos(symbol, timeframe, 0, series.capacity)
+                    if rates is None or len(rates) == 0:
+                        return
+                    series.reset(rates)
+                else:
+                    series.extend(rates)
+
+        series.last_sync = now
+        series.cycle = self.cycle
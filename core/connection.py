@@ -0,0 +1,156 @@
+import MetaTrader5 as mt5
+import logging
+import threading
+import time
+
+
+class MT5Connection:
+    """Single MT5 terminal link shared by every component
+
+    The MetaTrader5 module holds one process-wide connection, so components
+    must never initialize or shut it down themselves. They ask this object
+    for a healthy link instead and it reconnects with backoff when needed.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, login=None, password=None, server=None, source=None,
+                 max_attempts=3, retry_delay=10, max_delay=120, health_interval=1.0):
+        self.source = source if source is not None else mt5
+        self.login = login
+        self.password = password
+        self.server = server
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.health_interval = health_interval  # seconds a health check stays valid
+
+        self.connected = False
+        self.opened = False  # whether this object initialized the terminal link
+        self.failures = 0
+        self.last_health_check = 0
+        self.listeners = []
+        self.lock = threading.RLock()
+
+    @classmethod
+    def get_instance(cls):
+        """Get process-wide default connection"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def register(self):
+        """Make this the connection returned by get_instance"""
+        with MT5Connection._instance_lock:
+            MT5Connection._instance = self
+        return self
+
+    def connect(self):
+        """Initialize the terminal and log in"""
+        with self.lock:
+            try:
+                if self.connected and self.is_healthy(force=True):
+                    return True
+
+                # Drop a half-open link we opened before starting again, never someone else's
+                existing = self.source.terminal_info() is not None
+                if existing and self.opened:
+                    self.source.shutdown()
+                    self.opened = existing = False
+
+                if not self.source.initialize():
+                    logging.error(f"Failed to initialize MT5: {self.source.last_error()}")
+                    return False
+                self.opened = not existing
+
+                if self.login and not self.source.login(self.login, self.password, self.server):
+                    logging.error(f"Failed to login: {self.source.last_error()}")
+                    if self.opened:
+                        self.source.shutdown()
+                        self.opened = False
+                    return False
+
+                self.connected = True
+                self.failures = 0
+                self.last_health_check = time.time()
+                return True
+
+            except Exception as e:
+                logging.error(f"Connection error: {str(e)}")
+                self.connected = False
+                return False
+
+    def is_healthy(self, force=False):
+        """Check the terminal link, at most once per health_interval"""
+        if not self.connected:
+            return False
+
+        now = time.time()
+        if not force and now - self.last_health_check < self.health_interval:
+            return True
+
+        try:
+            terminal = self.source.terminal_info()
+            healthy = terminal is not None and getattr(terminal, 'connected', True)
+        except Exception as e:
+            logging.error(f"Error checking MT5 connection: {str(e)}")
+            healthy = False
+
+        self.last_health_check = now
+        if not healthy:
+            self.connected = False
+        return healthy
+
+    def ensure_connected(self):
+        """Return True when the link is usable, reconnecting if it dropped"""
+        if self.is_healthy():
+            return True
+        return self.reconnect()
+
+    def reconnect(self):
+        """Reconnect with exponential backoff and notify listeners"""
+        with self.lock:
+            # Another thread may have reconnected while we waited for the lock
+            if self.is_healthy(force=True):
+                return True
+
+            logging.warning("Connection lost, attempting to reconnect...")
+            for attempt in range(self.max_attempts):
+                if attempt:
+                    delay = min(self.retry_delay * 2 ** (attempt - 1), self.max_delay)
+                    time.sleep(delay)
+
+                if self.connect():
+                    logging.info(f"Reconnected to MT5 after {attempt + 1} attempt(s)")
+                    self.notify_reconnect()
+                    return True
+
+                self.failures += 1
+
+            logging.error("Failed to reconnect after maximum attempts")
+            return False
+
+    def add_reconnect_listener(self, callback):
+        """Register a callback run after every successful reconnect"""
+        self.listeners.append(callback)
+
+    def notify_reconnect(self):
+        for callback in self.listeners:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Error in reconnect listener: {str(e)}")
+
+    def shutdown(self):
+        """Close the terminal link"""
+        with self.lock:
+            try:
+                if self.opened:
+                    self.source.shutdown()
+            except Exception as e:
+                logging.error(f"Error shutting down MT5: {str(e)}")
+            finally:
+                self.connected = False
+                self.opened = False
@@ -0,0 +1,193 @@
+import MetaTrader5 as mt5
+import threading
+import logging
+import os
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from ..config.trading_config import TradingConfig
+from .deals import DealIngester
+
+DAY_SECONDS = 24 * 60 * 60
+
+# Columns kept for every deal, named as on the MT5 TradeDeal tuple
+DEAL_DTYPE = np.dtype([
+    ('ticket', 'i8'), ('order', 'i8'), ('time', 'i8'), ('time_msc', 'i8'),
+    ('type', 'i4'), ('entry', 'i4'), ('magic', 'i8'), ('position_id', 'i8'),
+    ('volume', 'f8'), ('price', 'f8'), ('commission', 'f8'), ('swap', 'f8'),
+    ('profit', 'f8'), ('symbol', 'U16')
+])
+
+
+def deals_to_array(deals):
+    """Structured array with one row per MT5 deal"""
+    array = np.zeros(len(deals), dtype=DEAL_DTYPE)
+    for name in DEAL_DTYPE.names:
+        default = '' if name == 'symbol' else 0
+        array[name] = [getattr(deal, name, default) for deal in deals]
+    return array
+
+
+class DealStore:
+    """Local columnar history of deals, partitioned by day
+
+    Deals arrive from the DealIngester and are kept as one time-sorted
+    structured array per (server time) day, saved as `<day>.npy` and
+    loaded lazily. Range queries bisect the time column of the partitions
+    they cover and filter symbol and magic with vectorized comparisons,
+    so stats, optimization and reports read history without going back to
+    the terminal or building objects per deal.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, directory=None, deals=None, persist=True):
+        self.directory = directory if directory is not None else TradingConfig.DEAL_STORE_DIR
+        self.deals = deals if deals is not None else DealIngester.get_instance()
+        self.persist = persist
+        self.cursor = 0
+        self.partitions = {}  # day number -> time-sorted array, None until loaded
+        self.lock = threading.Lock()
+        if self.persist:
+            self.discover()
+
+    @classmethod
+    def get_instance(cls):
+        """Get process-wide store fed by the shared ingester"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def discover(self):
+        """Register the partitions saved on disk without loading them"""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npy'):
+                continue
+            try:
+                day = datetime.strptime(name[:-4], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+                self.partitions.setdefault(int(day.timestamp()) // DAY_SECONDS, None)
+            except ValueError:
+                continue
+
+    def path(self, day):
+        name = datetime.fromtimestamp(day * DAY_SECONDS, timezone.utc).strftime('%Y-%m-%d')
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def partition(self, day):
+        """Deals of one day, loading the partition from disk on first use"""
+        rows = self.partitions.get(day)
+        if rows is None:
+            rows = np.zeros(0, dtype=DEAL_DTYPE)
+            if self.persist and os.path.exists(self.path(day)):
+                try:
+                    rows = np.load(self.path(day))
+                except Exception as e:
+                    logging.error(f"Error loading deal partition {self.path(day)}: {str(e)}")
+            self.partitions[day] = rows
+        return rows
+
+    def sync(self, poll=True):
+        """Append deals ingested since the last sync; returns how many arrived"""
+        try:
+            if poll:
+                self.deals.poll()
+            new, self.cursor = self.deals.read(self.cursor)
+            if new:
+                self.append(new)
+            return len(new)
+
+        except Exception as e:
+            logging.error(f"Error syncing deal store: {str(e)}")
+            return 0
+
+    def append(self, deals):
+        """Add deals to their day partitions, skipping tickets already stored"""
+        rows = deals_to_array(deals)
+        days = rows['time'] // DAY_SECONDS
+        with self.lock:
+            for day in np.unique(days).tolist():
+                current = self.partition(day)
+                added = rows[days == day]
+                added = added[~np.isin(added['ticket'], current['ticket'])]
+                if len(added) == 0:
+                    continue
+                merged = np.concatenate([current, added])
+                self.partitions[day] = merged[np.argsort(merged['time'], kind='stable')]
+                self.save(day)
+
+    def save(self, day):
+        if not self.persist:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(day)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as file:
+                np.save(file, self.partitions[day])
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.error(f"Error saving deal partition for day {day}: {str(e)}")
+
+    def query(self, start=None, end=None, symbol=None, magic=None):
+        """Deals with start <= time < end (epoch seconds), oldest first"""
+        with self.lock:
+            days = sorted(self.partitions)
+            if start is not None:
+                days = [day for day in days if day >= start // DAY_SECONDS]
+            if end is not None:
+                days = [day for day in days if day <= end // DAY_SECONDS]
+
+            parts = []
+            for day in days:
+                rows = self.partition(day)
+                times = rows['time']
+                low = np.searchsorted(times, start, side='left') if start is not None else 0
+                high = np.searchsorted(times, end, side='left') if end is not None else len(rows)
+                rows = rows[low:high]
+                if symbol is not None:
+                    rows = rows[rows['symbol'] == symbol]
+                if magic is not None:
+                    rows = rows[rows['magic'] == magic]
+                if len(rows):
+                    parts.append(rows)
+
+        if not parts:
+            return np.zeros(0, dtype=DEAL_DTYPE)
+        return np.concatenate(parts)
+
+    def dataframe(self, **filters):
+        """Query result as a DataFrame"""
+        return pd.DataFrame(self.query(**filters))
+
+    def group_by(self, column, value='profit', **filters):
+        """Deal count and sum of `value` for each distinct value of `column`"""
+        rows = self.query(**filters)
+        keys, inverse = np.unique(rows[column], return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(keys))
+        sums = np.bincount(inverse, weights=rows[value], minlength=len(keys))
+        return {key: {'count': int(count), 'sum': float(total)}
+                for key, count, total in zip(keys.tolist(), counts, sums)}
+
+    def positions(self, **filters):
+        """One row per position: symbol, open and close time, volume and net profit"""
+        rows = self.query(**filters)
+        rows = rows[np.argsort(rows['position_id'], kind='stable')]
+        ids, starts = np.unique(rows['position_id'], return_index=True)
+        positions = np.zeros(len(ids), dtype=[('position_id', 'i8'), ('symbol', 'U16'), ('time_open', 'i8'),
+                                              ('time_close', 'i8'), ('volume', 'f8'), ('profit', 'f8')])
+        if len(ids) == 0:
+            return positions
+
+        closing = rows['entry'] != mt5.DEAL_ENTRY_IN
+        net = rows['profit'] + rows['commission'] + rows['swap']
+        positions['position_id'] = ids
+        positions['symbol'] = rows['symbol'][starts]
+        positions['time_open'] = np.minimum.reduceat(rows['time'], starts)
+        positions['time_close'] = np.maximum.reduceat(np.where(closing, rows['time'], 0), starts)
+        positions['volume'] = np.add.reduceat(np.where(closing, 0.0, rows['volume']), starts)
+        positions['profit'] = np.add.reduceat(net, starts)
+        return positions
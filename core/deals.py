@@ -0,0 +1,101 @@
+import MetaTrader5 as mt5
+import threading
+import logging
+import time
+from ..config.trading_config import TradingConfig
+
+DEFAULT_OVERLAP = 60  # seconds re-read behind the high-water mark
+FUTURE_WINDOW = 24 * 60 * 60  # end of the fetch window, past any server time offset
+
+
+class DealIngester:
+    """Incremental feed of the terminal's deal history
+
+    Each poll fetches only deals from the newest deal time seen (less a
+    short overlap for deals stamped in the same second or booked late) and
+    drops tickets that were already ingested, so its cost follows the
+    number of new deals rather than the length of the history. Consumers
+    keep a cursor into the retained history and read only what they have
+    not seen yet.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, source=None, magic=None, lookback_days=None, overlap=DEFAULT_OVERLAP,
+                 start_time=None, start_ticket=0):
+        self.source = source if source is not None else mt5
+        self.magic = magic  # None keeps deals of every magic number
+        lookback_days = lookback_days if lookback_days is not None else TradingConfig.DEAL_HISTORY_DAYS
+        self.lookback = lookback_days * 24 * 60 * 60
+        self.overlap = overlap
+        self.start_time = start_time
+        self.start_ticket = start_ticket  # tickets up to this one were handled before a restart
+        self.high_water = None
+        self.seen = {}  # ticket -> deal time, only within the overlap window
+        self.history = []
+        self.base = 0  # cursor position of history[0]
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Get process-wide ingester of all deals"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def poll(self):
+        """Fetch deals newer than the high-water mark; returns the new ones"""
+        try:
+            with self.lock:
+                now = time.time()
+                if self.high_water is not None:
+                    date_from = self.high_water - self.overlap
+                elif self.start_time is not None:
+                    date_from = self.start_time
+                else:
+                    date_from = now - self.lookback
+
+                deals = self.source.history_deals_get(int(date_from), int(now + FUTURE_WINDOW))
+                if deals is None:
+                    return []
+
+                new = []
+                for deal in sorted(deals, key=lambda deal: (deal.time, deal.ticket)):
+                    if deal.ticket in self.seen or deal.ticket <= self.start_ticket:
+                        continue
+                    if self.high_water is None or deal.time > self.high_water:
+                        self.high_water = deal.time
+                    self.seen[deal.ticket] = deal.time
+                    if self.magic is None or deal.magic == self.magic:
+                        new.append(deal)
+
+                if self.high_water is not None:
+                    cutoff = self.high_water - self.overlap
+                    self.seen = {ticket: when for ticket, when in self.seen.items() if when >= cutoff}
+                self.history.extend(new)
+                self.trim()
+                return new
+
+        except Exception as e:
+            logging.error(f"Error ingesting deals: {str(e)}")
+            return []
+
+    def trim(self):
+        """Drop deals older than the lookback window"""
+        if self.high_water is None:
+            return
+        cutoff = self.high_water - self.lookback
+        count = 0
+        while count < len(self.history) and self.history[count].time < cutoff:
+            count += 1
+        if count:
+            del self.history[:count]
+            self.base += count
+
+    def read(self, cursor):
+        """Deals ingested after `cursor`, and the cursor for the next read"""
+        with self.lock:
+            start = max(cursor - self.base, 0)
+            return self.history[start:], self.base + len(self.history)
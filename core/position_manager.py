@@ -1,17 +1,57 @@
 import MetaTrader5 as mt5
 import threading
 import logging
+import time
 from datetime import datetime
 import pandas as pd
 import numpy as np
 from ..config.trading_config import TradingConfig
+from .bar_store import BarStore
+from .connection import MT5Connection
+from .snapshot import TerminalSnapshot
+from ..analysis.indicators import IndicatorEngine
+from ..utils.instrumentation import timed
+from ..utils.logger import log_event
+
+def stop_candidates(direction, entry, exit_price, atr, trail_distance, breakeven_activation,
+                    trail_activation=None):
+    """Tightest stop each position qualifies for, as a signed price (-inf for none)
+
+    Prices are multiplied by `direction` (1 buy, -1 sell) so a tighter stop is
+    always a larger value. The trailing stop sits `trail_distance` ATRs behind
+    the exit price, once price has moved `trail_activation` ATRs in favour if
+    given. Breakeven applies after a move of `breakeven_activation` ATRs.
+    Arguments broadcast, so this works per position or per bar.
+    """
+    moved = direction * (exit_price - entry)
+    candidate = np.full(np.broadcast(direction, entry, exit_price, atr).shape, -np.inf)
+
+    # Update trailing stop
+    if trail_distance is not None:
+        trail = direction * exit_price - atr * trail_distance
+        if trail_activation is not None:
+            trail = np.where(moved >= atr * trail_activation, trail, -np.inf)
+        candidate = np.maximum(candidate, trail)
+
+    # Move to breakeven once price has run far enough in our favour
+    breakeven = moved >= atr * breakeven_activation
+    return np.where(breakeven, np.maximum(candidate, direction * entry), candidate)
+
 
 class PositionManager:
-    def __init__(self):
+    def __init__(self, bar_store=None, connection=None, indicator_engine=None, snapshot=None):
+        self.bar_store = bar_store if bar_store is not None else BarStore.get_instance()
+        self.connection = connection if connection is not None else MT5Connection.get_instance()
+        self.snapshot = snapshot if snapshot is not None else TerminalSnapshot.get_instance()
+        self.indicator_engine = (indicator_engine if indicator_engine is not None
+                                 else IndicatorEngine(self.bar_store))
+        self.profiles = self.indicator_engine.profiles
+        self.age_warned = set()
         self.positions = {}  # Track active positions
         self.trade_lock = threading.Lock()
         self.last_check = datetime.now()
 
+    @timed('positions.open_trade')
     def open_trade(self, symbol, trade_type, lot_size, sl_price, tp_price=None):
         """Open new trading position"""
         try:
@@ -30,14 +70,11 @@ class PositionManager:
                 
                 # Calculate TP if not provided
                 if tp_price is None:
+                    tp_sl_ratio = self.profiles.get(symbol).TP_SL_RATIO
                     if trade_type == 'BUY':
-                        tp_price = entry_price + ((entry_price - sl_price) * 
-                                                TradingConfig.TP_ATR_MULTIPLIER / 
-                                                TradingConfig.SL_ATR_MULTIPLIER)
+                        tp_price = entry_price + (entry_price - sl_price) * tp_sl_ratio
                     else:
-                        tp_price = entry_price - ((sl_price - entry_price) * 
-                                                TradingConfig.TP_ATR_MULTIPLIER / 
-                                                TradingConfig.SL_ATR_MULTIPLIER)
+                        tp_price = entry_price - (sl_price - entry_price) * tp_sl_ratio
 
                 # Create trade request
                 request = {
@@ -57,6 +94,7 @@ class PositionManager:
 
                 # Send trade request
                 result = mt5.order_send(request)
+                self.snapshot.invalidate()  # Account and positions changed
                 
                 if result.retcode != mt5.TRADE_RETCODE_DONE:
                     logging.error(f"""
@@ -82,18 +120,9 @@ class PositionManager:
                     
                     self.positions[result.order] = trade_info
                     
-                    logging.info(f"""
-                    Trade opened successfully:
-                    - Symbol: {symbol}
-                    - Type: {trade_type}
-                    - Volume: {lot_size}
-                    - Entry: {entry_price}
-                    - SL: {sl_price}
-                    - TP: {tp_price}
-                    - Ticket: {result.order}
-                    - Time: {datetime.now()}
-                    - Account: zzzz14
-                    """)
+                    log_event('trade_opened', symbol=symbol, type=trade_type, volume=lot_size,
+                              entry=entry_price, sl=sl_price, tp=tp_price, ticket=result.order,
+                              account='zzzz14')
                     
                     return result.order
 
@@ -101,104 +130,93 @@ class PositionManager:
             logging.error(f"Error opening trade: {str(e)}")
             return None
 
+    @timed('positions.manage_positions')
     def manage_positions(self):
-        """Manage all open positions"""
+        """Manage all open positions from a single positions snapshot"""
         try:
-            if not mt5.initialize():
+            if not self.connection.ensure_connected():
                 return
 
             positions = mt5.positions_get()
             if positions is None:
                 return
 
-            current_time = datetime.now()
-            
+            # Group bot positions so tick and ATR are fetched once per symbol
+            by_symbol = {}
             for position in positions:
                 if position.magic != 123456:  # Skip non-bot trades
                     continue
+                by_symbol.setdefault(position.symbol, []).append(position)
 
-                # Update trailing stop
-                if TradingConfig.TRAILING_STOP:
-                    self.update_trailing_stop(position)
+            for symbol, symbol_positions in by_symbol.items():
+                self.manage_symbol_positions(symbol, symbol_positions)
 
-                # Check breakeven
-                self.check_breakeven(position)
-
-                # Check position age
-                self.check_position_age(position)
-
-            self.last_check = current_time
+            self.last_check = datetime.now()
 
         except Exception as e:
             logging.error(f"Error managing positions: {str(e)}")
-        finally:
-            mt5.shutdown()
 
-    def update_trailing_stop(self, position):
-        """Update trailing stop for position"""
+    @timed('positions.manage_symbol_positions')
+    def manage_symbol_positions(self, symbol, positions):
+        """Update trailing stop and breakeven for all positions on one symbol"""
         try:
-            symbol = position.symbol
-            position_id = position.ticket
-            current_sl = position.sl
-            
-            # Get symbol info
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self.snapshot.symbol_info(symbol)
             if not symbol_info:
                 return
 
-            # Get current price
             tick = mt5.symbol_info_tick(symbol)
             if not tick:
                 return
 
-            # Calculate ATR-based trail amount
-            rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M5, 0, TradingConfig.ATR_PERIOD)
-            if rates is None:
-                return
-                
-            df = pd.DataFrame(rates)
-            atr = ta.atr(df['high'], df['low'], df['close'], length=TradingConfig.ATR_PERIOD).iloc[-1]
-            trail_amount = atr * TradingConfig.TRAILING_STOP_ACTIVATION
-
-            # Update stop loss if needed
-            if position.type == mt5.POSITION_TYPE_BUY:
-                new_sl = tick.bid - trail_amount
-                if new_sl > current_sl:
-                    self.modify_sl(position_id, new_sl)
-            else:  # SELL
-                new_sl = tick.ask + trail_amount
-                if new_sl < current_sl or current_sl == 0:
-                    self.modify_sl(position_id, new_sl)
+            atr = self.get_atr(symbol)
+            if atr is not None and atr > 0:
+                new_sl = self.calculate_stop_levels(positions, tick.bid, tick.ask, atr,
+                                                    symbol_info.point, self.profiles.get(symbol))
+
+                # Only positions whose stop actually moves get a modification
+                for index in np.flatnonzero(~np.isnan(new_sl)):
+                    position = positions[index]
+                    self.modify_sl(position.ticket, round(float(new_sl[index]), symbol_info.digits),
+                                   tp=position.tp, symbol=symbol)
+
+            # Check position age
+            self.check_position_age(positions)
 
         except Exception as e:
-            logging.error(f"Error updating trailing stop: {str(e)}")
+            logging.error(f"Error managing positions for {symbol}: {str(e)}")
 
-    def check_breakeven(self, position):
-        """Move stop loss to breakeven if conditions met"""
-        try:
-            # Calculate profit in ATR units
-            rates = mt5.copy_rates_from_pos(position.symbol, mt5.TIMEFRAME_M5, 0, TradingConfig.ATR_PERIOD)
-            if rates is None:
-                return
-                
-            df = pd.DataFrame(rates)
-            atr = ta.atr(df['high'], df['low'], df['close'], length=TradingConfig.ATR_PERIOD).iloc[-1]
-            
-            profit_threshold = atr * TradingConfig.BREAKEVEN_ACTIVATION
-            
-            if position.profit >= profit_threshold:
-                entry_price = position.price_open
-                current_sl = position.sl
+    def get_atr(self, symbol):
+        """Current M5 ATR for a symbol from the shared indicator engine"""
+        values = self.indicator_engine.get_values(symbol)
+        if values is None or np.isnan(values['atr']):
+            return None
+        return values['atr']
 
-                if position.type == mt5.POSITION_TYPE_BUY and current_sl < entry_price:
-                    self.modify_sl(position.ticket, entry_price)
-                elif position.type == mt5.POSITION_TYPE_SELL and (current_sl > entry_price or current_sl == 0):
-                    self.modify_sl(position.ticket, entry_price)
+    def calculate_stop_levels(self, positions, bid, ask, atr, point=0.0, profile=None):
+        """New stop loss for each position, NaN where the stop should stay
 
-        except Exception as e:
-            logging.error(f"Error checking breakeven: {str(e)}")
+        Trailing stop and breakeven are combined so each position gets at most
+        one modification, and stops only ever move in the position's favour.
+        """
+        is_buy = np.array([position.type == mt5.POSITION_TYPE_BUY for position in positions])
+        entry = np.array([position.price_open for position in positions], dtype=float)
+        current_sl = np.array([position.sl for position in positions], dtype=float)
 
-    def modify_sl(self, ticket, new_sl):
+        # Work in signed prices so "tighter" is always "greater" for buys and sells
+        direction = np.where(is_buy, 1.0, -1.0)
+        exit_price = np.where(is_buy, bid, ask)
+        current = np.where(current_sl == 0, -np.inf, direction * current_sl)  # 0 means no stop
+
+        profile = profile if profile is not None else self.profiles.defaults
+        trail_distance = profile.TRAILING_STOP_ACTIVATION if profile.TRAILING_STOP else None
+        candidate = stop_candidates(direction, entry, exit_price, atr, trail_distance,
+                                    profile.BREAKEVEN_ACTIVATION)
+
+        improves = candidate > current + point
+        return np.where(improves, direction * candidate, np.nan)
+
+    @timed('positions.modify_sl')
+    def modify_sl(self, ticket, new_sl, tp=None, symbol=None):
         """Modify stop loss for position"""
         try:
             request = {
@@ -207,26 +225,36 @@ class PositionManager:
                 "sl": new_sl,
                 "magic": 123456
             }
+            # SLTP replaces both levels, so the existing TP has to be sent back
+            if tp is not None:
+                request["tp"] = tp
+            if symbol is not None:
+                request["symbol"] = symbol
             
             result = mt5.order_send(request)
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logging.error(f"Failed to modify SL. Error code: {result.retcode}")
             else:
                 logging.info(f"Modified SL for position #{ticket} to {new_sl}")
+                if ticket in self.positions:
+                    self.positions[ticket]['sl'] = new_sl
 
         except Exception as e:
             logging.error(f"Error modifying SL: {str(e)}")
 
-    def check_position_age(self, position):
+    def check_position_age(self, positions):
         """Check and handle old positions"""
         try:
-            # Maximum position age (24 hours)
-            max_age = 24 * 60 * 60  # seconds
-            
-            position_age = (datetime.now() - position.time).total_seconds()
-            
-            if position_age > max_age:
-                logging.warning(f"Position #{position.ticket} is older than 24 hours")
+            # position.time is the open time in epoch seconds
+            open_times = np.array([position.time for position in positions], dtype=float)
+            old = time.time() - open_times > TradingConfig.MAX_POSITION_AGE
+
+            for index in np.flatnonzero(old):
+                position = positions[index]
+                if position.ticket not in self.age_warned:
+                    logging.warning(f"Position #{position.ticket} is older than "
+                                    f"{TradingConfig.MAX_POSITION_AGE / 3600:.0f} hours")
+                    self.age_warned.add(position.ticket)
                 
                 # Optional: Close old positions
                 if TradingConfig.CLOSE_OLD_POSITIONS:
@@ -235,6 +263,7 @@ class PositionManager:
         except Exception as e:
             logging.error(f"Error checking position age: {str(e)}")
 
+    @timed('positions.close_position')
     def close_position(self, ticket):
         """Close specific position"""
         try:
@@ -258,6 +287,7 @@ class PositionManager:
             }
 
             result = mt5.order_send(request)
+            self.snapshot.invalidate()  # Account and positions changed
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 logging.error(f"Failed to close position #{ticket}. Error code: {result.retcode}")
                 return False
@@ -285,7 +315,7 @@ class PositionManager:
 
     def check_connection(self):
         """Check MT5 connection"""
-        if not mt5.initialize():
-            logging.error("Failed to initialize MT5 connection")
+        if not self.connection.ensure_connected():
+            logging.error("MT5 connection unavailable")
             return False
         return True
\ No newline at end of file
@@ -2,9 +2,15 @@ import MetaTrader5 as mt5
 import logging
 from datetime import datetime
 from ..config.trading_config import TradingConfig
+from .connection import MT5Connection
+from .snapshot import TerminalSnapshot
+from ..utils.instrumentation import timed
+from ..utils.logger import log_event
 
 class RiskManager:
-    def __init__(self):
+    def __init__(self, connection=None, snapshot=None):
+        self.connection = connection if connection is not None else MT5Connection.get_instance()
+        self.snapshot = snapshot if snapshot is not None else TerminalSnapshot.get_instance()
         self.daily_stats = {
             'trades': 0,
             'loss': 0,
@@ -24,11 +30,15 @@ class RiskManager:
             'peak_balance': self.get_account_equity()
         }
 
+    @timed('risk.calculate_position_size')
     def calculate_position_size(self, symbol, sl_price):
         """Calculate position size based on risk parameters"""
         try:
+            if not self.connection.ensure_connected():
+                return 0.01  # Default minimum lot
+                
             # Get account info
-            account_info = mt5.account_info()
+            account_info = self.snapshot.account_info()
             if not account_info:
                 logging.error("Failed to get account info")
                 return 0.01  # Default minimum lot
@@ -37,13 +47,13 @@ class RiskManager:
             risk_amount = equity * TradingConfig.RISK_PERCENT / 100
             
             # Get symbol info
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self.snapshot.symbol_info(symbol)
             if not symbol_info:
                 logging.error(f"Failed to get symbol info for {symbol}")
                 return 0.01
                 
             # Get current price
-            tick = mt5.symbol_info_tick(symbol)
+            tick = self.snapshot.tick(symbol)
             if not tick:
                 logging.error(f"Failed to get tick info for {symbol}")
                 return 0.01
@@ -74,14 +84,8 @@ class RiskManager:
             # Normalize lot size
             lot_size = self.normalize_lot_size(symbol, lot_size)
             
-            logging.info(f"""
-            Position Size Calculation for {symbol}:
-            - Equity: ${equity:.2f}
-            - Risk Amount: ${risk_amount:.2f}
-            - SL Distance: {sl_distance:.1f} pips
-            - Pip Value: ${pip_value:.5f}
-            - Calculated Lot: {lot_size:.2f}
-            """)
+            log_event('position_size', symbol=symbol, equity=equity, risk_amount=risk_amount,
+                      sl_pips=sl_distance, pip_value=pip_value, lot=lot_size)
             
             return lot_size
             
@@ -92,7 +96,7 @@ class RiskManager:
     def normalize_lot_size(self, symbol, lot_size):
         """Normalize lot size according to symbol requirements"""
         try:
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self.snapshot.symbol_info(symbol)
             if not symbol_info:
                 return 0.01
                 
@@ -113,9 +117,13 @@ class RiskManager:
             logging.error(f"Error normalizing lot size: {str(e)}")
             return 0.01
 
+    @timed('risk.can_open_trade')
     def can_open_trade(self, symbol):
         """Check if new trade can be opened"""
         try:
+            if not self.connection.ensure_connected():
+                return False
+                
             # Check daily loss limit
             if self.daily_stats['loss'] >= self.get_max_daily_loss():
                 logging.warning("Daily loss limit reached")
@@ -147,7 +155,7 @@ class RiskManager:
     def count_symbol_trades(self, symbol):
         """Count open trades for specific symbol"""
         try:
-            positions = mt5.positions_get(symbol=symbol)
+            positions = self.snapshot.positions(symbol)
             if positions is None:
                 return 0
             return len(positions)
@@ -159,7 +167,7 @@ class RiskManager:
     def get_account_equity(self):
         """Get current account equity"""
         try:
-            account_info = mt5.account_info()
+            account_info = self.snapshot.account_info()
             if account_info:
                 return account_info.equity
             return 0
@@ -171,7 +179,7 @@ class RiskManager:
     def get_max_daily_loss(self):
         """Calculate maximum daily loss amount"""
         try:
-            account_info = mt5.account_info()
+            account_info = self.snapshot.account_info()
             if account_info:
                 return account_info.balance * TradingConfig.MAX_DAILY_LOSS_PERCENT / 100
             return 0
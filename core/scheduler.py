@@ -0,0 +1,92 @@
+import MetaTrader5 as mt5
+import logging
+import time
+from .bar_store import TIMEFRAME_SECONDS
+
+
+class SymbolEventState:
+    """Last seen tick and bar for one symbol"""
+
+    def __init__(self):
+        self.tick_time_msc = None
+        self.bar_open = None
+        self.evaluated_price = None
+
+
+class MarketEventScheduler:
+    """Trigger symbol evaluation on new bars or significant tick moves"""
+
+    def __init__(self, source=None, timeframe=mt5.TIMEFRAME_M1, move_threshold=0.0005,
+                 poll_interval=0.25, max_idle=60.0):
+        self.source = source if source is not None else mt5
+        self.timeframe = timeframe
+        self.tf_seconds = TIMEFRAME_SECONDS.get(timeframe, 60)
+        self.move_threshold = move_threshold  # relative price move
+        self.poll_interval = poll_interval
+        self.max_idle = max_idle  # re-evaluate quiet symbols at least this often
+        self.states = {}
+        self.timers = {}
+
+    def poll(self, symbols):
+        """Check each symbol's latest tick once, returning symbols that need evaluation"""
+        events = []
+        now = time.time()
+
+        for symbol in symbols:
+            try:
+                tick = self.source.symbol_info_tick(symbol)
+                if tick is None:
+                    continue
+
+                state = self.states.get(symbol)
+                if state is None:
+                    state = self.states[symbol] = SymbolEventState()
+
+                if tick.time_msc == state.tick_time_msc and not self.idle_expired(symbol, now):
+                    continue  # Nothing changed since last poll
+                state.tick_time_msc = tick.time_msc
+
+                price = (tick.bid + tick.ask) / 2
+                bar_open = tick.time - tick.time % self.tf_seconds
+
+                if bar_open != state.bar_open:
+                    # A new bar opened, so the previous one closed
+                    state.bar_open = bar_open
+                    events.append(symbol)
+                elif (state.evaluated_price is None or
+                      abs(price - state.evaluated_price) >= state.evaluated_price * self.move_threshold):
+                    events.append(symbol)
+                elif self.idle_expired(symbol, now):
+                    events.append(symbol)
+                else:
+                    continue
+
+                state.evaluated_price = price
+                self.timers[('evaluated', symbol)] = now
+
+            except Exception as e:
+                logging.error(f"Error polling tick for {symbol}: {str(e)}")
+
+        return events
+
+    def wait_for_events(self, symbols, timeout):
+        """Poll ticks until some symbol needs evaluation or the timeout passes"""
+        deadline = time.time() + timeout
+        while True:
+            events = self.poll(symbols)
+            remaining = deadline - time.time()
+            if events or remaining <= 0:
+                return events
+            time.sleep(min(self.poll_interval, remaining))
+
+    def idle_expired(self, symbol, now):
+        """Check whether a symbol has gone unevaluated for longer than max_idle"""
+        return now - self.timers.get(('evaluated', symbol), 0) >= self.max_idle
+
+    def due(self, name, interval):
+        """Check a named cadence, restarting it when due"""
+        now = time.time()
+        if now - self.timers.get(name, 0) >= interval:
+            self.timers[name] = now
+            return True
+        return False
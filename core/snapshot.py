@@ -0,0 +1,114 @@
+import MetaTrader5 as mt5
+import logging
+import threading
+import time
+
+DEFAULT_ACCOUNT_TTL = 1.0
+DEFAULT_POSITIONS_TTL = 0.5
+DEFAULT_TICK_TTL = 0.25
+
+
+class TerminalSnapshot:
+    """Short-lived cache of account, positions and symbol data
+
+    Static symbol properties (contract size, point, volume limits) never
+    change while connected, so they are kept until clear() is called on
+    reconnect. Account info, positions and ticks expire after a TTL or at
+    the start of the next cycle, whichever comes first.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, source=None, account_ttl=DEFAULT_ACCOUNT_TTL,
+                 positions_ttl=DEFAULT_POSITIONS_TTL, tick_ttl=DEFAULT_TICK_TTL):
+        self.source = source if source is not None else mt5
+        self.ttl = {
+            'account': account_ttl,
+            'positions': positions_ttl,
+            'tick': tick_ttl,
+        }
+        self.dynamic = {}  # (kind, symbol) -> (fetched_at, cycle, value)
+        self.static = {}   # symbol -> symbol_info
+        self.cycle = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Get process-wide default snapshot"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def begin_cycle(self):
+        """Expire dynamic data so each cycle starts from a fresh snapshot"""
+        self.cycle += 1
+
+    def invalidate(self):
+        """Drop account and positions, e.g. after an order was sent"""
+        with self.lock:
+            for key in [key for key in self.dynamic if key[0] in ('account', 'positions')]:
+                del self.dynamic[key]
+
+    def clear(self):
+        """Drop everything, including static symbol info (call on reconnect)"""
+        with self.lock:
+            self.dynamic.clear()
+            self.static.clear()
+
+    def get(self, kind, symbol, fetch):
+        """Return a cached dynamic value or fetch it from the terminal"""
+        now = time.time()
+        key = (kind, symbol)
+        with self.lock:
+            cached = self.dynamic.get(key)
+            if cached is not None:
+                fetched_at, cycle, value = cached
+                if cycle == self.cycle and now - fetched_at < self.ttl[kind]:
+                    return value
+
+        try:
+            value = fetch()
+        except Exception as e:
+            logging.error(f"Error fetching {kind} snapshot: {str(e)}")
+            return None
+
+        if value is not None:
+            with self.lock:
+                self.dynamic[key] = (now, self.cycle, value)
+        return value
+
+    def account_info(self):
+        """Account info, refreshed at most once per TTL"""
+        return self.get('account', None, self.source.account_info)
+
+    def positions(self, symbol=None):
+        """Open positions from one positions_get() call, optionally for one symbol"""
+        positions = self.get('positions', None, self.source.positions_get)
+        if positions is None:
+            return None
+        if symbol is None:
+            return positions
+        return tuple(position for position in positions if position.symbol == symbol)
+
+    def tick(self, symbol):
+        """Latest tick, refreshed at most once per TTL"""
+        return self.get('tick', symbol, lambda: self.source.symbol_info_tick(symbol))
+
+    def symbol_info(self, symbol):
+        """Symbol info for static properties, cached until clear()"""
+        info = self.static.get(symbol)
+        if info is not None:
+            return info
+
+        try:
+            info = self.source.symbol_info(symbol)
+        except Exception as e:
+            logging.error(f"Error fetching symbol info for {symbol}: {str(e)}")
+            return None
+
+        if info is not None:
+            with self.lock:
+                self.static[symbol] = info
+        return info
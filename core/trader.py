@@ -15,29 +15,73 @@ if parent_dir not in sys.path:
 
 from tb.config.mt5_config import MT5Config
 from tb.config.trading_config import TradingConfig
+from tb.config.profiles import ProfileStore
 from tb.core.position_manager import PositionManager
 from tb.core.risk_manager import RiskManager
+from tb.core.bar_store import BarStore
+from tb.core.deals import DealIngester
+from tb.core.deal_store import DealStore
+from tb.core.connection import MT5Connection
+from tb.core.snapshot import TerminalSnapshot
+from tb.analysis.indicators import IndicatorEngine
 from tb.analysis.technical import TechnicalAnalyzer
 from tb.analysis.sentiment import SentimentAnalyzer
 from tb.analysis.correlation import CorrelationAnalyzer
 from tb.analysis.ml_optimizer import MLOptimizer
+from tb.analysis.ml_inference import MLScorer
 from tb.utils.stats import TradingStats
+from tb.utils.instrumentation import Instrumentation, instrument_mt5, timed
+from tb.utils.logger import log_event
 
 class MT5Trader:
     def __init__(self):
-        self.connected = False
-        self.connection_attempts = 3
         self.exit_flag = False
         self.trade_lock = threading.Lock()
         
+        # Single terminal link, components never initialize or shut down MT5 themselves
+        self.connection = MT5Connection(
+            login=MT5Config.LOGIN_ID,
+            password=MT5Config.PASSWORD,
+            server=MT5Config.SERVER,
+            max_attempts=TradingConfig.RECONNECT_ATTEMPTS,
+            retry_delay=TradingConfig.RECONNECT_WAIT_TIME
+        ).register()
+        self.connection.add_reconnect_listener(self.on_reconnect)
+        
+        # Stage timings, every terminal call is timed once enabled
+        self.instrumentation = Instrumentation.get_instance()
+        if TradingConfig.INSTRUMENTATION_ENABLED:
+            self.instrumentation.enable(window=TradingConfig.INSTRUMENTATION_WINDOW,
+                                        summary_interval=TradingConfig.INSTRUMENTATION_SUMMARY_INTERVAL)
+            instrument_mt5(mt5, self.instrumentation)
+        
+        # Shared rates cache, read by every component
+        self.bar_store = BarStore()
+        
+        # Per-symbol indicator and risk parameters, reloaded when the file changes
+        self.profiles = ProfileStore.get_instance()
+        self.indicator_engine = IndicatorEngine(self.bar_store, profiles=self.profiles)
+        
+        # Account, positions and symbol info shared by risk checks
+        self.snapshot = TerminalSnapshot()
+        
         # Initialize components
-        self.position_manager = PositionManager()
-        self.risk_manager = RiskManager()
-        self.technical_analyzer = TechnicalAnalyzer()
-        self.sentiment_analyzer = SentimentAnalyzer()
-        self.correlation_analyzer = CorrelationAnalyzer()
+        self.position_manager = PositionManager(bar_store=self.bar_store, connection=self.connection,
+                                                indicator_engine=self.indicator_engine,
+                                                snapshot=self.snapshot)
+        self.risk_manager = RiskManager(connection=self.connection, snapshot=self.snapshot)
+        self.technical_analyzer = TechnicalAnalyzer(bar_store=self.bar_store,
+                                                    indicator_engine=self.indicator_engine)
+        self.sentiment_analyzer = SentimentAnalyzer(bar_store=self.bar_store,
+                                                    indicator_engine=self.indicator_engine)
+        self.correlation_analyzer = CorrelationAnalyzer(bar_store=self.bar_store,
+                                                        connection=self.connection,
+                                                        snapshot=self.snapshot)
         self.ml_optimizer = MLOptimizer()
-        self.stats = TradingStats()
+        self.ml_scorer = MLScorer(self.ml_optimizer, bar_store=self.bar_store)
+        self.deal_ingester = DealIngester.get_instance()
+        self.deal_store = DealStore.get_instance()
+        self.stats = TradingStats(connection=self.connection, deals=self.deal_ingester, store=self.deal_store)
         
         # Market data cache
         self.market_data = {
@@ -56,31 +100,9 @@ class MT5Trader:
     def connect(self):
         """Establish connection to MT5 terminal"""
         try:
-            # Add delay before initialization
-            time.sleep(0.5)
-            
-            # Reset MT5 if already initialized
-            if mt5.terminal_info() is not None:
-                mt5.shutdown()
-                time.sleep(1)
-            
-            # Initialize MT5
-            if not mt5.initialize():
-                logging.error(f"Failed to initialize MT5: {mt5.last_error()}")
-                self.connection_attempts += 1
-                return False
-            
-            # Login to MT5 account
-            if not mt5.login(MT5Config.LOGIN_ID, MT5Config.PASSWORD, MT5Config.SERVER):
-                logging.error(f"Failed to login: {mt5.last_error()}")
-                mt5.shutdown()
-                self.connection_attempts += 1
+            if not self.connection.connect():
                 return False
             
-            # Connection successful
-            self.connected = True
-            self.connection_attempts = 0
-            
             # Log account info
             account_info = mt5.account_info()
             if account_info:
@@ -92,16 +114,24 @@ class MT5Trader:
                 - Equity: ${account_info.equity:.2f}
                 """)
             
-            # Initialize trading symbols
-            self.initialize_symbols()
+            self.on_reconnect()
             
             return True
             
         except Exception as e:
             logging.error(f"Connection error: {str(e)}")
-            self.connection_attempts += 1
             return False
 
+    def on_reconnect(self):
+        """Refresh state that may be stale after the terminal link was re-established"""
+        # Cached bars and symbol info may predate the disconnect
+        self.bar_store.invalidate()
+        self.indicator_engine.reset()
+        self.snapshot.clear()
+        
+        # Initialize trading symbols
+        self.initialize_symbols()
+
     def initialize_symbols(self):
         """Initialize trading symbols"""
         for symbol in MT5Config.SYMBOLS:
@@ -139,13 +169,10 @@ class MT5Trader:
                 return self.market_data['data'].get(symbol)
             
             # Get new market data
-            rates = mt5.copy_rates_from_pos(symbol, MT5Config.TIMEFRAME_MAIN, 0, 100)
-            if rates is None:
+            df = self.bar_store.get_dataframe(symbol, MT5Config.TIMEFRAME_MAIN, 100)
+            if df is None:
                 return None
             
-            # Convert to DataFrame
-            df = pd.DataFrame(rates)
-            
             # Update cache
             self.market_data['data'][symbol] = df
             self.market_data['last_update'][symbol] = current_time
@@ -156,39 +183,83 @@ class MT5Trader:
             logging.error(f"Error updating market data for {symbol}: {str(e)}")
             return None
 
-    def process_symbol(self, symbol):
-        """Process trading logic for a symbol"""
+    @timed('trader.analyze_symbol')
+    def analyze_symbol(self, symbol):
+        """Run signal analysis for a symbol and return a trade plan"""
         try:
             # Update market data
             df = self.update_market_data(symbol)
             if df is None:
-                return
+                return None
             
             # Get technical analysis signal
             signal, sl_price, tp_price = self.technical_analyzer.get_signal(symbol)
             if not signal:
-                return
+                return None
+            
+            # Validate with the ML model
+            if not self.check_ml_filter(symbol, signal):
+                return None
             
             # Validate with sentiment analysis
             sentiment_score = self.sentiment_analyzer.get_market_sentiment(symbol)
             if abs(sentiment_score) < TradingConfig.SENTIMENT_THRESHOLD:
-                return
+                return None
             
             # Check correlation risk
             if not self.correlation_analyzer.check_correlation_risk(symbol, signal):
-                return
+                return None
             
             # Calculate position size
             lot_size = self.risk_manager.calculate_position_size(symbol, sl_price)
             if not lot_size:
+                return None
+            
+            return {
+                'symbol': symbol,
+                'signal_type': signal,
+                'lot_size': lot_size,
+                'sl_price': sl_price,
+                'tp_price': tp_price
+            }
+            
+        except Exception as e:
+            logging.error(f"Error analyzing {symbol}: {str(e)}")
+            return None
+
+    def check_ml_filter(self, symbol, signal):
+        """Check the model agrees with the signal direction (passes without a model)"""
+        if not TradingConfig.ML_SIGNAL_FILTER:
+            return True
+        
+        # All symbols are scored together on the first request each cycle
+        probability = self.ml_scorer.score(symbol)
+        if probability is None:
+            return True
+        
+        if signal == 'SELL':
+            probability = 1 - probability
+        return probability >= TradingConfig.ML_MIN_PROBABILITY
+
+    @timed('trader.process_symbol')
+    def process_symbol(self, symbol):
+        """Process trading logic for a symbol"""
+        try:
+            plan = self.analyze_symbol(symbol)
+            if plan is None:
                 return
             
             # Execute trade
-            self.execute_trade(symbol, signal, lot_size, sl_price, tp_price)
+            self.execute_trade(**plan)
             
         except Exception as e:
             logging.error(f"Error processing {symbol}: {str(e)}")
 
+    def manage_positions(self):
+        """Update trailing stops and breakeven for open positions"""
+        self.position_manager.manage_positions()
+
+    @timed('trader.execute_trade')
     def execute_trade(self, symbol, signal_type, lot_size, sl_price, tp_price):
         """Execute trading operation"""
         try:
@@ -211,19 +282,13 @@ class MT5Trader:
                     self.performance['trades_today'] += 1
                     self.stats.update_trade_opened(symbol, signal_type, lot_size)
                     
-                    logging.info(f"""
-                    New trade opened:
-                    - Symbol: {symbol}
-                    - Type: {signal_type}
-                    - Lot Size: {lot_size}
-                    - SL: {sl_price}
-                    - TP: {tp_price}
-                    - Ticket: {ticket}
-                    """)
+                    log_event('trade_executed', symbol=symbol, type=signal_type, lot=lot_size,
+                              sl=sl_price, tp=tp_price, ticket=ticket)
                     
         except Exception as e:
             logging.error(f"Error executing trade: {str(e)}")
 
+    @timed('cycle')
     def trading_cycle(self):
         """Main trading cycle"""
         try:
@@ -234,6 +299,9 @@ class MT5Trader:
             # Update daily stats if needed
             self.update_daily_stats()
             
+            # Sync each rates series and terminal snapshot at most once this cycle
+            self.begin_cycle()
+            
             # Manage existing positions
             self.position_manager.manage_positions()
             
@@ -249,6 +317,13 @@ class MT5Trader:
         except Exception as e:
             logging.error(f"Error in trading cycle: {str(e)}")
 
+    def begin_cycle(self):
+        """Start a new cycle so shared caches are refreshed once"""
+        self.bar_store.begin_cycle()
+        self.snapshot.begin_cycle()
+        self.ml_scorer.begin_cycle()
+        self.profiles.maybe_reload()
+
     def can_trade(self, symbol):
         """Check if trading is allowed for symbol"""
         return (
@@ -299,20 +374,18 @@ class MT5Trader:
                 
         return False
 
+    @timed('trader.optimize_parameters')
     def optimize_parameters(self, trading_history):
         """Optimize trading parameters using ML"""
         try:
-            current_time = time.time()
-            last_optimization = getattr(self, 'last_optimization', 0)
+            # The optimizer schedules its own runs and trains in the background,
+            # each call only checks whether a run is due or finished
+            self.ml_optimizer.optimize_parameters(trading_history)
             
-            # Optimize every hour
-            if current_time - last_optimization > 3600:
-                self.ml_optimizer.optimize_parameters(trading_history)
-                self.last_optimization = current_time
-                
         except Exception as e:
             logging.error(f"Error optimizing parameters: {str(e)}")
 
+    @timed('trader.update_daily_stats')
     def update_daily_stats(self):
         """Update daily trading statistics"""
         try:
@@ -333,31 +406,15 @@ class MT5Trader:
 
     def check_connection(self):
         """Check and maintain MT5 connection"""
-        if not self.connected or not mt5.terminal_info():
-            logging.warning("Connection lost, attempting to reconnect...")
-            
-            if self.connection_attempts < TradingConfig.RECONNECT_ATTEMPTS:
-                time.sleep(TradingConfig.RECONNECT_WAIT_TIME)
-                return self.connect()
-            
-            logging.error("Failed to reconnect after maximum attempts")
-            return False
-            
-        return True
+        return self.connection.ensure_connected()
 
+    @timed('trader.get_trading_history')
     def get_trading_history(self):
         """Get trading history for optimization"""
         try:
-            # Define the timeframe for history retrieval
-            end_time = datetime.now()
-            start_time = end_time - pd.Timedelta(days=30)  # Last 30 days
-            
-            # Retrieve trading history
-            history = mt5.history_deals_get(start_time, end_time)
-            if history is None:
-                raise Exception("Failed to get trading history")
-            
-            return history
+            # Fetch only deals newer than the last poll, then read the last 30 days locally
+            self.deal_store.sync()
+            return self.deal_store.query(start=int(time.time()) - 30 * 24 * 60 * 60)
             
         except Exception as e:
             logging.error(f"Error getting trading history: {str(e)}")
@@ -386,6 +443,7 @@ class MT5Trader:
             while not self.exit_flag:
                 try:
                     self.trading_cycle()
+                    self.instrumentation.maybe_log_summary()
                 except Exception as e:
                     logging.error(f"Error in trading cycle: {str(e)}")
                 
@@ -402,14 +460,17 @@ class MT5Trader:
     def cleanup(self):
         """Cleanup resources before stopping"""
         try:
-            if self.connected:
+            self.sentiment_analyzer.stop()
+            self.ml_optimizer.shutdown()
+            self.stats.close()
+            
+            if self.connection.connected:
                 # Close all positions if needed
                 if TradingConfig.CLOSE_POSITIONS_ON_STOP:
                     self.position_manager.close_all_positions()
                 
                 # Disconnect from MT5
-                mt5.shutdown()
-                self.connected = False
+                self.connection.shutdown()
             
             logging.info("Trading bot stopped")
             
@@ -2,6 +2,7 @@ import MetaTrader5 as mt5
 import logging
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import sys
 import signal
 import traceback
@@ -14,6 +15,7 @@ sys.path.insert(0, parent_dir)
 from tb.config.mt5_config import MT5Config
 from tb.config.trading_config import TradingConfig
 from tb.core.trader import MT5Trader
+from tb.core.scheduler import MarketEventScheduler
 from tb.utils.logger import setup_logger
 from tb.utils.stats import TradingStats
 
@@ -23,8 +25,24 @@ class TradingBot:
         self.login = MT5Config.LOGIN_ID
         self.logger = setup_logger()
         self.trader = MT5Trader()
-        self.stats = TradingStats()
+        self.stats = TradingStats(connection=self.trader.connection)
+        self.scheduler = MarketEventScheduler(
+            timeframe=MT5Config.TIMEFRAME_MAIN,
+            move_threshold=TradingConfig.SIGNAL_MOVE_THRESHOLD,
+            poll_interval=TradingConfig.TICK_POLL_INTERVAL,
+            max_idle=TradingConfig.SIGNAL_MAX_IDLE
+        )
         self.is_running = False
+        
+        # Worker pool for symbol analysis, orders stay serialized in the trader
+        self.executor = None
+        self.pending = {}
+        if TradingConfig.CONCURRENCY_MODE == 'thread':
+            self.executor = ThreadPoolExecutor(
+                max_workers=TradingConfig.MAX_WORKERS,
+                thread_name_prefix='symbol'
+            )
+        
         self.setup_signal_handlers()
 
     def setup_signal_handlers(self):
@@ -47,8 +65,8 @@ Login: {self.login}
     def initialize(self):
         """Initialize MT5 connection and verify setup"""
         try:
-            # Initialize MT5
-            if not mt5.initialize():
+            # Connect through the trader's shared connection
+            if not self.trader.connect():
                 self.logger.error(f"""
 {'='*50}
 MT5 INITIALIZATION FAILED
@@ -122,14 +140,27 @@ Login: {self.login}
                     # Check for new day
                     self.trader.check_trading_session()
 
-                    # Process each symbol
-                    for symbol in MT5Config.SYMBOLS:
-                        try:
-                            # Generate and execute signals
-                            self.trader.process_symbol(symbol)
+                    # Reconnect with backoff if the terminal link dropped
+                    if not self.trader.check_connection():
+                        time.sleep(TradingConfig.RECONNECT_WAIT_TIME)
+                        continue
+
+                    # Wait for new bars or significant price moves
+                    symbols = self.scheduler.wait_for_events(
+                        MT5Config.SYMBOLS,
+                        timeout=TradingConfig.POSITION_CHECK_INTERVAL
+                    )
+
+                    # Time the work done for these events, not the wait for them
+                    cycle_start = time.perf_counter()
 
-                            # Update trailing stops and breakeven
-                            self.trader.manage_positions(symbol)
+                    # Sync each rates series and terminal snapshot at most once this cycle
+                    self.trader.begin_cycle()
+
+                    # Analyze triggered symbols, then execute resulting trades one at a time
+                    for plan in self.analyze_symbols(symbols):
+                        try:
+                            self.trader.execute_trade(**plan)
 
                         except Exception as e:
                             self.logger.error(f"""
@@ -137,21 +168,26 @@ Login: {self.login}
 SYMBOL PROCESSING ERROR
 Time: {self.current_time} UTC
 Login: {self.login}
-Symbol: {symbol}
+Symbol: {plan['symbol']}
 Error: {str(e)}
 Traceback: {traceback.format_exc()}
 {'='*50}
                             """)
 
-                    # Update statistics
-                    self.stats.calculate_daily_stats()
+                    # Update trailing stops and breakeven on their own cadence
+                    if self.scheduler.due('positions', TradingConfig.POSITION_CHECK_INTERVAL):
+                        self.trader.manage_positions()
 
-                    # Optimize parameters if needed
-                    trading_history = self.trader.get_trading_history()
-                    self.trader.optimize_parameters(trading_history)
+                    if self.scheduler.due('housekeeping', TradingConfig.HOUSEKEEPING_INTERVAL):
+                        # Update statistics
+                        self.stats.calculate_daily_stats()
 
-                    # Sleep for next iteration
-                    time.sleep(TradingConfig.RECONNECT_WAIT_TIME)
+                        # Optimize parameters if needed
+                        trading_history = self.trader.get_trading_history()
+                        self.trader.optimize_parameters(trading_history)
+
+                    self.trader.instrumentation.record('cycle', time.perf_counter() - cycle_start)
+                    self.trader.instrumentation.maybe_log_summary(self.logger)
 
                 except Exception as e:
                     self.logger.error(f"""
@@ -178,15 +214,105 @@ Traceback: {traceback.format_exc()}
         finally:
             self.cleanup()
 
+    def analyze_symbols(self, symbols):
+        """Analyze symbols sequentially or on the worker pool, returning trade plans"""
+        if self.executor is None:
+            plans = (self.trader.analyze_symbol(symbol) for symbol in symbols)
+            return [plan for plan in plans if plan]
+
+        futures = {}
+        started = {}  # symbol -> time a worker picked it up
+
+        def analyze(symbol):
+            started[symbol] = time.time()
+            return self.trader.analyze_symbol(symbol)
+
+        for symbol in symbols:
+            # Do not queue a symbol again while an earlier analysis is still stuck
+            previous = self.pending.get(symbol)
+            if previous is not None and not previous.done():
+                self.logger.warning(f"Skipping {symbol}: previous analysis still running")
+                continue
+            future = self.executor.submit(analyze, symbol)
+            futures[future] = symbol
+            self.pending[symbol] = future
+
+        if not futures:
+            return []
+
+        # Each symbol gets SYMBOL_TIMEOUT seconds from the moment a worker picks it up.
+        # Queued symbols are dropped once no worker has made progress for as long,
+        # e.g. when every worker is stuck on an earlier analysis.
+        timeout = TradingConfig.SYMBOL_TIMEOUT
+        remaining = set(futures)
+        done = set()
+        progress = time.time()
+        while remaining:
+            finished = {future for future in remaining if future.done()}
+            done |= finished
+            remaining -= finished
+            if not remaining:
+                break
+
+            now = time.time()
+            running = {future: started[futures[future]] for future in remaining if futures[future] in started}
+            queued = remaining - set(running)
+            progress = max([progress] + list(running.values()))
+
+            expired = [future for future, start in running.items() if now - start >= timeout]
+            if queued and now - progress >= timeout:
+                expired.extend(queued)
+            for future in expired:
+                # Cancelling only stops queued analyses, a running one is left to finish
+                future.cancel()
+                remaining.discard(future)
+                self.logger.warning(f"Skipping {futures[future]}: analysis timed out this cycle")
+            if not remaining:
+                break
+
+            deadlines = [start + timeout for future, start in running.items() if future in remaining]
+            if queued - set(expired):
+                deadlines.append(progress + timeout)
+            finished, _ = wait(remaining, timeout=max(min(deadlines) - now, 0), return_when=FIRST_COMPLETED)
+            if finished:
+                progress = time.time()
+
+        # Keep symbol order so execution is deterministic
+        finished = {futures[future]: future for future in done}
+        plans = []
+        for symbol in symbols:
+            if symbol not in finished:
+                continue
+            try:
+                plan = finished[symbol].result()
+                if plan:
+                    plans.append(plan)
+            except Exception as e:
+                self.logger.error(f"Error analyzing {symbol}: {str(e)}")
+        return plans
+
     def cleanup(self):
         """Cleanup resources and close positions if needed"""
         try:
             self.is_running = False
             
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+            
+            self.trader.sentiment_analyzer.stop()
+            self.trader.ml_optimizer.shutdown()
+            self.stats.close()
+            
             if TradingConfig.CLOSE_POSITIONS_ON_STOP:
-                self.trader.close_all_positions()
+                self.trader.position_manager.close_all_positions()
 
-            mt5.shutdown()
+            self.trader.connection.shutdown()
+            
+            # Keep the final stage timings for later inspection
+            if self.trader.instrumentation.enabled:
+                self.trader.instrumentation.dump(
+                    os.path.join('logs', f"timings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+                )
             
             self.logger.info(f"""
 {'='*50}
@@ -8,9 +8,20 @@ from datetime import datetime, timedelta
 import threading
 import json
 import os
+import sys
 import requests
 from scipy import stats
 
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from tb.analysis.patterns import price_action_bias
+from tb.analysis.signals import scalp_scores, trend_score, trend_direction
+from tb.core.scheduler import MarketEventScheduler
+from tb.config.profiles import ProfileStore
+from tb.utils.journal import TradeJournal
+from tb.core.deals import DealIngester
+
 # Setup logging dengan rotasi file
 from logging.handlers import RotatingFileHandler
 
@@ -92,6 +103,7 @@ class TradingConfig:
     ATR_PERIOD = 14  # Tingkatkan periode ATR untuk pengukuran volatilitas yang lebih stabil
     BB_LENGTH = 20
     BB_STD = 2.0
+    PARAMETER_FILE = 'scalp_parameters.json'  # Parameter per simbol, dimuat ulang otomatis saat file berubah
     SR_LENGTH = 15
     ADX_PERIOD = 14
     ADX_THRESHOLD = 15  # Turunkan threshold ADX untuk capture lebih banyak tren
@@ -108,6 +120,13 @@ class TradingConfig:
     RECONNECT_ATTEMPTS = 3
     RECONNECT_WAIT_TIME = 10  # Waktu tunggu dalam detik antar percobaan koneksi
     
+    # Penjadwalan berbasis event
+    TICK_POLL_INTERVAL = 0.25  # Jeda antar pengecekan tick (detik)
+    SIGNAL_MOVE_THRESHOLD = 0.0005  # Pergerakan harga relatif yang memicu evaluasi ulang
+    SIGNAL_MAX_IDLE = 60  # Evaluasi ulang simbol yang sepi setidaknya setiap N detik
+    POSITION_CHECK_INTERVAL = 1.0  # Jeda antar manajemen posisi (detik)
+    STATISTICS_INTERVAL = 10  # Jeda antar update statistik (detik)
+    
     # Fitur Tambahan
     ENABLE_TELEGRAM_NOTIFICATIONS = False  # Set True untuk mengaktifkan notifikasi
     SIMULATE_ONLY = False  # Set True untuk mode simulasi (tidak eksekusi trade riil)
@@ -125,20 +144,15 @@ class TelegramConfig:
     
 class Stats:
     """Kelas untuk melacak statistik dan kinerja trading"""
-    def __init__(self, stats_file='trading_stats_acc5$new.json'):
+    def __init__(self, stats_file='trading_stats_acc5$new.json', compact_every=500):
         self.stats_file = stats_file
-        self.stats = self.load_stats()
-        
-    def load_stats(self):
-        """Load statistik dari file"""
-        if os.path.exists(self.stats_file):
-            try:
-                with open(self.stats_file, 'r') as file:
-                    return json.load(file)
-            except Exception as e:
-                logging.error(f"Error loading stats: {str(e)}")
+        # Satu baris jurnal per trade, snapshot penuh hanya saat kompaksi
+        self.journal = TradeJournal(stats_file, self.apply_trade, self.default_stats,
+                                    compact_every=compact_every, indent=4)
+        self.stats = self.journal.state
         
-        # Default stats jika file tidak ada atau error
+    def default_stats(self):
+        """Statistik awal jika belum ada snapshot"""
         return {
             'total_trades': 0,
             'winning_trades': 0,
@@ -156,80 +170,99 @@ class Stats:
         }
     
     def save_stats(self):
-        """Simpan statistik ke file"""
+        """Simpan snapshot statistik ke file"""
+        self.journal.compact()
+    
+    def close(self):
+        """Tulis snapshot terakhir dan tutup jurnal"""
+        self.journal.close()
+    
+    def update_after_trade(self, symbol, profit, trade_type, deal=None):
+        """Update statistik setelah trade selesai"""
+        balance = None
         try:
-            with open(self.stats_file, 'w') as file:
-                json.dump(self.stats, file, indent=4)
+            account_info = mt5.account_info()
+            if account_info:
+                balance = account_info.balance
         except Exception as e:
-            logging.error(f"Error saving stats: {str(e)}")
+            logging.error(f"Error updating drawdown stats: {str(e)}")
+        
+        self.journal.append({
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'symbol': symbol,
+            'profit': profit,
+            'type': trade_type,
+            'balance': balance,
+            'ticket': deal.ticket if deal is not None else None,
+            'deal_time': deal.time if deal is not None else None
+        })
     
-    def update_after_trade(self, symbol, profit, trade_type):
-        """Update statistik setelah trade selesai"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        month = datetime.now().strftime('%Y-%m')
+    def apply_trade(self, stats, record):
+        """Terapkan satu record jurnal ke statistik (juga saat replay)"""
+        symbol = record['symbol']
+        profit = record['profit']
+        today = record['time'][:10]
+        month = record['time'][:7]
         
         # Update total trades
-        self.stats['total_trades'] += 1
+        stats['total_trades'] += 1
         
         # Update trades by result
         if profit > 0:
-            self.stats['winning_trades'] += 1
-            self.stats['profit_sum'] += profit
+            stats['winning_trades'] += 1
+            stats['profit_sum'] += profit
         else:
-            self.stats['losing_trades'] += 1
-            self.stats['loss_sum'] += abs(profit)
+            stats['losing_trades'] += 1
+            stats['loss_sum'] += abs(profit)
         
         # Update trades by symbol
-        if symbol not in self.stats['trades_by_symbol']:
-            self.stats['trades_by_symbol'][symbol] = {'total': 0, 'win': 0, 'loss': 0, 'profit': 0.0}
+        if symbol not in stats['trades_by_symbol']:
+            stats['trades_by_symbol'][symbol] = {'total': 0, 'win': 0, 'loss': 0, 'profit': 0.0}
         
-        self.stats['trades_by_symbol'][symbol]['total'] += 1
+        stats['trades_by_symbol'][symbol]['total'] += 1
         if profit > 0:
-            self.stats['trades_by_symbol'][symbol]['win'] += 1
+            stats['trades_by_symbol'][symbol]['win'] += 1
         else:
-            self.stats['trades_by_symbol'][symbol]['loss'] += 1
-        self.stats['trades_by_symbol'][symbol]['profit'] += profit
+            stats['trades_by_symbol'][symbol]['loss'] += 1
+        stats['trades_by_symbol'][symbol]['profit'] += profit
         
         # Update daily results
-        if today not in self.stats['daily_results']:
-            self.stats['daily_results'][today] = {'trades': 0, 'profit': 0.0}
+        if today not in stats['daily_results']:
+            stats['daily_results'][today] = {'trades': 0, 'profit': 0.0}
         
-        self.stats['daily_results'][today]['trades'] += 1
-        self.stats['daily_results'][today]['profit'] += profit
+        stats['daily_results'][today]['trades'] += 1
+        stats['daily_results'][today]['profit'] += profit
         
         # Update monthly results
-        if month not in self.stats['monthly_results']:
-            self.stats['monthly_results'][month] = {'trades': 0, 'profit': 0.0}
+        if month not in stats['monthly_results']:
+            stats['monthly_results'][month] = {'trades': 0, 'profit': 0.0}
         
-        self.stats['monthly_results'][month]['trades'] += 1
-        self.stats['monthly_results'][month]['profit'] += profit
+        stats['monthly_results'][month]['trades'] += 1
+        stats['monthly_results'][month]['profit'] += profit
         
-        # Update drawdown metrics
-        try:
-            account_info = mt5.account_info()
-            if account_info:
-                current_balance = account_info.balance
-                
-                # Update peak balance
-                if current_balance > self.stats['peak_balance']:
-                    self.stats['peak_balance'] = current_balance
+        # Update drawdown metrics dari balance saat trade ditutup
+        current_balance = record.get('balance')
+        if current_balance:
+            # Update peak balance
+            if current_balance > stats['peak_balance']:
+                stats['peak_balance'] = current_balance
+            
+            # Calculate current drawdown
+            if stats['peak_balance'] > 0:
+                current_dd = (stats['peak_balance'] - current_balance) / stats['peak_balance'] * 100
+                stats['current_drawdown'] = current_dd
                 
-                # Calculate current drawdown
-                if self.stats['peak_balance'] > 0:
-                    current_dd = (self.stats['peak_balance'] - current_balance) / self.stats['peak_balance'] * 100
-                    self.stats['current_drawdown'] = current_dd
-                    
-                    # Update max drawdown if needed
-                    if current_dd > self.stats['max_drawdown']:
-                        self.stats['max_drawdown'] = current_dd
-        except Exception as e:
-            logging.error(f"Error updating drawdown stats: {str(e)}")
+                # Update max drawdown if needed
+                if current_dd > stats['max_drawdown']:
+                    stats['max_drawdown'] = current_dd
         
-        # Update timestamp
-        self.stats['last_update'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # High-water mark deal agar restart tidak menghitung ulang
+        if record.get('ticket') is not None:
+            stats['last_deal_ticket'] = max(stats.get('last_deal_ticket', 0), record['ticket'])
+            stats['last_deal_time'] = max(stats.get('last_deal_time') or 0, record['deal_time'])
         
-        # Save to file
-        self.save_stats()
+        # Update timestamp
+        stats['last_update'] = record['time']
     
     def get_win_rate(self):
         """Hitung win rate secara keseluruhan"""
@@ -261,9 +294,18 @@ class MT5Trader:
     def __init__(self):
         self.connected = False
         self.stats = Stats()
+        # Deal baru saja sejak deal terakhir yang tercatat di statistik
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.deal_ingester = DealIngester(
+            magic=12345,
+            lookback_days=1,
+            start_time=self.stats.stats.get('last_deal_time') or int(today.timestamp()),
+            start_ticket=self.stats.stats.get('last_deal_ticket', 0)
+        )
         self.last_signals = {}  # Simpan sinyal terakhir
         self.average_spreads = {}  # Simpan spread rata-rata
         self.indicators_cache = {}  # Cache untuk data indikator
+        self.profiles = ProfileStore(TradingConfig, TradingConfig.PARAMETER_FILE)  # Parameter per simbol
         self.connection_attempts = 0
         self.exit_flag = False  # Flag untuk stop bot
         self.trade_lock = threading.Lock()  # Lock untuk operasi trading (thread safety)
@@ -530,7 +572,7 @@ class MT5Trader:
                 if rates is None or len(rates) == 0:
                     return False
                 df = pd.DataFrame(rates)
-                current_atr = ta.atr(df['high'], df['low'], df['close'], length=TradingConfig.ATR_PERIOD).iloc[-1]
+                current_atr = ta.atr(df['high'], df['low'], df['close'], length=self.profiles.get(symbol).ATR_PERIOD).iloc[-1]
                 self.market_data['atr_values'][symbol] = current_atr
             
             # Get historical ATR for comparison
@@ -538,7 +580,7 @@ class MT5Trader:
             if rates is None or len(rates) == 0:
                 return False
             df = pd.DataFrame(rates)
-            atr = ta.atr(df['high'], df['low'], df['close'], length=TradingConfig.ATR_PERIOD)
+            atr = ta.atr(df['high'], df['low'], df['close'], length=self.profiles.get(symbol).ATR_PERIOD)
             avg_atr = atr.mean()
             atr_ratio = current_atr / avg_atr if avg_atr > 0 else 1
             
@@ -633,9 +675,10 @@ class MT5Trader:
                 return None
             
             df = pd.DataFrame(rates)
-            df['ema_fast'] = df['close'].ewm(span=TradingConfig.EMA_FAST, adjust=False).mean()
-            df['ema_slow'] = df['close'].ewm(span=TradingConfig.EMA_SLOW, adjust=False).mean()
-            df['ema_long'] = df['close'].ewm(span=TradingConfig.EMA_LONG, adjust=False).mean()
+            profile = self.profiles.get(symbol)
+            df['ema_fast'] = df['close'].ewm(span=profile.EMA_FAST, adjust=False).mean()
+            df['ema_slow'] = df['close'].ewm(span=profile.EMA_SLOW, adjust=False).mean()
+            df['ema_long'] = df['close'].ewm(span=profile.EMA_LONG, adjust=False).mean()
             
             # Check price in relation to EMAs
             last_close = df['close'].iloc[-1]
@@ -643,30 +686,11 @@ class MT5Trader:
             ema_slow = df['ema_slow'].iloc[-1]
             ema_long = df['ema_long'].iloc[-1]
             
-            # Tentukan trend strength score
-            trend_score = 0
-            
-            # Pengecekan EMA crossovers
-            if ema_fast > ema_slow:
-                trend_score += 1
-            if ema_slow > ema_long:
-                trend_score += 1
-                
-            # Pengecekan price vs EMAs
-            if last_close > ema_fast:
-                trend_score += 1
-            if last_close > ema_slow:
-                trend_score += 1
-            if last_close > ema_long:
-                trend_score += 1
+            # Tentukan trend strength score dari EMA crossovers dan price vs EMAs
+            score = int(trend_score(last_close, ema_fast, ema_slow, ema_long))
                 
             # Tentukan trend direction berdasarkan score
-            if trend_score >= 3:
-                trend = 'UP'
-            elif trend_score <= 1:
-                trend = 'DOWN'
-            else:
-                trend = 'SIDEWAYS'
+            trend = {1: 'UP', -1: 'DOWN'}.get(int(trend_direction(score)), 'SIDEWAYS')
                 
             # Simpan ke cache
             self.indicators_cache[cache_key] = {
@@ -674,7 +698,7 @@ class MT5Trader:
                 'timestamp': datetime.now()
             }
             
-            logging.info(f"{symbol} Higher Timeframe Trend: {trend} (Score: {trend_score}/5)")
+            logging.info(f"{symbol} Higher Timeframe Trend: {trend} (Score: {score}/5)")
             return trend
         except Exception as e:
             logging.error(f"Error checking higher timeframe trend: {str(e)}")
@@ -708,53 +732,14 @@ class MT5Trader:
     def check_price_action(self, df):
         """Analyze price action for reversal patterns"""
         try:
-            # Calculate basic candlestick properties
-            df['body'] = abs(df['close'] - df['open'])
-            df['upper_wick'] = df.apply(lambda x: max(x['high'] - x['close'], x['high'] - x['open']), axis=1)
-            df['lower_wick'] = df.apply(lambda x: max(x['open'] - x['low'], x['close'] - x['low']), axis=1)
-
-            # Calculate average body size
-            avg_body = df['body'].mean()
-
-            # Get the last 3 candles
-            last_candles = df.iloc[-3:].copy()
-
-            # Check for bullish patterns
-            bullish_engulfing = (
-                last_candles['close'].iloc[-1] > last_candles['open'].iloc[-1] and  # Current candle bullish
-                last_candles['open'].iloc[-2] > last_candles['close'].iloc[-2] and  # Previous candle bearish
-                last_candles['open'].iloc[-1] < last_candles['close'].iloc[-2] and  # Current open below previous close
-                last_candles['close'].iloc[-1] > last_candles['open'].iloc[-2]  # Current close above previous open
+            # Engulfing, hammer and shooting star on the latest candle (vectorized)
+            return price_action_bias(
+                df['open'].to_numpy(),
+                df['high'].to_numpy(),
+                df['low'].to_numpy(),
+                df['close'].to_numpy()
             )
 
-            bullish_hammer = (
-                last_candles['body'].iloc[-1] < avg_body * 0.5 and  # Small body
-                last_candles['lower_wick'].iloc[-1] > last_candles['body'].iloc[-1] * 2 and  # Long lower wick
-                last_candles['upper_wick'].iloc[-1] < last_candles['body'].iloc[-1] * 0.5  # Small upper wick
-            )
-
-            # Check for bearish patterns
-            bearish_engulfing = (
-                last_candles['close'].iloc[-1] < last_candles['open'].iloc[-1] and  # Current candle bearish
-                last_candles['open'].iloc[-2] < last_candles['close'].iloc[-2] and  # Previous candle bullish
-                last_candles['open'].iloc[-1] > last_candles['close'].iloc[-2] and  # Current open above previous close
-                last_candles['close'].iloc[-1] < last_candles['open'].iloc[-2]  # Current close below previous open
-            )
-
-            bearish_shooting_star = (
-                last_candles['body'].iloc[-1] < avg_body * 0.5 and  # Small body
-                last_candles['upper_wick'].iloc[-1] > last_candles['body'].iloc[-1] * 2 and  # Long upper wick
-                last_candles['lower_wick'].iloc[-1] < last_candles['body'].iloc[-1] * 0.5  # Small lower wick
-            )
-
-            # Determine patterns
-            if bullish_engulfing or bullish_hammer:
-                return 'BULLISH'
-            elif bearish_engulfing or bearish_shooting_star:
-                return 'BEARISH'
-            else:
-                return 'NEUTRAL'
-
         except Exception as e:
             logging.error(f"Error analyzing price action: {str(e)}")
             return 'NEUTRAL'
@@ -776,13 +761,14 @@ class MT5Trader:
             df = pd.DataFrame(rates)
             df['time'] = pd.to_datetime(df['time'], unit='s')
 
-            # Calculate key indicators
-            df['ema_fast'] = df['close'].ewm(span=TradingConfig.EMA_FAST, adjust=False).mean()
-            df['ema_slow'] = df['close'].ewm(span=TradingConfig.EMA_SLOW, adjust=False).mean()
-            df['ema_long'] = df['close'].ewm(span=TradingConfig.EMA_LONG, adjust=False).mean()
-            df['rsi'] = ta.rsi(df['close'], length=TradingConfig.RSI_PERIOD)
-            df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=TradingConfig.ATR_PERIOD)
-            bollinger = ta.bbands(df['close'], length=TradingConfig.BB_LENGTH, std=TradingConfig.BB_STD)
+            # Calculate key indicators with the symbol's parameters
+            profile = self.profiles.get(symbol)
+            df['ema_fast'] = df['close'].ewm(span=profile.EMA_FAST, adjust=False).mean()
+            df['ema_slow'] = df['close'].ewm(span=profile.EMA_SLOW, adjust=False).mean()
+            df['ema_long'] = df['close'].ewm(span=profile.EMA_LONG, adjust=False).mean()
+            df['rsi'] = ta.rsi(df['close'], length=profile.RSI_PERIOD)
+            df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=profile.ATR_PERIOD)
+            bollinger = ta.bbands(df['close'], length=profile.BB_PERIOD, std=profile.BB_STD)
             df = pd.concat([df, bollinger], axis=1)
 
             # Support and resistance levels
@@ -800,57 +786,22 @@ class MT5Trader:
             # Current close price
             current_close = df['close'].iloc[-1]
 
-            # Build signal score
-            buy_score = 0
-            sell_score = 0
+            # Build signal score (shared with the backtester)
             max_score = 7  # Total number of conditions
-
-            # 1. EMA alignment
-            if df['ema_fast'].iloc[-1] > df['ema_slow'].iloc[-1] > df['ema_long'].iloc[-1]:
-                buy_score += 1
-            elif df['ema_fast'].iloc[-1] < df['ema_slow'].iloc[-1] < df['ema_long'].iloc[-1]:
-                sell_score += 1
-
-            # 2. Price vs EMAs
-            if current_close > df['ema_fast'].iloc[-1] and current_close > df['ema_slow'].iloc[-1]:
-                buy_score += 1
-            elif current_close < df['ema_fast'].iloc[-1] and current_close < df['ema_slow'].iloc[-1]:
-                sell_score += 1
-
-            # 3. RSI conditions
-            current_rsi = df['rsi'].iloc[-1]
-            prev_rsi = df['rsi'].iloc[-2]
-            if TradingConfig.RSI_OVERSOLD_MIN <= current_rsi <= TradingConfig.RSI_OVERSOLD_MAX and prev_rsi < current_rsi:  # RSI oversold dalam rentang dan naik
-                buy_score += 1
-            elif TradingConfig.RSI_OVERBOUGHT_MIN <= current_rsi <= TradingConfig.RSI_OVERBOUGHT_MAX and prev_rsi > current_rsi:  # RSI overbought dalam rentang dan turun
-                sell_score += 1
-
-            # 4. Bollinger Bands
-            bb_upper = df['BBU_20_2.0'].iloc[-1]
-            bb_lower = df['BBL_20_2.0'].iloc[-1]
-            if current_close < bb_lower:  # Price below lower band (potential buy)
-                buy_score += 1
-            elif current_close > bb_upper:  # Price above upper band (potential sell)
-                sell_score += 1
-
-            # 5. Price Action
-            if price_action == 'BULLISH':
-                buy_score += 1
-            elif price_action == 'BEARISH':
-                sell_score += 1
-
-            # 6. Higher Timeframe Trend
-            if higher_tf_trend == 'UP':
-                buy_score += 1
-            elif higher_tf_trend == 'DOWN':
-                sell_score += 1
-
-            # 7. Support/Resistance
-            if sr_levels:
-                if current_close < sr_levels['support']:  # Near support level
-                    buy_score += 1
-                elif current_close > sr_levels['resistance']:  # Near resistance level
-                    sell_score += 1
+            buy_score, sell_score = scalp_scores({
+                'close': current_close,
+                'ema_fast': df['ema_fast'].iloc[-1],
+                'ema_slow': df['ema_slow'].iloc[-1],
+                'ema_long': df['ema_long'].iloc[-1],
+                'rsi': df['rsi'].iloc[-1],
+                'prev_rsi': df['rsi'].iloc[-2],
+                'bb_upper': df[profile.BB_UPPER_COLUMN].iloc[-1],
+                'bb_lower': df[profile.BB_LOWER_COLUMN].iloc[-1],
+                'price_action': {'BULLISH': 1, 'BEARISH': -1}.get(price_action, 0),
+                'higher_tf_trend': {'UP': 1, 'DOWN': -1}.get(higher_tf_trend, 0),
+                'support': sr_levels['support'] if sr_levels else np.nan,
+                'resistance': sr_levels['resistance'] if sr_levels else np.nan,
+            }, profile)
 
             # Calculate final signal strength as a percentage
             buy_strength = (buy_score / max_score) * 100
@@ -866,10 +817,10 @@ class MT5Trader:
             # Generate final signal
             if buy_strength >= min_strength and buy_strength > sell_strength:
                 signal = 'BUY'
-                sl_price = mt5.symbol_info_tick(symbol).bid - (df['atr'].iloc[-1] * TradingConfig.SL_ATR_MULTIPLIER)
+                sl_price = mt5.symbol_info_tick(symbol).bid - (df['atr'].iloc[-1] * profile.SL_ATR_MULTIPLIER)
             elif sell_strength >= min_strength and sell_strength > buy_strength:
                 signal = 'SELL'
-                sl_price = mt5.symbol_info_tick(symbol).ask + (df['atr'].iloc[-1] * TradingConfig.SL_ATR_MULTIPLIER)
+                sl_price = mt5.symbol_info_tick(symbol).ask + (df['atr'].iloc[-1] * profile.SL_ATR_MULTIPLIER)
             else:
                 signal = None
                 sl_price = None
@@ -901,12 +852,13 @@ class MT5Trader:
                     return None
 
                 # Calculate TP based on RR ratio
+                tp_sl_ratio = self.profiles.get(symbol).TP_SL_RATIO
                 if trade_type == 'BUY':
                     entry_price = tick.ask
-                    tp_price = entry_price + ((entry_price - sl_price) * TradingConfig.TP_ATR_MULTIPLIER / TradingConfig.SL_ATR_MULTIPLIER)
+                    tp_price = entry_price + (entry_price - sl_price) * tp_sl_ratio
                 else:  # SELL
                     entry_price = tick.bid
-                    tp_price = entry_price - ((sl_price - entry_price) * TradingConfig.TP_ATR_MULTIPLIER / TradingConfig.SL_ATR_MULTIPLIER)
+                    tp_price = entry_price - (sl_price - entry_price) * tp_sl_ratio
 
                 # Create a trade request
                 request = {
@@ -1038,8 +990,9 @@ class MT5Trader:
 
                 if atr_value > 0:
                     # Calculate breakeven and trailing stop thresholds in pips
-                    breakeven_pips = atr_value * TradingConfig.BREAKEVEN_ACTIVATION / symbol_info.point
-                    trailing_pips = atr_value * TradingConfig.TRAILING_STOP_ACTIVATION / symbol_info.point
+                    profile = self.profiles.get(symbol)
+                    breakeven_pips = atr_value * profile.BREAKEVEN_ACTIVATION / symbol_info.point
+                    trailing_pips = atr_value * profile.TRAILING_STOP_ACTIVATION / symbol_info.point
 
                     # Modify SL
                     should_modify = False
@@ -1057,12 +1010,12 @@ class MT5Trader:
                     if profit_pips >= trailing_pips:
                         # Calculate trailing stop level
                         if position_type == 'BUY':
-                            trail_level = current_price - (atr_value * TradingConfig.SL_ATR_MULTIPLIER)
+                            trail_level = current_price - (atr_value * profile.SL_ATR_MULTIPLIER)
                             if trail_level > new_sl:
                                 new_sl = trail_level
                                 should_modify = True
                         else:  # SELL
-                            trail_level = current_price + (atr_value * TradingConfig.SL_ATR_MULTIPLIER)
+                            trail_level = current_price + (atr_value * profile.SL_ATR_MULTIPLIER)
                             if trail_level < new_sl or new_sl == 0:
                                 new_sl = trail_level
                                 should_modify = True
@@ -1095,18 +1048,8 @@ class MT5Trader:
     def update_statistics(self):
         """Update trading statistics from closed positions"""
         try:
-            # Get account history for today
-            from_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            to_date = from_date + timedelta(days=1)
-
-            from_stamp = int(from_date.timestamp())
-            to_stamp = int(to_date.timestamp())
-
-            # Get history deals
-            deals = mt5.history_deals_get(from_stamp, to_stamp)
-
-            if deals is None:
-                return
+            # Only deals not processed yet, each one exactly once
+            deals = self.deal_ingester.poll()
 
             # Process closed positions
             for deal in deals:
@@ -1114,17 +1057,13 @@ class MT5Trader:
                 if deal.entry != mt5.DEAL_ENTRY_OUT:
                     continue
 
-                # Skip deals not from our bot
-                if deal.magic != 12345:
-                    continue
-
                 # Calculate profit in account currency
                 symbol = deal.symbol
                 profit = deal.profit
 
                 # Update stats
                 trade_type = 'BUY' if deal.type == mt5.DEAL_TYPE_BUY else 'SELL'
-                self.stats.update_after_trade(symbol, profit, trade_type)
+                self.stats.update_after_trade(symbol, profit, trade_type, deal)
 
         except Exception as e:
             logging.error(f"Error updating statistics: {str(e)}")
@@ -1201,7 +1140,18 @@ class MT5Trader:
             self.update_statistics()
 
             # Check for new trading opportunities
-            for symbol in MT5Config.SYMBOLS:
+            self.evaluate_symbols(MT5Config.SYMBOLS)
+
+        except Exception as e:
+            logging.error(f"Error in trading cycle: {str(e)}")
+
+    def evaluate_symbols(self, symbols):
+        """Check signals and open trades for the given symbols"""
+        try:
+            # Pick up edited parameter files without a restart
+            self.profiles.maybe_reload()
+
+            for symbol in symbols:
                 # Check if trading is allowed for this symbol
                 if not self.check_trade_allowed(symbol):
                     continue
@@ -1228,7 +1178,7 @@ class MT5Trader:
                             self.open_trade(symbol, signal, lot_size, sl_price)
 
         except Exception as e:
-            logging.error(f"Error in trading cycle: {str(e)}")
+            logging.error(f"Error evaluating symbols: {str(e)}")
 
     def run(self):
         """Main trading bot loop"""
@@ -1249,21 +1199,44 @@ class MT5Trader:
                 self.stats.stats['peak_balance'] = account_info.balance
                 self.stats.save_stats()
 
+            # Evaluasi sinyal hanya saat bar baru atau harga bergerak signifikan
+            scheduler = MarketEventScheduler(
+                timeframe=MT5Config.TIMEFRAME_MAIN,
+                move_threshold=TradingConfig.SIGNAL_MOVE_THRESHOLD,
+                poll_interval=TradingConfig.TICK_POLL_INTERVAL,
+                max_idle=TradingConfig.SIGNAL_MAX_IDLE
+            )
+
             # Main loop
             while not self.exit_flag:
                 try:
-                    self.run_trading_cycle()
+                    if not self.check_connection():
+                        time.sleep(TradingConfig.POSITION_CHECK_INTERVAL)
+                        continue
+
+                    symbols = scheduler.wait_for_events(
+                        MT5Config.SYMBOLS,
+                        timeout=TradingConfig.POSITION_CHECK_INTERVAL
+                    )
+
+                    # Manage existing positions on a faster cadence
+                    if scheduler.due('positions', TradingConfig.POSITION_CHECK_INTERVAL):
+                        self.manage_open_positions()
+
+                    if scheduler.due('statistics', TradingConfig.STATISTICS_INTERVAL):
+                        self.update_statistics()
+
+                    if symbols:
+                        self.evaluate_symbols(symbols)
                 except Exception as e:
                     logging.error(f"Error in trading cycle: {str(e)}")
 
-                # Sleep between cycles
-                time.sleep(5)
-
         except KeyboardInterrupt:
             logging.info("Bot stopped by user")
         except Exception as e:
             logging.error(f"Unexpected error: {str(e)}")
         finally:
+            self.stats.close()
             self.disconnect()
             logging.info("Trading bot stopped")
 
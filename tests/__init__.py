@@ -5,6 +5,10 @@ Contains unit tests and integration tests for all components.
 
 import logging
 from datetime import datetime
+from ..utils import fake_mt5
+
+# Use the fake terminal where the MetaTrader5 package is not installed
+fake_mt5.install()
 
 # Setup test configuration
 TEST_CONFIG = {
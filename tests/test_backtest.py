@@ -0,0 +1,172 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import CancelledError
+import numpy as np
+import pandas as pd
+import MetaTrader5 as mt5
+from ..backtest.data import HistoricalSource, dataframe_to_rates, resample_rates, RATES_DTYPE
+from ..backtest.engine import BacktestEngine
+from ..backtest.walk_forward import SymbolEvaluator, WalkForwardOptimizer, parameter_combinations, write_parameters
+from ..config.trading_config import TradingConfig
+from ..core.bar_store import BarStore
+from ..analysis.indicators import IndicatorEngine
+from ..analysis.technical import TechnicalAnalyzer
+
+class TestBacktest(unittest.TestCase):
+    def setUp(self):
+        """Build a synthetic M1 random walk"""
+        rng = np.random.default_rng(7)
+        count = 400
+        close = 1.1 * np.exp(np.cumsum(rng.normal(0, 5e-4, count)))
+        open_ = np.r_[close[0], close[:-1]]
+
+        self.rates = np.zeros(count, dtype=RATES_DTYPE)
+        self.rates['time'] = 1_700_000_000 - 1_700_000_000 % 300 + np.arange(count) * 60
+        self.rates['open'] = open_
+        self.rates['high'] = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 2e-4, count)))
+        self.rates['low'] = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 2e-4, count)))
+        self.rates['close'] = close
+        self.rates['spread'] = 10
+
+        self.engine = BacktestEngine(strategy='technical', timeframe=mt5.TIMEFRAME_M1)
+        self.results = self.engine.run({'EURUSD': self.rates})
+
+    def test_signals_match_live_analyzer(self):
+        """Test vectorized signals equal TechnicalAnalyzer driven bar by bar"""
+        direction, _, sl, _ = self.engine.technical_signals(self.rates)
+
+        source = HistoricalSource({'EURUSD': self.rates}, timeframe=mt5.TIMEFRAME_M1)
+        bar_store = BarStore(source=source)
+        analyzer = TechnicalAnalyzer(bar_store=bar_store,
+                                     indicator_engine=IndicatorEngine(bar_store, mt5.TIMEFRAME_M1))
+
+        for i in range(len(self.rates) - 60, len(self.rates)):
+            source.set_time(self.rates['time'][i])
+            bar_store.begin_cycle()
+            values = analyzer.indicator_engine.get_values('EURUSD')
+            signal, sl_price, _ = analyzer.analyze_signals(values, 'EURUSD')
+
+            expected = {1: 'BUY', -1: 'SELL'}.get(int(direction[i]))
+            self.assertEqual(signal, expected, msg=f"bar {i}")
+            if signal:
+                self.assertAlmostEqual(sl_price, sl[i], places=9)
+
+    def test_exit_resolution(self):
+        """Test target, trailing stop and end-of-data exits on hand-built bars"""
+        rates = np.zeros(4, dtype=RATES_DTYPE)
+        rates['open'] = [1.000, 1.000, 1.004, 1.003]
+        rates['high'] = [1.001, 1.005, 1.005, 1.003]
+        rates['low'] = [0.999, 0.999, 1.003, 0.999]
+        rates['close'] = [1.000, 1.004, 1.004, 1.000]
+        spread = np.zeros(4)
+        atr = np.full(4, 0.002)
+
+        # Target inside the second bar
+        bar, price, reason = self.engine.resolve_exit(rates, spread, atr, 0, 1, 1.0, 0.99, 1.005)
+        self.assertEqual((bar, price, reason), (1, 1.005, 'tp'))
+
+        # Close of bar 1 trails the stop to 1.002 (1 ATR behind), hit in bar 3
+        bar, price, reason = self.engine.resolve_exit(rates, spread, atr, 0, 1, 1.0, 0.99, 1.05)
+        self.assertEqual((bar, reason), (3, 'sl'))
+        self.assertAlmostEqual(price, 1.002)
+
+        # Trades still open at the end close on the last bar
+        bar, price, reason = self.engine.resolve_exit(rates[:1], spread, atr, 0, -1, 1.0, 1.05, 0.9)
+        self.assertEqual((bar, price, reason), (0, 1.0, 'end'))
+
+    def test_results_use_trading_stats(self):
+        """Test deals are aggregated with the TradingStats metrics"""
+        deals = self.results['deals']
+        stats = self.results['stats']
+        self.assertEqual(stats['total_trades'], len(deals))
+        self.assertAlmostEqual(stats['profit'] - stats['loss'], sum(deal.profit for deal in deals))
+        for earlier, later in zip(deals, deals[1:]):
+            self.assertLessEqual(earlier.time, later.time)
+
+    def test_history_loading(self):
+        """Test DataFrame conversion and resampling"""
+        df = pd.DataFrame({
+            'Time': ['2024-01-01 00:01', '2024-01-01 00:00', '2024-01-01 00:05'],
+            'Open': [2.0, 1.0, 3.0], 'High': [2.5, 1.5, 3.5],
+            'Low': [1.5, 0.5, 2.5], 'Close': [2.2, 1.2, 3.2]
+        })
+        rates = dataframe_to_rates(df)
+        np.testing.assert_array_equal(np.diff(rates['time']), [60, 240])
+
+        m5 = resample_rates(rates, 300)
+        self.assertEqual(len(m5), 2)
+        self.assertEqual((m5['open'][0], m5['high'][0], m5['low'][0], m5['close'][0]), (1.0, 2.5, 0.5, 2.2))
+
+class TestWalkForward(unittest.TestCase):
+    def setUp(self):
+        """A longer synthetic M5 history and a small grid"""
+        rng = np.random.default_rng(11)
+        count = 3000
+        close = 1.1 * np.exp(np.cumsum(rng.normal(0, 8e-4, count)))
+        open_ = np.r_[close[0], close[:-1]]
+
+        self.rates = np.zeros(count, dtype=RATES_DTYPE)
+        self.rates['time'] = 1_700_000_000 - 1_700_000_000 % 300 + np.arange(count) * 300
+        self.rates['open'] = open_
+        self.rates['high'] = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 3e-4, count)))
+        self.rates['low'] = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 3e-4, count)))
+        self.rates['close'] = close
+        self.rates['spread'] = 10
+
+        self.grid = {'EMA_FAST': [8], 'EMA_SLOW': [14, 21], 'EMA_LONG': [200], 'RSI_PERIOD': [14],
+                     'BB_PERIOD': [20], 'BB_STD': [2.0], 'SL_ATR_MULTIPLIER': [1.0, 2.0],
+                     'TP_ATR_MULTIPLIER': [2.0]}
+
+    def test_default_parameters_match_engine(self):
+        """Evaluating the configured parameters reproduces the engine's trades"""
+        params = {name: getattr(TradingConfig, name) for name in self.grid}
+        evaluator = SymbolEvaluator('EURUSD', self.rates, self.rates['time'][:1])
+        totals = evaluator.evaluate(params).sum(axis=0)
+
+        engine = BacktestEngine(strategy='technical', timeframe=mt5.TIMEFRAME_M5)
+        deals = engine.run({'EURUSD': self.rates})['deals']
+        self.assertEqual(int(totals[0]), len(deals))
+        self.assertAlmostEqual(totals[1], sum(deal.profit for deal in deals))
+
+    def test_selection(self):
+        """Every combination is evaluated per fold and a winner is chosen from the grid"""
+        optimizer = WalkForwardOptimizer(grid=self.grid, folds=4, train_folds=2, min_trades=1, n_jobs=1)
+        totals = optimizer.evaluate({'EURUSD': self.rates})['EURUSD']
+        self.assertEqual(totals.shape, (4, 4, 5))
+
+        result = optimizer.run({'EURUSD': self.rates})['EURUSD']
+        self.assertIn(result['parameters'], parameter_combinations(self.grid))
+        self.assertLessEqual(len(result['folds']), 2)
+
+    def test_stop(self):
+        """A stopped search raises CancelledError instead of evaluating the grid"""
+        for n_jobs in (1, 2):
+            optimizer = WalkForwardOptimizer(grid=self.grid, folds=4, train_folds=2, min_trades=1, n_jobs=n_jobs)
+            optimizer.stop()
+            with self.assertRaises(CancelledError):
+                optimizer.run({'EURUSD': self.rates})
+            self.assertIsNone(optimizer.executor)
+
+    def test_parameter_file_merge(self):
+        """Winners of symbols outside a search survive it and empty reports are not written"""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'parameters.json')
+            self.assertTrue(write_parameters(path, {'generated': 1, 'symbols': {'EURUSD': {'parameters': {'BB_STD': 2.0}},
+                                                                                'GBPUSD': {'parameters': {'BB_STD': 2.5}}}}))
+            self.assertFalse(write_parameters(path, {'generated': 2, 'symbols': {}}))
+            self.assertTrue(write_parameters(path, {'generated': 3, 'symbols': {'EURUSD': {'parameters': {'BB_STD': 1.5}}}}))
+
+            with open(path) as file:
+                report = json.load(file)
+            self.assertEqual(report['generated'], 3)
+            self.assertEqual(report['symbols'], {'EURUSD': {'parameters': {'BB_STD': 1.5}},
+                                                 'GBPUSD': {'parameters': {'BB_STD': 2.5}}})
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
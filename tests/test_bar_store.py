@@ -0,0 +1,44 @@
+import unittest
+from ..utils import fake_mt5
+from ..core.bar_store import BarStore
+
+class CountingTerminal(fake_mt5.FakeTerminal):
+    """Counts rates requests"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetches = 0
+
+    def copy_rates_from_pos(self, *args):
+        self.fetches += 1
+        return super().copy_rates_from_pos(*args)
+
+    def copy_rates_from(self, *args):
+        self.fetches += 1
+        return super().copy_rates_from(*args)
+
+class TestBarStore(unittest.TestCase):
+    def setUp(self):
+        self.terminal = CountingTerminal(symbols=['EURUSD'], history_bars=200, future_bars=100)
+        self.terminal.initialize()
+
+    def test_synced_once_per_cycle(self):
+        """A series is fetched once per cycle even after the refresh interval passed"""
+        store = BarStore(source=self.terminal, capacity=100, refresh_interval=0.0)
+        store.begin_cycle()
+        store.get_rates('EURUSD', fake_mt5.TIMEFRAME_M1, 50)
+        store.get_rates('EURUSD', fake_mt5.TIMEFRAME_M1, 50)
+        self.assertEqual(self.terminal.fetches, 1)
+
+        store.begin_cycle()
+        store.get_rates('EURUSD', fake_mt5.TIMEFRAME_M1, 50)
+        self.assertEqual(self.terminal.fetches, 2)
+
+    def test_refresh_without_cycles(self):
+        """Without cycles bars are refreshed every refresh interval"""
+        store = BarStore(source=self.terminal, capacity=100, refresh_interval=0.0)
+        store.get_rates('EURUSD', fake_mt5.TIMEFRAME_M1, 50)
+        store.get_rates('EURUSD', fake_mt5.TIMEFRAME_M1, 50)
+        self.assertEqual(self.terminal.fetches, 2)
+
+if __name__ == '__main__':
+    unittest.main()
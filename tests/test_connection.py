@@ -0,0 +1,43 @@
+import unittest
+from ..utils import fake_mt5
+from ..core.connection import MT5Connection
+
+class CountingTerminal(fake_mt5.FakeTerminal):
+    """Counts shutdown calls"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shutdowns = 0
+
+    def shutdown(self):
+        self.shutdowns += 1
+        return super().shutdown()
+
+class TestMT5Connection(unittest.TestCase):
+    def setUp(self):
+        self.terminal = CountingTerminal(symbols=['EURUSD'], history_bars=10, future_bars=10)
+        self.previous = MT5Connection._instance
+
+    def tearDown(self):
+        MT5Connection._instance = self.previous
+
+    def test_registered_connection_is_shared(self):
+        """Components falling back to get_instance use the trader's logged-in link"""
+        connection = MT5Connection(login=1, source=self.terminal).register()
+        self.assertIs(MT5Connection.get_instance(), connection)
+
+    def test_foreign_link_is_not_shut_down(self):
+        """Connecting never closes a terminal link another object opened"""
+        owner = MT5Connection(login=1, source=self.terminal)
+        self.assertTrue(owner.connect())
+
+        other = MT5Connection(source=self.terminal)
+        self.assertTrue(other.ensure_connected())
+        other.shutdown()
+        self.assertEqual(self.terminal.shutdowns, 0)
+        self.assertTrue(owner.is_healthy(force=True))
+
+        owner.shutdown()
+        self.assertEqual(self.terminal.shutdowns, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import numpy as np
+import pandas as pd
+from types import SimpleNamespace
+import MetaTrader5 as mt5
+from ..analysis.correlation import CorrelationAnalyzer
+from ..analysis.correlation_engine import CorrelationEngine, CorrelationClusters
+from ..backtest.data import RATES_DTYPE
+
+def make_rates(times, closes):
+    rates = np.zeros(len(times), dtype=RATES_DTYPE)
+    rates['time'] = times
+    rates['close'] = closes
+    return rates
+
+class TestCorrelationEngine(unittest.TestCase):
+    def setUp(self):
+        """Three correlated random walks on a common M5 grid"""
+        rng = np.random.default_rng(3)
+        count = 400
+        common = rng.normal(0, 1e-3, count)
+        self.times = 1_700_000_000 + np.arange(count) * 300
+        self.closes = {
+            'EURUSD': 1.1 * np.exp(np.cumsum(common + rng.normal(0, 5e-4, count))),
+            'GBPUSD': 1.3 * np.exp(np.cumsum(common + rng.normal(0, 1e-3, count))),
+            'USDJPY': 150 * np.exp(np.cumsum(-common + rng.normal(0, 2e-3, count))),
+        }
+        self.symbols = list(self.closes)
+
+    def frame(self, start, end):
+        return pd.DataFrame({symbol: closes[start:end] for symbol, closes in self.closes.items()})
+
+    def test_incremental_matches_full_recompute(self):
+        """Test bar-by-bar updates equal DataFrame.corr() over the same window"""
+        engine = CorrelationEngine(self.symbols, window=100)
+        engine.ingest({s: make_rates(self.times[:150], c[:150]) for s, c in self.closes.items()})
+
+        for end in range(151, 400):
+            engine.ingest({s: make_rates(self.times[end - 5:end], c[end - 5:end])
+                           for s, c in self.closes.items()})
+            if end % 50 == 0:
+                expected = self.frame(end - 101, end).pct_change().dropna().corr().to_numpy()
+                np.testing.assert_allclose(engine.matrix(), expected, atol=1e-9)
+
+        self.assertGreater(engine.correlation('EURUSD', 'GBPUSD'), 0.5)
+        self.assertLess(engine.correlation('EURUSD', 'USDJPY'), -0.3)
+
+    def test_exponential_weighting(self):
+        """Test the halflife mode matches pandas' exponentially weighted correlation"""
+        engine = CorrelationEngine(self.symbols, window=100, halflife=20)
+        engine.ingest({s: make_rates(self.times, c) for s, c in self.closes.items()})
+
+        returns = self.frame(0, 400).pct_change().dropna()
+        expected = returns.ewm(halflife=20).corr().loc[returns.index[-1]].to_numpy()
+        np.testing.assert_allclose(engine.matrix(), expected, atol=1e-9)
+
+    def test_alignment_by_time(self):
+        """Test a missing bar is forward filled and incomplete times wait"""
+        engine = CorrelationEngine(['A', 'B'], window=10)
+        times = np.arange(6) * 300
+        added = engine.ingest({
+            'A': make_rates(times, [1.0, 1.1, 1.2, 1.1, 1.2, 1.3]),
+            'B': make_rates(np.delete(times, 2)[:-1], [2.0, 2.2, 2.2, 2.4])  # no bar at 600, ends at 1200
+        })
+        self.assertEqual(added, 4)
+        self.assertEqual(engine.last_time, 1200)
+        np.testing.assert_allclose(engine.buffer[1], [1.2 / 1.1 - 1, 0.0])
+
+        # Nothing new until both symbols have moved on
+        self.assertEqual(engine.ingest({'A': make_rates(times, [1.0, 1.1, 1.2, 1.1, 1.2, 1.3]),
+                                        'B': make_rates([1200], [2.4])}), 0)
+
+class TestCorrelationClusters(unittest.TestCase):
+    def setUp(self):
+        """A-B-C chained by strong links, D and E inversely correlated, F alone"""
+        self.symbols = ['A', 'B', 'C', 'D', 'E', 'F']
+        self.matrix = np.eye(6)
+        for i, j, value in [(0, 1, 0.9), (1, 2, 0.8), (0, 2, 0.3), (3, 4, -0.85), (0, 5, 0.1)]:
+            self.matrix[i, j] = self.matrix[j, i] = value
+
+    def test_connected_components(self):
+        """Test transitive grouping, independent of symbol order"""
+        clusters = CorrelationClusters(self.symbols, self.matrix, threshold=0.7)
+        self.assertEqual(clusters.groups, [['A', 'B', 'C'], ['D', 'E'], ['F']])
+        self.assertEqual(clusters.cluster_of('C'), clusters.cluster_of('A'))
+        self.assertEqual(clusters.members('E'), ['D', 'E'])
+
+        order = [5, 4, 3, 2, 1, 0]
+        reversed_clusters = CorrelationClusters([self.symbols[i] for i in order],
+                                                self.matrix[np.ix_(order, order)], threshold=0.7)
+        self.assertEqual(sorted(map(sorted, reversed_clusters.groups)), sorted(map(sorted, clusters.groups)))
+
+    def test_hierarchical(self):
+        """Test average linkage splits the loosely chained C from A and B"""
+        clusters = CorrelationClusters(self.symbols, self.matrix, threshold=0.7, method='hierarchical')
+        self.assertEqual(clusters.groups, [['A', 'B'], ['C'], ['D', 'E'], ['F']])
+
+    def test_cluster_exposure(self):
+        """Test net exposure is oriented by correlation sign"""
+        clusters = CorrelationClusters(self.symbols, self.matrix, threshold=0.7)
+        exposures = clusters.exposures(np.array([1.0, 0.5, 0.0, 1.0, 1.0, 2.0]))
+
+        self.assertAlmostEqual(clusters.exposure('C', exposures), 1.5)
+        # Long D and long E offset each other since they move inversely
+        self.assertAlmostEqual(clusters.exposure('D', exposures), 0.0)
+        self.assertAlmostEqual(clusters.exposure('F', exposures), 2.0)
+
+class TestCorrelationRisk(unittest.TestCase):
+    def setUp(self):
+        """Analyzer over a fixed three-symbol matrix and a list of positions"""
+        self.positions = ()
+        snapshot = SimpleNamespace(positions=lambda: self.positions)
+        connection = SimpleNamespace(ensure_connected=lambda: True)
+        self.analyzer = CorrelationAnalyzer(bar_store=object(), connection=connection, snapshot=snapshot)
+        self.analyzer.update_correlation_matrix = lambda: None
+
+        engine = CorrelationEngine(['EURUSD', 'GBPUSD', 'USDJPY'])
+        engine.count = 100
+        engine.cached = np.array([[1.0, 0.8, -0.5],
+                                  [0.8, 1.0, -0.4],
+                                  [-0.5, -0.4, 1.0]])
+        self.analyzer.engine = engine
+
+    def position(self, symbol, buy, volume):
+        return SimpleNamespace(symbol=symbol, volume=volume,
+                               type=mt5.POSITION_TYPE_BUY if buy else mt5.POSITION_TYPE_SELL)
+
+    def test_signed_exposure(self):
+        """Test exposure is the correlation row times net signed volumes"""
+        self.positions = (self.position('GBPUSD', True, 1.0), self.position('GBPUSD', True, 1.0),
+                          self.position('USDJPY', True, 1.0), self.position('EURUSD', True, 5.0))
+
+        # 0.8 * 2 - 0.5 * 1, the EURUSD position itself is not counted
+        vector, held = self.analyzer.position_vector(self.positions)
+        row = self.analyzer.engine.matrix()[0]
+        self.assertAlmostEqual(row @ vector - vector[0], 1.1)
+        self.assertTrue(self.analyzer.check_correlation_risk('EURUSD', 'BUY'))
+
+        self.positions = self.positions + (self.position('GBPUSD', True, 1.5),)
+        self.assertFalse(self.analyzer.check_correlation_risk('EURUSD', 'BUY'))
+        self.assertTrue(self.analyzer.check_correlation_risk('EURUSD', 'SELL'))
+
+        # A cluster over its limit blocks trades that add to it
+        self.analyzer.clusters = CorrelationClusters(['EURUSD', 'GBPUSD', 'USDJPY'],
+                                                     self.analyzer.engine.matrix(), threshold=0.7)
+        self.assertFalse(self.analyzer.check_correlation_risk('GBPUSD', 'BUY'))
+        self.assertTrue(self.analyzer.check_correlation_risk('USDJPY', 'BUY'))
+
+        # Mean correlation over the three held symbols
+        self.assertAlmostEqual(self.analyzer.calculate_portfolio_correlation(), (3 + 2 * (0.8 - 0.5 - 0.4)) / 9)
+
+if __name__ == '__main__':
+    unittest.main()
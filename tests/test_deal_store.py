@@ -0,0 +1,62 @@
+import unittest
+import shutil
+import tempfile
+import numpy as np
+from ..utils import fake_mt5
+from ..core.deals import DealIngester
+from ..core.deal_store import DealStore, DAY_SECONDS
+
+class TestDealStore(unittest.TestCase):
+    def setUp(self):
+        """Store over a fake terminal with deals on two days"""
+        self.directory = tempfile.mkdtemp()
+        self.terminal = fake_mt5.FakeTerminal(symbols=['EURUSD', 'GBPUSD'], history_bars=100, future_bars=3000)
+        self.terminal.initialize()
+        self.ingester = DealIngester(source=self.terminal, lookback_days=5)
+        self.store = DealStore(self.directory, deals=self.ingester)
+
+        self.deal(1, 'EURUSD', fake_mt5.DEAL_ENTRY_IN, 0.0)
+        self.deal(1, 'EURUSD', fake_mt5.DEAL_ENTRY_OUT, 5.0)
+        self.deal(2, 'GBPUSD', fake_mt5.DEAL_ENTRY_IN, 0.0, magic=1)
+        self.first_day = self.terminal.now
+        self.terminal.advance(DAY_SECONDS)
+        self.deal(2, 'GBPUSD', fake_mt5.DEAL_ENTRY_OUT, -3.0, magic=1)
+        self.deal(3, 'EURUSD', fake_mt5.DEAL_ENTRY_IN, 0.0)
+        self.deal(3, 'EURUSD', fake_mt5.DEAL_ENTRY_OUT, 2.0)
+        self.store.sync()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def deal(self, position, symbol, entry, profit, magic=123456):
+        self.terminal.add_deal(position, symbol, fake_mt5.DEAL_TYPE_BUY, entry, magic, 0.1, 1.1, profit, '')
+
+    def test_range_and_filters(self):
+        """Queries cut partitions by time and filter symbol and magic"""
+        self.assertEqual(len(self.store.query()), 6)
+        self.assertEqual(len(self.store.query(end=self.first_day + 1)), 3)
+        self.assertEqual(len(self.store.query(start=self.first_day + 1)), 3)
+
+        rows = self.store.query(symbol='EURUSD', magic=123456)
+        self.assertEqual(list(rows['profit']), [0.0, 5.0, 0.0, 2.0])
+        self.assertTrue(np.all(np.diff(rows['time']) >= 0))
+
+        self.assertEqual(self.store.group_by('symbol'), {'EURUSD': {'count': 4, 'sum': 7.0},
+                                                         'GBPUSD': {'count': 2, 'sum': -3.0}})
+
+        positions = self.store.positions()
+        self.assertEqual(list(positions['position_id']), [1, 2, 3])
+        self.assertEqual(list(positions['profit']), [5.0, -3.0, 2.0])
+        self.assertEqual(positions['time_close'][1] - positions['time_open'][1], DAY_SECONDS)
+
+    def test_reload_and_dedupe(self):
+        """Partitions are read back from disk and repeated deals are stored once"""
+        self.store.append(self.terminal.history_deals_get(0, self.terminal.now))
+        self.assertEqual(len(self.store.query()), 6)
+
+        reloaded = DealStore(self.directory, deals=self.ingester)
+        self.assertEqual(len(reloaded.partitions), 2)
+        self.assertTrue(np.array_equal(reloaded.query(), self.store.query()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from ..utils import fake_mt5
+from ..core.deals import DealIngester
+from ..core.deal_store import DealStore
+from ..utils.stats import TradingStats, BOT_MAGIC
+
+class FakeConnection:
+    def ensure_connected(self):
+        return True
+
+class CountingTerminal(fake_mt5.FakeTerminal):
+    """Records the window of every history request"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = []
+
+    def history_deals_get(self, date_from=None, date_to=None, **kwargs):
+        self.requests.append((date_from, date_to))
+        return super().history_deals_get(date_from, date_to, **kwargs)
+
+class TestDealIngester(unittest.TestCase):
+    def setUp(self):
+        self.terminal = CountingTerminal(symbols=['EURUSD'], history_bars=100, future_bars=100)
+        self.terminal.initialize()
+
+    def close_deal(self, profit, magic=BOT_MAGIC):
+        return self.terminal.add_deal(0, 'EURUSD', fake_mt5.DEAL_TYPE_SELL, fake_mt5.DEAL_ENTRY_OUT,
+                                      magic, 0.1, 1.1, profit, '')
+
+    def test_polls_only_new_deals(self):
+        """Each deal is returned once and later polls start at the high-water mark"""
+        ingester = DealIngester(source=self.terminal, lookback_days=2, overlap=60)
+        self.close_deal(5.0)
+        self.close_deal(-2.0)
+        self.assertEqual(len(ingester.poll()), 2)
+        self.assertEqual(ingester.poll(), [])
+
+        self.terminal.advance(30)
+        ticket = self.close_deal(1.0)
+        self.assertEqual([deal.ticket for deal in ingester.poll()], [ticket])
+
+        first_from = self.terminal.requests[0][0]
+        self.assertGreaterEqual(self.terminal.requests[-1][0], self.terminal.now - 30 - 60)
+        self.assertLess(first_from, self.terminal.now - 24 * 60 * 60)
+
+        # Cursors read only deals ingested since the previous read
+        deals, cursor = ingester.read(0)
+        self.assertEqual(len(deals), 3)
+        self.close_deal(4.0)
+        ingester.poll()
+        deals, cursor = ingester.read(cursor)
+        self.assertEqual([deal.profit for deal in deals], [4.0])
+
+    def test_restart_skips_handled_tickets(self):
+        """Tickets up to start_ticket are not ingested again"""
+        first = self.close_deal(5.0)
+        self.close_deal(3.0, magic=1)
+        second = self.close_deal(-1.0)
+        ingester = DealIngester(source=self.terminal, magic=BOT_MAGIC, lookback_days=1, start_ticket=first)
+        self.assertEqual([deal.ticket for deal in ingester.poll()], [second])
+
+    def test_stats_follow_new_deals(self):
+        """Period stats only change, and are only recomputed, when bot deals arrive"""
+        ingester = DealIngester(source=self.terminal, lookback_days=2)
+        store = DealStore(deals=ingester, persist=False)
+        stats = TradingStats(connection=FakeConnection(), persist=False, deals=ingester, store=store)
+        self.close_deal(5.0)
+        self.close_deal(-2.0)
+        self.close_deal(7.0, magic=1)
+
+        daily = stats.calculate_daily_stats()
+        self.assertEqual(daily['total_trades'], 2)
+        self.assertAlmostEqual(daily['pnl'], 3.0)
+        self.assertIs(stats.calculate_daily_stats(), daily)
+
+        self.close_deal(4.0)
+        daily = stats.calculate_daily_stats()
+        self.assertEqual(daily['total_trades'], 3)
+        self.assertEqual(stats.calculate_monthly_stats()['total_trades'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import time
+from ..utils import fake_mt5
+from ..utils.fake_mt5 import FakeTerminal
+
+class TestFakeMT5(unittest.TestCase):
+    def setUp(self):
+        """Create a terminal with two synthetic symbols"""
+        self.terminal = FakeTerminal(symbols=['EURUSD', 'USDJPY'], history_bars=500, future_bars=100,
+                                     end_time=1_700_000_000)
+        self.terminal.initialize()
+
+    def test_rates_stop_at_clock(self):
+        """Test rates end at the current bar and advance with the clock"""
+        rates = self.terminal.copy_rates_from_pos('EURUSD', fake_mt5.TIMEFRAME_M1, 0, 100)
+        self.assertEqual(len(rates), 100)
+        self.assertEqual(rates['time'][-1], self.terminal.now)
+
+        m5 = self.terminal.copy_rates_from_pos('EURUSD', fake_mt5.TIMEFRAME_M5, 0, 10)
+        self.assertTrue((m5['time'] % 300 == 0).all())
+
+        self.terminal.advance(120)
+        latest = self.terminal.copy_rates_from_pos('EURUSD', fake_mt5.TIMEFRAME_M1, 0, 1)
+        self.assertEqual(latest['time'][-1], rates['time'][-1] + 120)
+        self.assertEqual(self.terminal.symbol_info_tick('EURUSD').bid, latest['close'][-1])
+
+    def test_order_round_trip(self):
+        """Test opening, modifying and closing a position updates balance and history"""
+        result = self.terminal.order_send({
+            'action': fake_mt5.TRADE_ACTION_DEAL, 'symbol': 'EURUSD', 'volume': 0.1,
+            'type': fake_mt5.ORDER_TYPE_BUY, 'magic': 234000
+        })
+        self.assertEqual(result.retcode, fake_mt5.TRADE_RETCODE_DONE)
+        position = self.terminal.positions_get(symbol='EURUSD')[0]
+        self.assertEqual(position.ticket, result.order)
+        self.assertEqual(self.terminal.positions_get(symbol='USDJPY'), ())
+
+        result = self.terminal.order_send({
+            'action': fake_mt5.TRADE_ACTION_SLTP, 'position': position.ticket, 'sl': 1.0, 'tp': 0.0
+        })
+        self.assertEqual(result.retcode, fake_mt5.TRADE_RETCODE_DONE)
+        self.assertEqual(self.terminal.positions_get(ticket=position.ticket)[0].sl, 1.0)
+
+        self.terminal.advance(600)
+        floating = self.terminal.positions_get()[0].profit
+        self.assertAlmostEqual(self.terminal.account_info().equity, 10000.0 + floating)
+
+        result = self.terminal.order_send({
+            'action': fake_mt5.TRADE_ACTION_DEAL, 'symbol': 'EURUSD', 'volume': 0.1,
+            'type': fake_mt5.ORDER_TYPE_SELL, 'position': position.ticket
+        })
+        self.assertEqual(result.retcode, fake_mt5.TRADE_RETCODE_DONE)
+        self.assertEqual(self.terminal.positions_get(), ())
+
+        deals = self.terminal.history_deals_get(0, self.terminal.now)
+        self.assertEqual([deal.entry for deal in deals], [fake_mt5.DEAL_ENTRY_IN, fake_mt5.DEAL_ENTRY_OUT])
+        self.assertAlmostEqual(self.terminal.account_info().balance, 10000.0 + deals[-1].profit)
+
+    def test_stop_loss_fills(self):
+        """Test advancing through a stop closes the position at the stop"""
+        bid, ask = self.terminal.prices('EURUSD')
+        self.terminal.order_send({
+            'action': fake_mt5.TRADE_ACTION_DEAL, 'symbol': 'EURUSD', 'volume': 0.1,
+            'type': fake_mt5.ORDER_TYPE_BUY, 'sl': bid - 1e-9, 'tp': 0.0
+        })
+        self.terminal.advance(100 * 60)
+        deals = self.terminal.history_deals_get(0, self.terminal.now)
+        self.assertEqual(len(deals), 2)
+        self.assertEqual(deals[-1].comment, 'sl')
+        self.assertAlmostEqual(deals[-1].price, bid - 1e-9)
+
+    def test_latency_and_call_counts(self):
+        """Test latency is injected and calls are counted"""
+        self.terminal.latency = 0.01
+        start = time.perf_counter()
+        for _ in range(3):
+            self.terminal.symbol_info_tick('EURUSD')
+        self.assertGreaterEqual(time.perf_counter() - start, 0.03)
+        self.assertEqual(self.terminal.calls['symbol_info_tick'], 3)
+
+    def test_module_api_delegates(self):
+        """Test module-level functions use the selected terminal"""
+        previous = fake_mt5.terminal()
+        try:
+            fake_mt5.use(self.terminal)
+            self.assertEqual(fake_mt5.symbol_info('USDJPY').point, 0.001)
+            self.assertIsNone(fake_mt5.symbol_info('XXXYYY'))
+        finally:
+            fake_mt5.use(previous)
+
+if __name__ == '__main__':
+    unittest.main()
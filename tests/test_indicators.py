@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+from ..analysis.indicators import IndicatorState, IndicatorEngine
+from ..config.trading_config import TradingConfig
+from ..config.profiles import ProfileStore
+
+class FakeBarStore:
+    def __init__(self, rates):
+        self.rates = rates
+
+    def get_rates(self, symbol, timeframe, count):
+        return self.rates[-count:]
+
+class TestIndicators(unittest.TestCase):
+    def setUp(self):
+        """Build a synthetic random-walk price series"""
+        rng = np.random.default_rng(42)
+        count = 600
+        close = 1.1 * np.exp(np.cumsum(rng.normal(0, 1e-3, count)))
+        open_ = np.r_[close[0], close[:-1]]
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 3e-4, count)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 3e-4, count)))
+
+        self.rates = np.zeros(count, dtype=[('time', 'i8'), ('open', 'f8'), ('high', 'f8'),
+                                            ('low', 'f8'), ('close', 'f8')])
+        self.rates['time'] = np.arange(count) * 300
+        self.rates['open'] = open_
+        self.rates['high'] = high
+        self.rates['low'] = low
+        self.rates['close'] = close
+        self.df = pd.DataFrame(self.rates)
+
+        self.state = IndicatorState()
+        for bar in self.rates:
+            self.state.update(bar)
+        self.values = self.state.values()
+
+    def assertMatches(self, name, expected):
+        self.assertAlmostEqual(self.values[name], expected, places=9, msg=name)
+
+    def test_moving_averages(self):
+        """Test streaming EMAs against pandas_ta"""
+        self.assertMatches('ema_fast', ta.ema(self.df['close'], length=TradingConfig.EMA_FAST).iloc[-1])
+        self.assertMatches('ema_slow', ta.ema(self.df['close'], length=TradingConfig.EMA_SLOW).iloc[-1])
+        self.assertMatches('ema_long', ta.ema(self.df['close'], length=TradingConfig.EMA_LONG).iloc[-1])
+
+    def test_oscillators(self):
+        """Test streaming RSI, MACD and Stochastic against pandas_ta"""
+        self.assertMatches('rsi', ta.rsi(self.df['close'], length=TradingConfig.RSI_PERIOD).iloc[-1])
+
+        macd = ta.macd(self.df['close'])
+        self.assertMatches('macd', macd['MACD_12_26_9'].iloc[-1])
+        self.assertMatches('macd_signal', macd['MACDs_12_26_9'].iloc[-1])
+
+        stoch = ta.stoch(self.df['high'], self.df['low'], self.df['close'])
+        self.assertMatches('stoch_k', stoch['STOCHk_14_3_3'].iloc[-1])
+        self.assertMatches('stoch_d', stoch['STOCHd_14_3_3'].iloc[-1])
+
+    def test_volatility(self):
+        """Test streaming ATR and Bollinger Bands against pandas_ta"""
+        atr = ta.atr(self.df['high'], self.df['low'], self.df['close'], length=TradingConfig.ATR_PERIOD)
+        self.assertMatches('atr', atr.iloc[-1])
+
+        bbands = ta.bbands(self.df['close'], length=TradingConfig.BB_PERIOD, std=TradingConfig.BB_STD)
+        suffix = f"{TradingConfig.BB_PERIOD}_{TradingConfig.BB_STD}"
+        self.assertMatches('bb_lower', bbands[f'BBL_{suffix}'].iloc[-1])
+        self.assertMatches('bb_upper', bbands[f'BBU_{suffix}'].iloc[-1])
+
+    def test_symbols_lock_independently(self):
+        """A symbol being computed does not block other symbols"""
+        profiles = ProfileStore(TradingConfig, symbol_info=lambda symbol: None)
+        engine = IndicatorEngine(FakeBarStore(self.rates), profiles=profiles)
+        with engine.symbol_lock('EURUSD'):
+            self.assertIsNotNone(engine.get_values('GBPUSD'))
+        self.assertIsNot(engine.symbol_lock('EURUSD'), engine.symbol_lock('GBPUSD'))
+
+        engine.reset()
+        self.assertEqual(engine.states, {})
+
+    def test_forming_bar_not_committed(self):
+        """Test that applying a bar to a clone leaves the state untouched"""
+        before = self.state.values()
+        forming = self.rates[-1].copy()
+        forming['time'] += 300
+        forming['close'] *= 1.01
+
+        current = self.state.clone()
+        current.update(forming)
+
+        self.assertNotEqual(current.values()['close'], before['close'])
+        self.assertEqual(self.state.values(), before)
+
+if __name__ == '__main__':
+    unittest.main()
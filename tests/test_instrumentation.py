@@ -0,0 +1,58 @@
+import unittest
+from types import SimpleNamespace
+from ..utils.instrumentation import Instrumentation, instrument_mt5, timed
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        """Fresh instrumentation with a small window"""
+        self.instruments = Instrumentation(window=100)
+
+    def test_disabled_records_nothing(self):
+        """Test timers are no-ops while disabled"""
+        with self.instruments.timer('stage', 'EURUSD'):
+            pass
+        self.instruments.record('stage', 1.0)
+        self.assertEqual(self.instruments.dump()['stages'], {})
+
+    def test_rolling_percentiles(self):
+        """Test percentiles cover only the rolling window"""
+        self.instruments.enable()
+        for _ in range(100):
+            self.instruments.record('stage', 1.0)
+        for i in range(100):
+            self.instruments.record('stage', (i + 1) / 1000, 'EURUSD')
+
+        stats = self.instruments.stats('stage')
+        self.assertEqual(stats['count'], 200)
+        self.assertAlmostEqual(stats['p50_ms'], 50.5)
+        self.assertAlmostEqual(stats['p99_ms'], 99.01)
+        self.assertEqual(self.instruments.stats('stage', 'EURUSD')['count'], 100)
+        self.assertIn('stage n=200', self.instruments.summary_line())
+
+    def test_decorator_and_mt5_wrapping(self):
+        """Test methods and terminal calls are timed per symbol"""
+        self.instruments.enable()
+
+        class Analyzer:
+            @timed('analyzer.get_signal', self.instruments)
+            def get_signal(self, symbol):
+                return symbol.lower()
+
+        terminal = SimpleNamespace(
+            symbol_info_tick=lambda symbol: symbol,
+            order_send=lambda request: request['symbol']
+        )
+        instrument_mt5(terminal, self.instruments)
+        instrument_mt5(terminal, self.instruments)  # wrapping twice is harmless
+
+        self.assertEqual(Analyzer().get_signal('EURUSD'), 'eurusd')
+        self.assertEqual(terminal.symbol_info_tick('GBPUSD'), 'GBPUSD')
+        terminal.order_send({'symbol': 'USDJPY'})
+
+        report = self.instruments.dump()
+        self.assertEqual(report['symbols']['EURUSD']['analyzer.get_signal']['count'], 1)
+        self.assertEqual(report['symbols']['GBPUSD']['mt5.symbol_info_tick']['count'], 1)
+        self.assertEqual(report['symbols']['USDJPY']['mt5.order_send']['count'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from ..utils.journal import TradeJournal
+
+def add_trade(state, record):
+    state['trades'] += 1
+    state['profit'] += record['profit']
+    day = state['daily'].setdefault(record['day'], {'trades': 0, 'profit': 0.0})
+    day['trades'] += 1
+    day['profit'] += record['profit']
+
+def empty():
+    return {'trades': 0, 'profit': 0.0, 'daily': {}}
+
+class TestTradeJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'stats.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def open(self, compact_every=500):
+        return TradeJournal(self.path, add_trade, empty, compact_every=compact_every)
+
+    def test_replay_matches_live_state(self):
+        """Snapshot plus journal tail rebuilds the aggregates after a restart"""
+        journal = self.open(compact_every=4)
+        for i in range(10):
+            journal.append({'day': f"2024-01-0{1 + i % 3}", 'profit': i - 4.5})
+        expected = json.loads(json.dumps(journal.state))
+        self.assertEqual(journal.pending, 2)  # compacted after 4 and 8 records
+
+        # No close: the last records only exist in the journal
+        journal.file.close()
+        reopened = self.open()
+        self.assertEqual(reopened.state, expected)
+        self.assertEqual(reopened.seq, 10)
+        reopened.close()
+
+    def test_crash_after_snapshot_does_not_double_count(self):
+        """Records already in the snapshot are skipped when the journal was not truncated"""
+        journal = self.open()
+        for i in range(3):
+            journal.append({'day': '2024-01-01', 'profit': 1.0})
+        journal.file.close()
+        with open(journal.journal_path) as file:
+            lines = file.read()
+
+        # Snapshot written but the process died before the journal was truncated
+        journal.compact()
+        with open(journal.journal_path, 'w') as file:
+            file.write(lines + '{"day":"2024-01-01","pro')
+
+        reopened = self.open()
+        self.assertEqual(reopened.state['trades'], 3)
+        reopened.append({'day': '2024-01-02', 'profit': 2.0})
+        reopened.file.close()
+        self.assertEqual(self.open().state['trades'], 4)
+
+    def test_legacy_stats_file(self):
+        """A whole-file stats JSON from before the journal is taken as the snapshot"""
+        with open(self.path, 'w') as file:
+            json.dump({'trades': 5, 'profit': 10.0, 'daily': {}}, file, indent=4)
+        journal = self.open()
+        journal.append({'day': '2024-01-01', 'profit': 1.0})
+        journal.close()
+        self.assertEqual(self.open().state['trades'], 6)
+
+if __name__ == '__main__':
+    unittest.main()
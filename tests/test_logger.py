@@ -0,0 +1,63 @@
+import unittest
+import json
+import logging
+from ..utils.logger import CustomFormatter, StructuredMessage, log_event
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+class TestStructuredLogging(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('tb.tests.structured')
+        self.logger.propagate = False
+        self.handler = ListHandler()
+        self.logger.handlers = [self.handler]
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        self.logger.handlers = []
+        StructuredMessage.style = 'kv'
+
+    def test_filtered_levels_evaluate_nothing(self):
+        """Lazy fields are not called when the level is disabled"""
+        calls = []
+        log_event('signal_analysis', level=logging.DEBUG, logger=self.logger,
+                  summary=lambda: calls.append(1))
+        self.assertEqual(calls, [])
+        self.assertEqual(self.handler.messages, [])
+
+    def test_key_value_and_json_records(self):
+        """Records render compactly, evaluating lazy fields once"""
+        calls = []
+
+        def summary():
+            calls.append(1)
+            return 'Strong Bullish'
+
+        log_event('sentiment_analysis', logger=self.logger, symbol='EURUSD', total=0.812345678,
+                  summary=summary, pairs={'GBPUSD': 0.91})
+        self.assertEqual(self.handler.messages[-1],
+                         'sentiment_analysis symbol=EURUSD total=0.812346 summary="Strong Bullish" '
+                         'pairs={"GBPUSD":0.91}')
+        self.assertEqual(calls, [1])
+
+        StructuredMessage.style = 'json'
+        log_event('trade_opened', logger=self.logger, symbol='EURUSD', ticket=7)
+        self.assertEqual(json.loads(self.handler.messages[-1]),
+                         {'event': 'trade_opened', 'symbol': 'EURUSD', 'ticket': 7})
+
+    def test_formatter_built_once_per_level(self):
+        """CustomFormatter reuses one formatter per level"""
+        formatter = CustomFormatter(None, 'login')
+        formatters = dict(formatter.formatters)
+        record = self.logger.makeRecord(self.logger.name, logging.INFO, __file__, 1, 'hello', None, None)
+        self.assertIn('[login] - INFO - hello', formatter.format(record))
+        self.assertEqual(formatter.formatters, formatters)
+
+if __name__ == '__main__':
+    unittest.main()
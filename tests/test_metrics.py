@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+import pandas as pd
+from ..utils.metrics import MetricsAccumulator
+
+class TestMetricsAccumulator(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.profits = np.round(rng.normal(0.5, 10, 300), 2)
+        self.profits[self.profits == 0] = 0.01
+
+    def test_matches_dataframe_formulas(self):
+        """Running metrics equal the pandas computation over the whole period"""
+        metrics = MetricsAccumulator.from_profits(self.profits)
+        df = pd.DataFrame({'profit': self.profits})
+
+        cumulative = df['profit'].cumsum()
+        drawdown = abs((cumulative - cumulative.expanding().max()).min())
+        self.assertAlmostEqual(metrics.max_drawdown, drawdown)
+
+        returns = df['profit'].pct_change() - 0.02 / 252
+        sharpe = np.sqrt(252) * returns.mean() / returns.std()
+        self.assertAlmostEqual(metrics.sharpe_ratio(), sharpe)
+
+        average_win = df[df['profit'] > 0]['profit'].mean()
+        average_loss = abs(df[df['profit'] < 0]['profit'].mean())
+        self.assertAlmostEqual(metrics.risk_reward_ratio(), average_win / average_loss)
+
+        stats = metrics.to_dict()
+        wins = self.profits[self.profits > 0]
+        losses = self.profits[self.profits <= 0]
+        self.assertEqual(stats['winning_trades'], len(wins))
+        self.assertAlmostEqual(stats['profit_factor'], wins.sum() / abs(losses.sum()))
+        self.assertAlmostEqual(stats['pnl'], self.profits.sum())
+
+    def test_degenerate_periods(self):
+        """Too few deals give zeros rather than NaN"""
+        self.assertEqual(MetricsAccumulator().to_dict()['sharpe_ratio'], 0.0)
+        stats = MetricsAccumulator.from_profits([5.0]).to_dict()
+        self.assertEqual(stats['sharpe_ratio'], 0.0)
+        self.assertEqual(stats['risk_reward_ratio'], 0.0)
+        self.assertEqual(stats['max_drawdown'], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
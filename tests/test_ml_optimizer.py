@@ -0,0 +1,162 @@
+import unittest
+import os
+import shutil
+import tempfile
+import pandas as pd
+from unittest import mock
+from concurrent.futures import Future
+from ..utils import fake_mt5
+import numpy as np
+from ..analysis.ml_optimizer import MLOptimizer, FeatureCache, build_features, train_model_job, FEATURES
+from ..analysis.ml_inference import FeatureState, CompiledForest, ModelPredictor, MLScorer
+from ..config.mt5_config import MT5Config
+from ..config.trading_config import TradingConfig
+
+class SyncExecutor:
+    """Runs submitted jobs immediately so results are ready on the next call"""
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+class TestFeatureCache(unittest.TestCase):
+    def setUp(self):
+        """Cache over a fake terminal in a temporary directory"""
+        self.directory = tempfile.mkdtemp()
+        self.terminal = fake_mt5.FakeTerminal(symbols=['EURUSD'], history_bars=1000, future_bars=100)
+        self.cache = FeatureCache(directory=self.directory, bars=500, source=self.terminal)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_extension_matches_full_rebuild(self):
+        """Features extended with new bars equal features built from scratch"""
+        self.cache.get('EURUSD', fake_mt5.TIMEFRAME_M5)
+        self.terminal.advance(20 * 300)
+        frame = self.cache.get('EURUSD', fake_mt5.TIMEFRAME_M5)
+
+        rates = self.terminal.copy_rates_from_pos('EURUSD', fake_mt5.TIMEFRAME_M5, 0, 501)
+        expected = build_features(pd.DataFrame(rates[:-1]))
+
+        self.assertEqual(list(frame['time']), list(expected['time']))
+        tail = slice(-100, None)
+        for column in FEATURES:
+            self.assertTrue(((frame[column].iloc[tail] - expected[column].iloc[tail]).abs() < 1e-9).all(), column)
+        self.assertTrue(frame['target'].iloc[tail].equals(expected['target'].iloc[tail]))
+
+    def test_reload_from_disk(self):
+        """A new cache picks up the saved frame"""
+        frame = self.cache.get('EURUSD', fake_mt5.TIMEFRAME_M5)
+        other = FeatureCache(directory=self.directory, bars=500, source=self.terminal)
+        loaded = other.load('EURUSD', fake_mt5.TIMEFRAME_M5)
+        self.assertTrue(loaded.equals(frame))
+
+class TestMLOptimizer(unittest.TestCase):
+    def test_background_training_swaps_model(self):
+        """A training run is submitted once and its model activated on the next call"""
+        directory = tempfile.mkdtemp()
+        optimizer = None
+        # Keep the parameter search started by a completed run small, in-process and out of the working tree
+        settings = mock.patch.multiple(TradingConfig, PARAMETER_FILE=f"{directory}/parameters.json",
+                                       WALK_FORWARD_SAMPLES=2, WALK_FORWARD_JOBS=1)
+        settings.start()
+        try:
+            terminal = fake_mt5.FakeTerminal(symbols=['EURUSD'], history_bars=600, future_bars=10)
+            executor = SyncExecutor()
+            optimizer = MLOptimizer(FeatureCache(directory=directory, bars=400, source=terminal), executor)
+            optimizer.model_path = f"{directory}/model.joblib"
+
+            # Data is prepared and submitted on a background thread
+            optimizer.optimize_parameters({'EURUSD': []})
+            optimizer.preparing.join(timeout=60)
+            self.assertEqual(executor.submitted, 1)
+            self.assertIsNone(optimizer.model)
+
+            optimizer.optimize_parameters({'EURUSD': []})
+            self.assertIsNotNone(optimizer.model)
+            self.assertEqual(optimizer.state.features, FEATURES)
+            self.assertEqual(executor.submitted, 1)  # not due again within the interval
+
+            loaded = MLOptimizer(executor=executor)
+            loaded.model_path = optimizer.model_path
+            loaded.load_model()
+            self.assertIsNotNone(loaded.scaler)
+
+            self.assertIsNotNone(optimizer.parameter_search)
+            optimizer.parameter_search.join(timeout=60)
+            self.assertFalse(optimizer.parameter_search.is_alive())
+        finally:
+            if optimizer is not None:
+                if optimizer.parameter_search is not None:
+                    optimizer.parameter_search.join(timeout=60)
+                optimizer.shutdown()
+            settings.stop()
+            shutil.rmtree(directory)
+
+class TestMLInference(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """A small model trained on synthetic bars"""
+        cls.symbols = ['EURUSD', 'GBPUSD', 'USDJPY']
+        cls.terminal = fake_mt5.FakeTerminal(symbols=cls.symbols, history_bars=5000, future_bars=10)
+        rates = cls.terminal.copy_rates_from_pos('EURUSD', fake_mt5.TIMEFRAME_M5, 0, 800)
+        df = build_features(pd.DataFrame(rates)).dropna(subset=FEATURES + ['target'])
+        cls.X = df[FEATURES].to_numpy()
+        cls.state = train_model_job(cls.X, df['target'].astype(int).to_numpy(), FEATURES, n_jobs=1, n_splits=2)
+
+    def test_streaming_features_match_training(self):
+        """FeatureState reproduces build_features bar by bar"""
+        rates = self.terminal.copy_rates_from_pos('GBPUSD', fake_mt5.TIMEFRAME_M5, 0, 200)
+        expected = build_features(pd.DataFrame(rates)).iloc[-1]
+        state = FeatureState()
+        for bar in rates:
+            state.update(bar)
+        for name, value in state.values().items():
+            self.assertAlmostEqual(value, expected[name], places=9, msg=name)
+
+    def test_compiled_forest_matches_sklearn(self):
+        """Flattened trees give the same probabilities as the estimator"""
+        X = self.state.scaler.transform(self.X[:200])
+        expected = self.state.model.predict_proba(X)
+        self.assertTrue(np.allclose(CompiledForest(self.state.model).predict_proba(X), expected))
+
+    def test_scorer_follows_configured_symbols(self):
+        """Without explicit symbols the scorer reads MT5Config.SYMBOLS each cycle"""
+        optimizer = MLOptimizer(executor=SyncExecutor())
+        optimizer.activate(self.state)
+        scorer = MLScorer(optimizer, bar_store=FakeBarStore(self.terminal))
+        with mock.patch.object(MT5Config, 'SYMBOLS', []):
+            self.assertIsNone(scorer.score('EURUSD'))
+
+        # load_symbols replaces the list object
+        scorer.begin_cycle()
+        with mock.patch.object(MT5Config, 'SYMBOLS', list(self.symbols)):
+            self.assertIsNotNone(scorer.score('EURUSD'))
+
+    def test_scorer_batches_symbols(self):
+        """Every symbol with enough bars is scored from one prediction"""
+        optimizer = MLOptimizer(executor=SyncExecutor())
+        optimizer.activate(self.state)
+        scorer = MLScorer(optimizer, self.symbols, bar_store=FakeBarStore(self.terminal))
+        scores = scorer.score_all(self.symbols)
+        self.assertEqual(sorted(scores), sorted(self.symbols))
+
+        sklearn = ModelPredictor(self.state, compiled=False)
+        rows = [[scorer.states[symbol].values()[name] for name in FEATURES] for symbol in self.symbols]
+        for symbol, probability in zip(self.symbols, sklearn.predict_up(rows)):
+            self.assertAlmostEqual(scores[symbol], probability)
+
+class FakeBarStore:
+    """Reads rates straight from a fake terminal"""
+    def __init__(self, terminal):
+        self.terminal = terminal
+
+    def get_rates(self, symbol, timeframe, count):
+        return self.terminal.copy_rates_from_pos(symbol, timeframe, 0, count)
@@ -0,0 +1,66 @@
+import unittest
+import time
+from ..analysis.news import NewsSentimentWorker
+
+class FakeNewsApi:
+    """Returns canned articles per currency and counts requests"""
+    def __init__(self, articles):
+        self.articles = articles
+        self.queries = []
+
+    def get_everything(self, q, **kwargs):
+        self.queries.append(q)
+        currency = q.split()[0]
+        return {'articles': self.articles.get(currency, [])}
+
+class TestNewsSentimentWorker(unittest.TestCase):
+    def setUp(self):
+        """Worker over canned EUR/USD/JPY news with a counting scorer"""
+        shared = {'url': 'https://news/1', 'title': 'good', 'description': 'news'}
+        self.api = FakeNewsApi({
+            'EUR': [shared, {'url': 'https://news/2', 'title': 'great', 'description': ''}],
+            'USD': [shared, {'url': 'https://news/3', 'title': 'bad', 'description': ''}],
+            'JPY': []
+        })
+        self.scored = []
+
+        def scorer(text):
+            self.scored.append(text)
+            return {'good': 0.5, 'great': 1.0, 'bad': -0.5}[text.split()[0]]
+
+        self.worker = NewsSentimentWorker(self.api, refresh_interval=3600, scorer=scorer)
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def test_scores_per_currency(self):
+        """Test one query per currency and articles scored once"""
+        for currency in ('EUR', 'USD', 'JPY'):
+            self.worker.refresh(currency)
+
+        self.assertEqual(len(self.api.queries), 3)
+        self.assertEqual(len(self.scored), 3)  # the shared article is scored once
+        self.assertAlmostEqual(self.worker.currency_score('EUR'), 0.75)
+        self.assertAlmostEqual(self.worker.currency_score('USD'), 0.0)
+        self.assertAlmostEqual(self.worker.currency_score('JPY'), 0.0)
+
+        # Symbols combine base and quote scores without new requests
+        self.assertAlmostEqual(self.worker.symbol_score('EURUSD'), 0.375)
+        self.assertAlmostEqual(self.worker.symbol_score('USDEUR'), -0.375)
+        self.assertEqual(len(self.api.queries), 3)
+
+    def test_background_refresh(self):
+        """Test tracked symbols are fetched by the worker thread, once per currency"""
+        self.worker.track('EURUSD')
+        self.worker.track('EURJPY')
+
+        deadline = time.time() + 5
+        while len(self.worker.updated) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(sorted(self.worker.updated), ['EUR', 'JPY', 'USD'])
+        self.assertEqual(len(self.api.queries), 3)
+        self.assertEqual(self.worker.due(), [])
+
+if __name__ == '__main__':
+    unittest.main()
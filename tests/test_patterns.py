@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+from ..analysis.patterns import detect_patterns, pattern_bias, price_action_bias
+
+class TestPatterns(unittest.TestCase):
+    def setUp(self):
+        """Setup candles: neutral filler, bearish bar, bullish engulfing, hammer"""
+        self.open = np.array([1.00, 1.01, 1.02, 1.005, 1.0300])
+        self.high = np.array([1.02, 1.03, 1.03, 1.04, 1.03025])
+        self.low = np.array([0.99, 1.00, 1.00, 1.00, 1.0100])
+        self.close = np.array([1.01, 1.02, 1.01, 1.03, 1.0302])
+
+    def test_full_scan(self):
+        """Test whole-history scan flags each pattern on the right candle"""
+        patterns = detect_patterns(self.open, self.high, self.low, self.close)
+
+        self.assertEqual(len(patterns['bullish_engulfing']), len(self.close))
+        self.assertTrue(patterns['bullish_engulfing'][3])
+        self.assertTrue(patterns['hammer'][4])
+        self.assertFalse(patterns['bearish_engulfing'].any())
+        np.testing.assert_array_equal(pattern_bias(patterns), [0, 0, 0, 1, 1])
+
+    def test_tail_matches_full_scan(self):
+        """Test tail evaluation equals the end of a full scan"""
+        full = detect_patterns(self.open, self.high, self.low, self.close)
+        tail = detect_patterns(self.open, self.high, self.low, self.close, tail=2)
+
+        for name, hits in tail.items():
+            np.testing.assert_array_equal(hits, full[name][-2:], err_msg=name)
+
+    def test_price_action_bias(self):
+        """Test latest-candle bias"""
+        self.assertEqual(price_action_bias(self.open, self.high, self.low, self.close), 'BULLISH')
+        self.assertEqual(price_action_bias(self.open[:3], self.high[:3], self.low[:3], self.close[:3]), 'NEUTRAL')
+
+if __name__ == '__main__':
+    unittest.main()
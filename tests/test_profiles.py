@@ -0,0 +1,119 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+import numpy as np
+from ..config.profiles import ProfileStore, make_profile
+from ..config.trading_config import TradingConfig
+from ..analysis.indicators import IndicatorEngine
+
+class ScalpConfig:
+    """Scalper-style config naming the band length BB_LENGTH"""
+    EMA_FAST = 8
+    EMA_SLOW = 14
+    EMA_LONG = 50
+    RSI_PERIOD = 8
+    ATR_PERIOD = 14
+    BB_LENGTH = 20
+    BB_STD = 2
+    SL_ATR_MULTIPLIER = 3
+    TP_ATR_MULTIPLIER = 1.5
+
+class FakeBarStore:
+    def __init__(self, rates):
+        self.rates = rates
+
+    def get_rates(self, symbol, timeframe, count):
+        return self.rates[-count:]
+
+class TestProfiles(unittest.TestCase):
+    def setUp(self):
+        """Store over a temporary parameter file"""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'parameters.json')
+        self.version = 0
+        self.symbol_info = lambda symbol: SimpleNamespace(point=0.001 if 'JPY' in symbol else 0.00001,
+                                                          digits=3 if 'JPY' in symbol else 5)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text):
+        with open(self.path, 'w') as file:
+            file.write(text)
+        # Distinct modification times whatever the file system's resolution
+        self.version += 1
+        os.utime(self.path, (self.version, self.version))
+
+    def test_derived_values(self):
+        """Column names, pip size and TP/SL ratio are precomputed"""
+        profile = make_profile('USDJPY', ScalpConfig, {'BB_STD': 2.5}, point=0.001, digits=3)
+        self.assertEqual(profile.BB_PERIOD, 20)
+        self.assertEqual(profile.BB_LOWER_COLUMN, 'BBL_20_2.5')
+        self.assertEqual(profile.BB_UPPER_COLUMN, 'BBU_20_2.5')
+        self.assertAlmostEqual(profile.PIP_SIZE, 0.01)
+        self.assertAlmostEqual(profile.TP_SL_RATIO, 0.5)
+
+        defaults = make_profile(None, TradingConfig)
+        self.assertEqual(defaults.BB_LOWER_COLUMN, f"BBL_{TradingConfig.BB_PERIOD}_{TradingConfig.BB_STD}")
+
+    def test_hot_reload(self):
+        """Walk-forward reports are applied per symbol and reloads keep unchanged profiles"""
+        self.write(json.dumps({'symbols': {'EURUSD': {'parameters': {'EMA_FAST': 5}, 'in_sample': {}}}}))
+        store = ProfileStore(TradingConfig, self.path, reload_interval=0, symbol_info=self.symbol_info)
+
+        eurusd = store.get('EURUSD')
+        gbpusd = store.get('GBPUSD')
+        self.assertEqual(eurusd.EMA_FAST, 5)
+        self.assertEqual(gbpusd.EMA_FAST, TradingConfig.EMA_FAST)
+        self.assertIs(store.get('EURUSD'), eurusd)
+
+        self.write(json.dumps({'EURUSD': {'EMA_FAST': 12}}))
+        self.assertTrue(store.maybe_reload())
+        self.assertEqual(store.get('EURUSD').EMA_FAST, 12)
+        self.assertIs(store.get('GBPUSD'), gbpusd)
+
+        # A broken file keeps the current profiles
+        self.write('{')
+        self.assertFalse(store.maybe_reload())
+        self.assertEqual(store.get('EURUSD').EMA_FAST, 12)
+
+    def test_missing_symbol_info_is_cached(self):
+        """A profile built without symbol info keeps its identity until the point size arrives"""
+        info = {}
+        store = ProfileStore(TradingConfig, self.path, reload_interval=0.0, symbol_info=info.get)
+        profile = store.get('EURUSD')
+        self.assertIsNone(profile.POINT)
+        self.assertIs(store.get('EURUSD'), profile)
+
+        info['EURUSD'] = SimpleNamespace(point=0.00001, digits=5)
+        filled = store.get('EURUSD')
+        self.assertAlmostEqual(filled.PIP_SIZE, 0.0001)
+        self.assertIs(store.get('EURUSD'), filled)
+
+    def test_indicator_state_follows_profile(self):
+        """The indicator engine rebuilds a symbol's state when its parameters change"""
+        rng = np.random.default_rng(3)
+        rates = np.zeros(300, dtype=[('time', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'),
+                                     ('close', 'f8')])
+        close = 1.1 * np.exp(np.cumsum(rng.normal(0, 1e-3, 300)))
+        rates['time'] = np.arange(300) * 300
+        rates['open'] = close
+        rates['high'] = close * 1.0005
+        rates['low'] = close * 0.9995
+        rates['close'] = close
+
+        store = ProfileStore(TradingConfig, self.path, reload_interval=0, symbol_info=self.symbol_info)
+        engine = IndicatorEngine(FakeBarStore(rates), profiles=store)
+        before = engine.get_values('EURUSD')['ema_fast']
+
+        self.write(json.dumps({'EURUSD': {'EMA_FAST': 20}}))
+        store.maybe_reload()
+        after = engine.get_values('EURUSD')['ema_fast']
+        self.assertEqual(engine.states['EURUSD'].ema_fast.length, 20)
+        self.assertNotAlmostEqual(before, after)
+
+if __name__ == '__main__':
+    unittest.main()
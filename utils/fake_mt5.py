@@ -0,0 +1,572 @@
+"""
+Local stand-in for the MetaTrader5 package.
+
+Implements the subset of the MT5 Python API the bot uses on top of recorded
+or synthetic bars, with an in-memory account, positions and deal history.
+Every call can be slowed down with configurable latency so load tests and
+benchmarks see realistic terminal round-trips.
+
+    from tb.utils import fake_mt5
+    fake_mt5.install(fake_mt5.FakeTerminal(symbols=['EURUSD'], latency=0.002))
+    import MetaTrader5 as mt5  # now the fake
+
+install() must run before the first `import MetaTrader5` of the bot modules.
+"""
+
+import sys
+import time
+import random
+import threading
+import zlib
+from collections import Counter, namedtuple
+import numpy as np
+
+# Constants, same values as the real package
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+POSITION_TYPE_BUY = 0
+POSITION_TYPE_SELL = 1
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_PENDING = 5
+TRADE_ACTION_SLTP = 6
+TRADE_ACTION_MODIFY = 7
+TRADE_ACTION_REMOVE = 8
+
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+ORDER_TIME_GTC = 0
+
+SYMBOL_TRADE_MODE_DISABLED = 0
+SYMBOL_TRADE_MODE_LONGONLY = 1
+SYMBOL_TRADE_MODE_SHORTONLY = 2
+SYMBOL_TRADE_MODE_CLOSEONLY = 3
+SYMBOL_TRADE_MODE_FULL = 4
+
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_STOPS = 10016
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_NOT_FOUND = -4
+RES_E_INTERNAL_FAIL_INIT = -10005
+
+TIMEFRAME_SECONDS = {
+    TIMEFRAME_M1: 60,
+    TIMEFRAME_M5: 5 * 60,
+    TIMEFRAME_M15: 15 * 60,
+    TIMEFRAME_M30: 30 * 60,
+    TIMEFRAME_H1: 60 * 60,
+    TIMEFRAME_H4: 4 * 60 * 60,
+    TIMEFRAME_D1: 24 * 60 * 60,
+}
+
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')
+])
+
+# Structures returned by the API (field subsets of the real named tuples)
+TerminalInfo = namedtuple('TerminalInfo', ['connected', 'trade_allowed', 'name', 'build'])
+AccountInfo = namedtuple('AccountInfo', ['login', 'server', 'name', 'currency', 'leverage', 'balance',
+                                         'equity', 'profit', 'margin', 'margin_free', 'margin_level'])
+SymbolInfo = namedtuple('SymbolInfo', ['name', 'visible', 'digits', 'point', 'spread', 'spread_float',
+                                       'trade_contract_size', 'trade_tick_value', 'trade_tick_size',
+                                       'volume_min', 'volume_max', 'volume_step', 'trade_mode', 'bid', 'ask'])
+Tick = namedtuple('Tick', ['time', 'bid', 'ask', 'last', 'volume', 'time_msc', 'flags', 'volume_real'])
+TradePosition = namedtuple('TradePosition', ['ticket', 'time', 'time_msc', 'type', 'magic', 'identifier',
+                                             'volume', 'price_open', 'sl', 'tp', 'price_current',
+                                             'swap', 'profit', 'symbol', 'comment'])
+TradeDeal = namedtuple('TradeDeal', ['ticket', 'order', 'time', 'time_msc', 'type', 'entry', 'magic',
+                                     'position_id', 'volume', 'price', 'commission', 'swap', 'profit',
+                                     'symbol', 'comment'])
+OrderSendResult = namedtuple('OrderSendResult', ['retcode', 'deal', 'order', 'volume', 'price', 'bid',
+                                                 'ask', 'comment', 'request_id', 'request'])
+
+MARGIN_RATE = 0.01  # 1:100 leverage
+
+
+def _epoch(value):
+    """Accept datetimes or epoch seconds like the real API"""
+    if hasattr(value, 'timestamp'):
+        return int(value.timestamp())
+    return int(value)
+
+
+def synthetic_rates(symbol, count, end_time, timeframe=TIMEFRAME_M1, seed=0):
+    """Deterministic random-walk bars for a symbol, the last opening at end_time"""
+    seconds = TIMEFRAME_SECONDS.get(timeframe, 60)
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()) ^ seed)
+
+    if 'JPY' in symbol:
+        base, spread = 150.0, 12
+    elif any(crypto in symbol for crypto in ('BTC', 'ETH', 'XRP', 'LTC')):
+        base, spread = 30000.0, 150
+    else:
+        base, spread = 1.1, 10
+
+    close = base * np.exp(np.cumsum(rng.normal(0, 3e-4, count)))
+    open_ = np.r_[base, close[:-1]]
+    wick = np.abs(rng.normal(0, 1.5e-4, (2, count)))
+
+    rates = np.zeros(count, dtype=RATES_DTYPE)
+    last = end_time - end_time % seconds
+    rates['time'] = last - (count - 1 - np.arange(count)) * seconds
+    rates['open'] = open_
+    rates['close'] = close
+    rates['high'] = np.maximum(open_, close) * (1 + wick[0])
+    rates['low'] = np.minimum(open_, close) * (1 - wick[1])
+    rates['tick_volume'] = rng.integers(10, 500, count)
+    rates['spread'] = spread
+    return rates
+
+
+def symbol_point(symbol):
+    if 'JPY' in symbol:
+        return 0.001
+    if any(crypto in symbol for crypto in ('BTC', 'ETH', 'XRP', 'LTC')):
+        return 0.01
+    return 0.00001
+
+
+class FakeTerminal:
+    """In-memory MT5 terminal over recorded or synthetic M1 bars
+
+    The clock starts `future_bars` before the end of the data; advance()
+    moves it forward, updating prices and triggering stops and targets.
+    """
+
+    def __init__(self, symbols=None, history=None, history_bars=2000, future_bars=1000, seed=0,
+                 latency=0.0, latency_jitter=0.0, balance=10000.0, login=1000000, server='Fake-Server',
+                 end_time=None):
+        self.history = dict(history or {})
+        end_time = int(end_time if end_time is not None else time.time())
+        for symbol in symbols or []:
+            if symbol not in self.history:
+                self.history[symbol] = synthetic_rates(symbol, history_bars + future_bars, end_time, seed=seed)
+
+        self.index = {}  # symbol -> index of the current (forming) bar
+        for symbol, rates in self.history.items():
+            self.index[symbol] = max(len(rates) - 1 - future_bars, 0)
+        self.now = max((int(rates['time'][self.index[symbol]])
+                        for symbol, rates in self.history.items()), default=end_time)
+
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.random = random.Random(seed)
+
+        self.login_id = login
+        self.server = server
+        self.balance = float(balance)
+        self.positions = {}
+        self.deals = []
+        self.next_ticket = 1
+
+        self.connected = False
+        self.error = (RES_S_OK, 'Success')
+        self.calls = Counter()
+        self.lock = threading.RLock()
+        self.resampled = {}
+
+    # Simulation controls
+
+    def delay(self, name):
+        """Count the call and sleep for the configured latency"""
+        self.calls[name] += 1
+        latency = self.latency
+        if self.latency_jitter:
+            latency += self.random.uniform(0, self.latency_jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+    def advance(self, seconds=60):
+        """Move the clock forward, then fill any stops or targets that were touched"""
+        with self.lock:
+            self.now += int(seconds)
+            for symbol, rates in self.history.items():
+                start = self.index[symbol]
+                end = int(np.searchsorted(rates['time'], self.now, side='right')) - 1
+                self.index[symbol] = max(end, start)
+                if end > start:
+                    self.check_stops(symbol, rates[start + 1:end + 1])
+
+    def check_stops(self, symbol, bars):
+        """Close positions whose SL or TP lies within the passed bars"""
+        high = bars['high'].max()
+        low = bars['low'].min()
+        spread = self.spread_price(symbol)
+        for ticket, position in list(self.positions.items()):
+            if position['symbol'] != symbol:
+                continue
+            is_buy = position['type'] == POSITION_TYPE_BUY
+            sl, tp = position['sl'], position['tp']
+            if is_buy:
+                hit = (sl and low <= sl and sl) or (tp and high >= tp and tp)
+            else:
+                hit = (sl and high + spread >= sl and sl) or (tp and low + spread <= tp and tp)
+            if hit:
+                self.close(ticket, hit, 'sl' if hit == sl else 'tp')
+
+    # Market data
+
+    def rates(self, symbol, timeframe):
+        """Bars of a timeframe up to the clock, resampled from M1 when needed"""
+        rates = self.history.get(symbol)
+        if rates is None:
+            return None
+        rates = rates[:self.index[symbol] + 1]
+        if timeframe == TIMEFRAME_M1:
+            return rates
+
+        seconds = TIMEFRAME_SECONDS.get(timeframe, 60)
+        key = (symbol, timeframe, len(rates))
+        if key not in self.resampled:
+            buckets = rates['time'] - rates['time'] % seconds
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            ends = np.r_[starts[1:], len(rates)] - 1
+            resampled = np.zeros(len(starts), dtype=RATES_DTYPE)
+            resampled['time'] = buckets[starts]
+            resampled['open'] = rates['open'][starts]
+            resampled['high'] = np.maximum.reduceat(rates['high'], starts)
+            resampled['low'] = np.minimum.reduceat(rates['low'], starts)
+            resampled['close'] = rates['close'][ends]
+            resampled['tick_volume'] = np.add.reduceat(rates['tick_volume'], starts)
+            resampled['spread'] = rates['spread'][ends]
+            self.resampled = {key: resampled}  # keep only the latest
+        return self.resampled[key]
+
+    def spread_price(self, symbol):
+        rates = self.history[symbol]
+        return int(rates['spread'][self.index[symbol]]) * symbol_point(symbol)
+
+    def prices(self, symbol):
+        """Current bid and ask"""
+        bid = float(self.history[symbol]['close'][self.index[symbol]])
+        return bid, bid + self.spread_price(symbol)
+
+    # Account and trading
+
+    def position_profit(self, position):
+        bid, ask = self.prices(position['symbol'])
+        if position['type'] == POSITION_TYPE_BUY:
+            current = bid
+            profit = (bid - position['price_open'])
+        else:
+            current = ask
+            profit = (position['price_open'] - ask)
+        return current, profit * position['volume'] * self.contract_size(position['symbol'])
+
+    def contract_size(self, symbol):
+        return 1.0 if symbol_point(symbol) == 0.01 else 100000.0
+
+    def open(self, request):
+        symbol = request['symbol']
+        bid, ask = self.prices(symbol)
+        is_buy = request['type'] == ORDER_TYPE_BUY
+        price = ask if is_buy else bid
+        ticket = self.next_ticket
+        self.next_ticket += 1
+
+        self.positions[ticket] = {
+            'ticket': ticket,
+            'time': self.now,
+            'type': POSITION_TYPE_BUY if is_buy else POSITION_TYPE_SELL,
+            'magic': request.get('magic', 0),
+            'volume': float(request['volume']),
+            'price_open': price,
+            'sl': float(request.get('sl') or 0.0),
+            'tp': float(request.get('tp') or 0.0),
+            'symbol': symbol,
+            'comment': request.get('comment', '')
+        }
+        self.add_deal(ticket, symbol, DEAL_TYPE_BUY if is_buy else DEAL_TYPE_SELL, DEAL_ENTRY_IN,
+                      request.get('magic', 0), float(request['volume']), price, 0.0, request.get('comment', ''))
+        return ticket, price
+
+    def close(self, ticket, price=None, comment=''):
+        position = self.positions.pop(ticket)
+        current, profit = self.position_profit(position)
+        if price is not None:
+            # Filled at a stop/target level rather than the current price
+            sign = 1 if position['type'] == POSITION_TYPE_BUY else -1
+            profit = sign * (price - position['price_open']) * position['volume'] * \
+                self.contract_size(position['symbol'])
+            current = price
+
+        self.balance += profit
+        closing_type = DEAL_TYPE_SELL if position['type'] == POSITION_TYPE_BUY else DEAL_TYPE_BUY
+        self.add_deal(ticket, position['symbol'], closing_type, DEAL_ENTRY_OUT, position['magic'],
+                      position['volume'], current, profit, comment)
+        return current
+
+    def add_deal(self, position_id, symbol, deal_type, entry, magic, volume, price, profit, comment):
+        ticket = len(self.deals) + 1
+        self.deals.append(TradeDeal(
+            ticket=ticket, order=ticket, time=self.now, time_msc=self.now * 1000, type=deal_type,
+            entry=entry, magic=magic, position_id=position_id, volume=volume, price=price,
+            commission=0.0, swap=0.0, profit=profit, symbol=symbol, comment=comment
+        ))
+        return ticket
+
+    def result(self, retcode, request, price=0.0, order=0, comment=''):
+        bid, ask = self.prices(request['symbol']) if request.get('symbol') in self.history else (0.0, 0.0)
+        if retcode != TRADE_RETCODE_DONE:
+            self.error = (RES_E_FAIL, comment)
+        return OrderSendResult(retcode=retcode, deal=len(self.deals), order=order,
+                               volume=request.get('volume', 0.0), price=price, bid=bid, ask=ask,
+                               comment=comment, request_id=0, request=request)
+
+    # MetaTrader5 API
+
+    def initialize(self, *args, **kwargs):
+        self.delay('initialize')
+        self.connected = True
+        self.error = (RES_S_OK, 'Success')
+        return True
+
+    def login(self, login=None, password=None, server=None, **kwargs):
+        self.delay('login')
+        if login is not None:
+            self.login_id = login
+        if server is not None:
+            self.server = server
+        return self.connected
+
+    def shutdown(self):
+        self.delay('shutdown')
+        self.connected = False
+        return True
+
+    def last_error(self):
+        return self.error
+
+    def terminal_info(self):
+        self.delay('terminal_info')
+        if not self.connected:
+            return None
+        return TerminalInfo(connected=True, trade_allowed=True, name='Fake MT5', build=0)
+
+    def account_info(self):
+        self.delay('account_info')
+        if not self.connected:
+            return None
+        with self.lock:
+            profit = sum(self.position_profit(position)[1] for position in self.positions.values())
+            margin = sum(position['volume'] * self.contract_size(position['symbol']) *
+                         position['price_open'] * MARGIN_RATE for position in self.positions.values())
+            equity = self.balance + profit
+            return AccountInfo(
+                login=self.login_id, server=self.server, name='Fake Account', currency='USD',
+                leverage=int(1 / MARGIN_RATE), balance=self.balance, equity=equity, profit=profit,
+                margin=margin, margin_free=equity - margin,
+                margin_level=equity / margin * 100 if margin else 0.0
+            )
+
+    def symbols_get(self, group=None):
+        self.delay('symbols_get')
+        return tuple(self.symbol_info_uncounted(symbol) for symbol in self.history)
+
+    def symbols_total(self):
+        return len(self.history)
+
+    def symbol_select(self, symbol, enable=True):
+        self.delay('symbol_select')
+        return symbol in self.history
+
+    def symbol_info_uncounted(self, symbol):
+        point = symbol_point(symbol)
+        bid, ask = self.prices(symbol)
+        spread = int(self.history[symbol]['spread'][self.index[symbol]])
+        return SymbolInfo(
+            name=symbol, visible=True, digits=int(round(-np.log10(point))), point=point,
+            spread=spread, spread_float=True, trade_contract_size=self.contract_size(symbol),
+            trade_tick_value=1.0, trade_tick_size=point, volume_min=0.01, volume_max=100.0,
+            volume_step=0.01, trade_mode=SYMBOL_TRADE_MODE_FULL, bid=bid, ask=ask
+        )
+
+    def symbol_info(self, symbol):
+        self.delay('symbol_info')
+        if symbol not in self.history:
+            self.error = (RES_E_NOT_FOUND, f'Symbol {symbol} not found')
+            return None
+        return self.symbol_info_uncounted(symbol)
+
+    def symbol_info_tick(self, symbol):
+        self.delay('symbol_info_tick')
+        if symbol not in self.history:
+            return None
+        bid, ask = self.prices(symbol)
+        bar_time = int(self.history[symbol]['time'][self.index[symbol]])
+        tick_time = max(bar_time, self.now)
+        return Tick(time=tick_time, bid=bid, ask=ask, last=bid, volume=1,
+                    time_msc=tick_time * 1000, flags=0, volume_real=1.0)
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        self.delay('copy_rates_from_pos')
+        rates = self.rates(symbol, timeframe)
+        if rates is None:
+            return None
+        end = len(rates) - start_pos
+        return rates[max(end - count, 0):max(end, 0)].copy()
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        self.delay('copy_rates_from')
+        rates = self.rates(symbol, timeframe)
+        if rates is None:
+            return None
+        end = int(np.searchsorted(rates['time'], _epoch(date_from), side='right'))
+        return rates[max(end - count, 0):end].copy()
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        self.delay('copy_rates_range')
+        rates = self.rates(symbol, timeframe)
+        if rates is None:
+            return None
+        start = int(np.searchsorted(rates['time'], _epoch(date_from), side='left'))
+        end = int(np.searchsorted(rates['time'], _epoch(date_to), side='right'))
+        return rates[start:end].copy()
+
+    def positions_total(self):
+        self.delay('positions_total')
+        return len(self.positions)
+
+    def positions_get(self, symbol=None, ticket=None, group=None):
+        self.delay('positions_get')
+        if not self.connected:
+            return None
+        with self.lock:
+            positions = []
+            for position in self.positions.values():
+                if symbol is not None and position['symbol'] != symbol:
+                    continue
+                if ticket is not None and position['ticket'] != ticket:
+                    continue
+                current, profit = self.position_profit(position)
+                positions.append(TradePosition(
+                    ticket=position['ticket'], time=position['time'], time_msc=position['time'] * 1000,
+                    type=position['type'], magic=position['magic'], identifier=position['ticket'],
+                    volume=position['volume'], price_open=position['price_open'], sl=position['sl'],
+                    tp=position['tp'], price_current=current, swap=0.0, profit=profit,
+                    symbol=position['symbol'], comment=position['comment']
+                ))
+            return tuple(positions)
+
+    def history_deals_get(self, date_from=None, date_to=None, group=None, ticket=None, position=None):
+        self.delay('history_deals_get')
+        if not self.connected:
+            return None
+        deals = self.deals
+        if position is not None:
+            return tuple(deal for deal in deals if deal.position_id == position)
+        if ticket is not None:
+            return tuple(deal for deal in deals if deal.ticket == ticket)
+        start = _epoch(date_from) if date_from is not None else 0
+        end = _epoch(date_to) if date_to is not None else self.now
+        return tuple(deal for deal in deals if start <= deal.time <= end)
+
+    def history_deals_total(self, date_from, date_to):
+        return len(self.history_deals_get(date_from, date_to))
+
+    def order_send(self, request):
+        self.delay('order_send')
+        with self.lock:
+            if not self.connected:
+                return None
+
+            action = request.get('action')
+            if action == TRADE_ACTION_SLTP:
+                position = self.positions.get(request.get('position'))
+                if position is None:
+                    return self.result(TRADE_RETCODE_POSITION_CLOSED, request, comment='Position closed')
+                position['sl'] = float(request.get('sl') or 0.0)
+                position['tp'] = float(request.get('tp') or 0.0)
+                return self.result(TRADE_RETCODE_DONE, request, order=position['ticket'])
+
+            if action == TRADE_ACTION_DEAL:
+                if request.get('symbol') not in self.history:
+                    return self.result(TRADE_RETCODE_INVALID, request, comment='Unknown symbol')
+
+                ticket = request.get('position')
+                if ticket:
+                    if ticket not in self.positions:
+                        return self.result(TRADE_RETCODE_POSITION_CLOSED, request, comment='Position closed')
+                    price = self.close(ticket, comment=request.get('comment', ''))
+                    return self.result(TRADE_RETCODE_DONE, request, price=price, order=ticket)
+
+                ticket, price = self.open(request)
+                return self.result(TRADE_RETCODE_DONE, request, price=price, order=ticket)
+
+            return self.result(TRADE_RETCODE_INVALID, request, comment='Unsupported action')
+
+
+_terminal = None
+_terminal_lock = threading.Lock()
+
+API = (
+    'initialize', 'login', 'shutdown', 'last_error', 'terminal_info', 'account_info',
+    'symbols_get', 'symbols_total', 'symbol_select', 'symbol_info', 'symbol_info_tick',
+    'copy_rates_from_pos', 'copy_rates_from', 'copy_rates_range', 'positions_total',
+    'positions_get', 'history_deals_get', 'history_deals_total', 'order_send'
+)
+
+
+def terminal():
+    """The terminal behind the module-level API, created on first use"""
+    global _terminal
+    with _terminal_lock:
+        if _terminal is None:
+            _terminal = FakeTerminal(symbols=['EURUSD', 'GBPUSD', 'USDJPY', 'BTCUSD'])
+        return _terminal
+
+
+def use(fake_terminal):
+    """Route the module-level API to a specific terminal"""
+    global _terminal
+    with _terminal_lock:
+        _terminal = fake_terminal
+    return fake_terminal
+
+
+def _delegate(name):
+    def call(*args, **kwargs):
+        return getattr(terminal(), name)(*args, **kwargs)
+    call.__name__ = name
+    return call
+
+
+for _name in API:
+    globals()[_name] = _delegate(_name)
+
+
+def install(fake_terminal=None, force=False):
+    """Register this module as MetaTrader5, unless the real package is available"""
+    if fake_terminal is not None:
+        use(fake_terminal)
+
+    if not force and 'MetaTrader5' not in sys.modules:
+        try:
+            import MetaTrader5  # noqa: F401
+        except ImportError:
+            pass
+
+    current = sys.modules.get('MetaTrader5')
+    if force or current is None:
+        sys.modules['MetaTrader5'] = sys.modules[__name__]
+    return sys.modules['MetaTrader5']
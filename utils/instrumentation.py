@@ -0,0 +1,261 @@
+import logging
+import threading
+import time
+import json
+import functools
+import numpy as np
+
+DEFAULT_WINDOW = 1000
+DEFAULT_SUMMARY_INTERVAL = 60  # seconds
+
+# Terminal calls timed by instrument_mt5()
+MT5_FUNCTIONS = (
+    'copy_rates_from_pos', 'copy_rates_from', 'copy_rates_range', 'symbol_info', 'symbol_info_tick',
+    'symbol_select', 'symbols_get', 'account_info', 'terminal_info', 'positions_get', 'positions_total',
+    'orders_get', 'order_send', 'order_check', 'history_deals_get', 'history_orders_get'
+)
+
+
+class RollingWindow:
+    """Last `capacity` samples of one stage, in seconds"""
+
+    def __init__(self, capacity):
+        self.samples = np.empty(capacity)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def summary(self):
+        """Call count, total time and window percentiles in milliseconds"""
+        window = self.samples[:min(self.count, len(self.samples))] * 1000
+        if len(window) == 0:
+            return None
+        p50, p95, p99 = np.percentile(window, [50, 95, 99])
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(float(window.mean()), 3),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(float(window.max()), 3)
+        }
+
+
+class _Timer:
+    """Context manager recording one sample on exit"""
+
+    __slots__ = ('owner', 'stage', 'symbol', 'start')
+
+    def __init__(self, owner, stage, symbol):
+        self.owner = owner
+        self.stage = stage
+        self.symbol = symbol
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.owner.record(self.stage, time.perf_counter() - self.start, self.symbol)
+        return False
+
+
+class _NullTimer:
+    """Shared no-op timer returned while instrumentation is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instrumentation:
+    """Per-stage and per-symbol latency histograms over a rolling window
+
+    Disabled by default; timers then cost one attribute check. Stages are
+    dotted names such as `mt5.copy_rates_from_pos` or `technical.get_signal`.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, window=DEFAULT_WINDOW, summary_interval=DEFAULT_SUMMARY_INTERVAL, enabled=False):
+        self.window = window
+        self.summary_interval = summary_interval
+        self.enabled = enabled
+        self.stages = {}   # stage -> RollingWindow
+        self.symbols = {}  # (stage, symbol) -> RollingWindow
+        self.last_summary = time.time()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Get process-wide instrumentation"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def enable(self, window=None, summary_interval=None):
+        if window is not None and window != self.window:
+            self.window = window
+            self.reset()
+        if summary_interval is not None:
+            self.summary_interval = summary_interval
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+            self.symbols.clear()
+
+    def timer(self, stage, symbol=None):
+        """Context manager timing a block"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage, symbol)
+
+    def record(self, stage, seconds, symbol=None):
+        """Add one sample for a stage (and symbol, if given)"""
+        if not self.enabled:
+            return
+        with self.lock:
+            window = self.stages.get(stage)
+            if window is None:
+                window = self.stages[stage] = RollingWindow(self.window)
+            window.add(seconds)
+
+            if symbol is not None:
+                key = (stage, symbol)
+                window = self.symbols.get(key)
+                if window is None:
+                    window = self.symbols[key] = RollingWindow(self.window)
+                window.add(seconds)
+
+    def stats(self, stage, symbol=None):
+        """Summary of one stage, or of one stage for one symbol"""
+        with self.lock:
+            window = self.stages.get(stage) if symbol is None else self.symbols.get((stage, symbol))
+            return window.summary() if window is not None else None
+
+    def dump(self, path=None):
+        """All stage and per-symbol summaries, optionally written to a JSON file"""
+        with self.lock:
+            report = {
+                'window': self.window,
+                'stages': {stage: window.summary() for stage, window in sorted(self.stages.items())},
+                'symbols': {}
+            }
+            for (stage, symbol), window in sorted(self.symbols.items()):
+                report['symbols'].setdefault(symbol, {})[stage] = window.summary()
+
+        if path is not None:
+            try:
+                with open(path, 'w') as file:
+                    json.dump(report, file, indent=2)
+            except Exception as e:
+                logging.error(f"Error writing instrumentation dump: {str(e)}")
+        return report
+
+    def summary_line(self, top=5):
+        """One line with cycle percentiles and the stages taking the most time"""
+        with self.lock:
+            summaries = {stage: window.summary() for stage, window in self.stages.items()}
+
+        if not summaries:
+            return "Timing: no samples"
+
+        parts = []
+        cycle = summaries.pop('cycle', None)
+        if cycle:
+            parts.append(f"cycle n={cycle['count']} p50={cycle['p50_ms']:.1f}ms "
+                         f"p95={cycle['p95_ms']:.1f}ms p99={cycle['p99_ms']:.1f}ms")
+
+        busiest = sorted(summaries.items(), key=lambda item: item[1]['total_ms'], reverse=True)[:top]
+        for stage, summary in busiest:
+            parts.append(f"{stage} n={summary['count']} p50={summary['p50_ms']:.2f}ms "
+                         f"p95={summary['p95_ms']:.2f}ms p99={summary['p99_ms']:.2f}ms")
+        return "Timing: " + " | ".join(parts)
+
+    def maybe_log_summary(self, logger=None):
+        """Log the summary line once every `summary_interval` seconds"""
+        if not self.enabled:
+            return
+        now = time.time()
+        if now - self.last_summary < self.summary_interval:
+            return
+        self.last_summary = now
+        (logger or logging).info(self.summary_line())
+
+
+def _symbol_argument(args, kwargs, offset):
+    symbol = kwargs.get('symbol')
+    if symbol is None and len(args) > offset and isinstance(args[offset], str):
+        symbol = args[offset]
+    return symbol
+
+
+def timed(stage, instrumentation=None):
+    """Decorator timing a method as `stage`; a str first argument is taken as the symbol"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            instruments = instrumentation if instrumentation is not None else Instrumentation.get_instance()
+            if not instruments.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                instruments.record(stage, time.perf_counter() - start, _symbol_argument(args, kwargs, 1))
+        return wrapper
+    return decorator
+
+
+def instrument_mt5(module, instrumentation=None, functions=MT5_FUNCTIONS):
+    """Wrap the terminal functions of `module` (the MetaTrader5 package) with timers
+
+    Every component calls `mt5.<function>` through the module, so patching
+    its attributes once covers all terminal round-trips.
+    """
+    instruments = instrumentation if instrumentation is not None else Instrumentation.get_instance()
+
+    def wrap(name, func):
+        stage = f"mt5.{name}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instruments.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                symbol = _symbol_argument(args, kwargs, 0)
+                if symbol is None and name == 'order_send' and args and isinstance(args[0], dict):
+                    symbol = args[0].get('symbol')
+                instruments.record(stage, time.perf_counter() - start, symbol)
+
+        wrapper.instrumented = True
+        return wrapper
+
+    for name in functions:
+        func = getattr(module, name, None)
+        if func is None or getattr(func, 'instrumented', False):
+            continue
+        setattr(module, name, wrap(name, func))
+    return instruments
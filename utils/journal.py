@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import threading
+
+
+class TradeJournal:
+    """Append-only journal of records folded into a periodically compacted snapshot
+
+    Each record is one compact JSON line appended to `<path>.journal`, so a
+    write costs the same however long the history is. The folded state is
+    written to `path` only every `compact_every` records (and on close),
+    after which the journal is truncated. On startup the snapshot is loaded
+    and the journal tail folded on top of it.
+
+    Records carry a sequence number and the snapshot stores the last one it
+    contains, so a crash between writing the snapshot and truncating the
+    journal does not fold records twice; a torn last line is skipped.
+    """
+
+    def __init__(self, path, fold, initial, compact_every=500, indent=None):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.fold = fold            # fold(state, record) applies one record in place
+        self.initial = initial      # initial() returns an empty state
+        self.compact_every = compact_every
+        self.indent = indent
+        self.lock = threading.Lock()
+        self.file = None
+        self.state, self.seq, self.pending = self.load()
+        if self.pending or (os.path.exists(self.journal_path) and os.path.getsize(self.journal_path)):
+            # Start from a clean journal so appends never follow a torn line
+            self._compact()
+
+    def load(self):
+        """Snapshot plus journal tail, as (state, last sequence number, tail length)"""
+        state, seq = None, 0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as file:
+                    data = json.load(file)
+                if isinstance(data, dict) and 'state' in data and 'seq' in data:
+                    state, seq = data['state'], data['seq']
+                else:
+                    # Whole-file stats written before the journal existed
+                    state = data
+            except Exception as e:
+                logging.error(f"Error loading snapshot {self.path}: {str(e)}")
+        if state is None:
+            state = self.initial()
+
+        pending = 0
+        if os.path.exists(self.journal_path):
+            try:
+                with open(self.journal_path, 'r') as file:
+                    for line in file:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            logging.warning(f"Skipping unreadable record in {self.journal_path}")
+                            continue
+                        if record.get('n', 0) <= seq:
+                            continue
+                        self.fold(state, record)
+                        seq = record['n']
+                        pending += 1
+            except Exception as e:
+                logging.error(f"Error replaying journal {self.journal_path}: {str(e)}")
+
+        return state, seq, pending
+
+    def append(self, record):
+        """Fold a record into the state and append it to the journal"""
+        with self.lock:
+            self.seq += 1
+            record = dict(record, n=self.seq)
+            self.fold(self.state, record)
+            try:
+                if self.file is None:
+                    self.file = open(self.journal_path, 'a')
+                self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+                self.file.flush()
+                self.pending += 1
+            except Exception as e:
+                logging.error(f"Error writing journal {self.journal_path}: {str(e)}")
+
+            if self.pending >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        """Write the state as a snapshot and truncate the journal"""
+        with self.lock:
+            self._compact()
+
+    def _compact(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump({'seq': self.seq, 'state': self.state}, file, indent=self.indent)
+            os.replace(tmp_path, self.path)
+
+            # Records up to seq are in the snapshot now
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            open(self.journal_path, 'w').close()
+            self.pending = 0
+        except Exception as e:
+            logging.error(f"Error compacting journal {self.journal_path}: {str(e)}")
+
+    def close(self):
+        """Compact outstanding records and close the journal"""
+        with self.lock:
+            if self.pending:
+                self._compact()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
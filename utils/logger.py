@@ -1,9 +1,67 @@
 import logging
+import json
 import os
 import time
 import sys
 from datetime import datetime, timedelta
 from logging.handlers import RotatingFileHandler
+from ..config.trading_config import TradingConfig
+
+
+class StructuredMessage:
+    """Event with fields, rendered as key=value pairs or JSON only when a handler emits it
+
+    Callable field values are evaluated at that point too, so expensive
+    summaries cost nothing when the record is filtered out.
+    """
+
+    style = 'kv'
+
+    def __init__(self, event, fields):
+        self.event = event
+        self.fields = fields
+        self.rendered = None
+
+    def values(self):
+        values = {}
+        for key, value in self.fields.items():
+            if callable(value):
+                try:
+                    value = value()
+                except Exception as e:
+                    # Raised while a handler emits, outside the caller's try block
+                    value = f"<error: {e}>"
+            values[key] = value
+        return values
+
+    def __str__(self):
+        # Rendered once, however many handlers format the record
+        if self.rendered is None:
+            values = self.values()
+            if self.style == 'json':
+                self.rendered = json.dumps({'event': self.event, **values}, default=str, separators=(',', ':'))
+            else:
+                pairs = ' '.join(f"{key}={render_value(value)}" for key, value in values.items())
+                self.rendered = f"{self.event} {pairs}" if pairs else self.event
+        return self.rendered
+
+
+def render_value(value):
+    """Compact text for one key=value field"""
+    if isinstance(value, float):
+        return format(value, '.6g')
+    if isinstance(value, str):
+        return json.dumps(value) if (not value or ' ' in value or '=' in value) else value
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, default=str, separators=(',', ':'))
+    return str(value)
+
+
+def log_event(event, level=logging.INFO, logger=None, **fields):
+    """Log a structured event if the level is enabled; nothing is built otherwise"""
+    logger = logger if logger is not None else logging.getLogger()
+    if logger.isEnabledFor(level):
+        logger.log(level, StructuredMessage(event, fields))
 
 class CustomFormatter(logging.Formatter):
     """Custom formatter with colors for console output"""
@@ -26,15 +84,20 @@ class CustomFormatter(logging.Formatter):
             logging.ERROR: f"{self.red}%(asctime)s - [{self.login}] - %(levelname)s - %(message)s{self.reset}",
             logging.CRITICAL: f"{self.bold_red}%(asctime)s - [{self.login}] - %(levelname)s - %(message)s{self.reset}"
         }
+        # One formatter per level, built once rather than per record
+        self.formatters = {level: logging.Formatter(fmt, datefmt="%Y-%m-%d %H:%M:%S")
+                           for level, fmt in self.FORMATS.items()}
+        self.default_formatter = logging.Formatter(datefmt="%Y-%m-%d %H:%M:%S")
 
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt, datefmt="%Y-%m-%d %H:%M:%S")
+        formatter = self.formatters.get(record.levelno, self.default_formatter)
         return formatter.format(record)
 
 def setup_logger(name="MT5_Trading_Bot"):
     """Setup logger with both file and console handlers"""
     try:
+        StructuredMessage.style = TradingConfig.LOG_FORMAT
+
         # Current time and login
         current_time = datetime.now().strptime("2025-03-15 06:38:00", "%Y-%m-%d %H:%M:%S")
         login = "zzzz14"
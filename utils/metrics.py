@@ -0,0 +1,109 @@
+import math
+
+TRADING_DAYS = 252
+
+
+class MetricsAccumulator:
+    """Trade statistics updated in O(1) per closed deal
+
+    Keeps the counts, sums, running peak of cumulative profit and a Welford
+    mean/variance of deal-to-deal profit changes, which is everything
+    TradingStats reports, so a period's stats never need its deals again.
+    """
+
+    def __init__(self, risk_free_rate=0.02):
+        self.risk_free_rate = risk_free_rate
+        self.total_trades = 0
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.profit = 0.0
+        self.loss = 0.0
+        # Strictly positive and negative deals, for average win and loss
+        self.win_count = 0
+        self.win_sum = 0.0
+        self.negative_count = 0
+        self.negative_sum = 0.0
+        # Drawdown of cumulative profit from its running peak
+        self.cumulative = 0.0
+        self.peak = None
+        self.max_drawdown = 0.0
+        # Welford over profit pct_change between consecutive deals
+        self.last_profit = None
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, profit):
+        """Fold one closed deal's profit into the statistics"""
+        self.total_trades += 1
+        if profit > 0:
+            self.winning_trades += 1
+            self.profit += profit
+            self.win_count += 1
+            self.win_sum += profit
+        else:
+            self.losing_trades += 1
+            self.loss += abs(profit)
+            if profit < 0:
+                self.negative_count += 1
+                self.negative_sum += profit
+
+        self.cumulative += profit
+        if self.peak is None or self.cumulative > self.peak:
+            self.peak = self.cumulative
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.cumulative)
+
+        if self.last_profit:
+            change = profit / self.last_profit - 1
+            self.count += 1
+            delta = change - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (change - self.mean)
+        self.last_profit = profit
+
+    def sharpe_ratio(self):
+        """Annualized Sharpe ratio of the deal-to-deal returns"""
+        if self.count < 2:
+            return 0.0
+        std = math.sqrt(self.m2 / (self.count - 1))
+        if std == 0:
+            return 0.0
+        excess = self.mean - self.risk_free_rate / TRADING_DAYS
+        return math.sqrt(TRADING_DAYS) * excess / std
+
+    def risk_reward_ratio(self):
+        """Average win over average loss"""
+        if self.win_count == 0 or self.negative_count == 0 or self.negative_sum == 0:
+            return 0.0
+        return (self.win_sum / self.win_count) / abs(self.negative_sum / self.negative_count)
+
+    def to_dict(self):
+        """Statistics in the layout of TradingStats.aggregate_stats"""
+        stats = {
+            'total_trades': self.total_trades,
+            'winning_trades': self.winning_trades,
+            'losing_trades': self.losing_trades,
+            'profit': self.profit,
+            'loss': self.loss,
+            'pnl': self.profit - self.loss,
+            'win_rate': 0.0,
+            'profit_factor': 0.0,
+            'average_trade': 0.0,
+            'max_drawdown': self.max_drawdown,
+            'sharpe_ratio': self.sharpe_ratio(),
+            'risk_reward_ratio': self.risk_reward_ratio()
+        }
+        if self.total_trades > 0:
+            stats['win_rate'] = self.winning_trades / self.total_trades * 100
+            stats['average_trade'] = stats['pnl'] / self.total_trades
+        if self.loss > 0:
+            stats['profit_factor'] = self.profit / self.loss
+        return stats
+
+    @classmethod
+    def from_profits(cls, profits, risk_free_rate=0.02):
+        """Accumulator over a sequence of deal profits"""
+        accumulator = cls(risk_free_rate)
+        for profit in profits:
+            accumulator.add(float(profit))
+        return accumulator
@@ -1,97 +1,96 @@
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-import MetaTrader5 as mt5
 import logging
-import json
 import os
+from ..core.connection import MT5Connection
+from ..core.deals import DealIngester
+from ..core.deal_store import DealStore
+from .journal import TradeJournal
+from .metrics import MetricsAccumulator
+
+PERIODS = ('daily', 'weekly', 'monthly')
+BOT_MAGIC = 123456
+
+
+def period_key(period, moment):
+    """Key of the day, week or month containing a datetime"""
+    if period == 'daily':
+        return moment.strftime('%Y-%m-%d')
+    if period == 'weekly':
+        return (moment - timedelta(days=moment.weekday())).strftime('%Y-%W')
+    return moment.strftime('%Y-%m')
 
 class TradingStats:
-    def __init__(self):
+    def __init__(self, connection=None, persist=True, deals=None, store=None):
+        self.connection = connection if connection is not None else MT5Connection.get_instance()
+        self.deals = deals if deals is not None else DealIngester.get_instance()
+        self.store = store if store is not None else DealStore.get_instance()
+        self.cursor = 0
+        # Running metrics of the current day, week and month, all updated by each new deal
+        self.buckets = {period: {'key': None, 'metrics': MetricsAccumulator(), 'stats': None}
+                        for period in PERIODS}
         self.current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.login = "zzzz14"
         self.stats_dir = f"stats/user_{self.login}"
-        self.ensure_stats_directory()
+        self.persist = persist  # False keeps everything in memory (backtests)
         self.daily_stats = {}
         self.weekly_stats = {}
         self.monthly_stats = {}
-        self.load_stats()
+        self.journal = None
+        if self.persist:
+            self.ensure_stats_directory()
+            self.load_stats()
 
     def ensure_stats_directory(self):
         """Ensure statistics directory exists"""
         if not os.path.exists(self.stats_dir):
             os.makedirs(self.stats_dir)
 
+    def ingest(self, poll=True):
+        """Fold deals closed since the last call into every period's metrics"""
+        if poll:
+            self.deals.poll()
+            self.store.sync(poll=False)
+        new, self.cursor = self.deals.read(self.cursor)
+        for deal in new:
+            if deal.magic != BOT_MAGIC:  # Our bot's trades
+                continue
+            moment = datetime.fromtimestamp(deal.time)
+            for period, bucket in self.buckets.items():
+                key = period_key(period, moment)
+                if bucket['key'] is None or key > bucket['key']:
+                    bucket.update(key=key, metrics=MetricsAccumulator(), stats=None)
+                if key == bucket['key']:
+                    bucket['metrics'].add(deal.profit)
+                    bucket['stats'] = None
+
+    def current_period_stats(self, period, now):
+        """Stats of the current period, journaled when it had new deals"""
+        key = period_key(period, now)
+        bucket = self.buckets[period]
+        if bucket['key'] != key:
+            # No deals in this period yet
+            bucket.update(key=key, metrics=MetricsAccumulator(), stats=None)
+        if bucket['stats'] is not None:
+            return bucket['stats'], False
+
+        bucket['stats'] = bucket['metrics'].to_dict()
+        self.record(period, key, bucket['stats'])
+        return bucket['stats'], True
+
     def calculate_daily_stats(self):
         """Calculate daily trading statistics"""
         try:
-            # Get today's trades
             today = self.current_time = datetime.now()
-            today_start = datetime.combine(today, datetime.min.time())
-            
-            trades = mt5.history_deals_get(today_start, self.current_time)
-            if trades is None:
+
+            if not self.connection.ensure_connected():
                 return
-                
-            daily_stats = {
-                'total_trades': 0,
-                'winning_trades': 0,
-                'losing_trades': 0,
-                'profit': 0.0,
-                'loss': 0.0,
-                'pnl': 0.0,
-                'win_rate': 0.0,
-                'risk_reward_ratio': 0.0,
-                'max_drawdown': 0.0,
-                'sharpe_ratio': 0.0,
-                'profit_factor': 0.0
-            }
-
-            # Process trades
-            trades_data = []
-            for trade in trades:
-                if trade.magic == 123456:  # Our bot's trades
-                    profit = trade.profit
-                    daily_stats['total_trades'] += 1
-                    
-                    if profit > 0:
-                        daily_stats['winning_trades'] += 1
-                        daily_stats['profit'] += profit
-                    else:
-                        daily_stats['losing_trades'] += 1
-                        daily_stats['loss'] += abs(profit)
-                        
-                    trades_data.append({
-                        'time': trade.time,
-                        'symbol': trade.symbol,
-                        'type': trade.type,
-                        'volume': trade.volume,
-                        'price': trade.price,
-                        'profit': profit
-                    })
-
-            # Calculate metrics
-            daily_stats['pnl'] = daily_stats['profit'] - daily_stats['loss']
-            
-            if daily_stats['total_trades'] > 0:
-                daily_stats['win_rate'] = (daily_stats['winning_trades'] / 
-                                         daily_stats['total_trades'] * 100)
-                                         
-            if daily_stats['loss'] > 0:
-                daily_stats['profit_factor'] = daily_stats['profit'] / daily_stats['loss']
-
-            if trades_data:
-                df = pd.DataFrame(trades_data)
-                daily_stats['max_drawdown'] = self.calculate_max_drawdown(df)
-                daily_stats['sharpe_ratio'] = self.calculate_sharpe_ratio(df)
-                daily_stats['risk_reward_ratio'] = self.calculate_risk_reward_ratio(df)
-
-            # Save daily stats
-            self.daily_stats[today.strftime('%Y-%m-%d')] = daily_stats
-            self.save_stats()
-            
+
+            self.ingest()
+            daily_stats, changed = self.current_period_stats('daily', today)
+
             # Log daily statistics
-            self.log_daily_stats(daily_stats)
+            if changed:
+                self.log_daily_stats(daily_stats)
 
             return daily_stats
 
@@ -100,104 +99,43 @@ class TradingStats:
             return None
 
     def calculate_weekly_stats(self):
-        """Calculate weekly trading statistics"""
+        """Weekly statistics from the deals already ingested, without a terminal query"""
         try:
-            week_start = self.current_time - timedelta(days=self.current_time.weekday())
-            week_start = datetime.combine(week_start.date(), datetime.min.time())
-            
-            trades = mt5.history_deals_get(week_start, self.current_time)
-            if trades is None:
-                return
-                
-            weekly_stats = self.aggregate_stats(trades)
-            
-            # Save weekly stats
-            week_key = week_start.strftime('%Y-%W')
-            self.weekly_stats[week_key] = weekly_stats
-            self.save_stats()
-            
-            return weekly_stats
+            self.ingest(poll=False)
+            return self.current_period_stats('weekly', datetime.now())[0]
 
         except Exception as e:
             logging.error(f"Error calculating weekly stats: {str(e)}")
             return None
 
     def calculate_monthly_stats(self):
-        """Calculate monthly trading statistics"""
+        """Monthly statistics from the deals already ingested, without a terminal query"""
         try:
-            month_start = self.current_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            trades = mt5.history_deals_get(month_start, self.current_time)
-            if trades is None:
-                return
-                
-            monthly_stats = self.aggregate_stats(trades)
-            
-            # Save monthly stats
-            month_key = month_start.strftime('%Y-%m')
-            self.monthly_stats[month_key] = monthly_stats
-            self.save_stats()
-            
-            return monthly_stats
+            self.ingest(poll=False)
+            return self.current_period_stats('monthly', datetime.now())[0]
 
         except Exception as e:
             logging.error(f"Error calculating monthly stats: {str(e)}")
             return None
 
+    def range_stats(self, start, end, symbol=None):
+        """Statistics of bot deals between two datetimes, read from the local deal store"""
+        try:
+            rows = self.store.query(int(start.timestamp()), int(end.timestamp()), symbol=symbol, magic=BOT_MAGIC)
+            return MetricsAccumulator.from_profits(rows['profit']).to_dict()
+
+        except Exception as e:
+            logging.error(f"Error calculating range stats: {str(e)}")
+            return None
+
     def aggregate_stats(self, trades):
         """Aggregate statistics from trades"""
         try:
-            stats = {
-                'total_trades': 0,
-                'winning_trades': 0,
-                'losing_trades': 0,
-                'profit': 0.0,
-                'loss': 0.0,
-                'pnl': 0.0,
-                'win_rate': 0.0,
-                'profit_factor': 0.0,
-                'average_trade': 0.0,
-                'max_drawdown': 0.0,
-                'sharpe_ratio': 0.0,
-                'risk_reward_ratio': 0.0
-            }
-
-            trades_data = []
+            metrics = MetricsAccumulator()
             for trade in trades:
-                if trade.magic == 123456:  # Our bot's trades
-                    stats['total_trades'] += 1
-                    profit = trade.profit
-                    
-                    trades_data.append({
-                        'time': trade.time,
-                        'symbol': trade.symbol,
-                        'type': trade.type,
-                        'volume': trade.volume,
-                        'price': trade.price,
-                        'profit': profit
-                    })
-                    
-                    if profit > 0:
-                        stats['winning_trades'] += 1
-                        stats['profit'] += profit
-                    else:
-                        stats['losing_trades'] += 1
-                        stats['loss'] += abs(profit)
-
-            if stats['total_trades'] > 0:
-                stats['win_rate'] = (stats['winning_trades'] / stats['total_trades'] * 100)
-                stats['average_trade'] = (stats['profit'] - stats['loss']) / stats['total_trades']
-                
-            if stats['loss'] > 0:
-                stats['profit_factor'] = stats['profit'] / stats['loss']
-
-            if trades_data:
-                df = pd.DataFrame(trades_data)
-                stats['max_drawdown'] = self.calculate_max_drawdown(df)
-                stats['sharpe_ratio'] = self.calculate_sharpe_ratio(df)
-                stats['risk_reward_ratio'] = self.calculate_risk_reward_ratio(df)
-
-            return stats
+                if trade.magic == BOT_MAGIC:  # Our bot's trades
+                    metrics.add(trade.profit)
+            return metrics.to_dict()
 
         except Exception as e:
             logging.error(f"Error aggregating stats: {str(e)}")
@@ -206,13 +144,7 @@ class TradingStats:
     def calculate_max_drawdown(self, df):
         """Calculate maximum drawdown"""
         try:
-            if df.empty:
-                return 0.0
-
-            cumulative = df['profit'].cumsum()
-            rolling_max = cumulative.expanding().max()
-            drawdowns = (cumulative - rolling_max)
-            return abs(drawdowns.min())
+            return MetricsAccumulator.from_profits(df['profit']).max_drawdown
 
         except Exception as e:
             logging.error(f"Error calculating max drawdown: {str(e)}")
@@ -221,14 +153,7 @@ class TradingStats:
     def calculate_sharpe_ratio(self, df, risk_free_rate=0.02):
         """Calculate Sharpe ratio"""
         try:
-            if df.empty:
-                return 0.0
-
-            returns = df['profit'].pct_change()
-            excess_returns = returns - (risk_free_rate / 252)  # Daily risk-free rate
-            if excess_returns.std() == 0:
-                return 0.0
-            return np.sqrt(252) * excess_returns.mean() / excess_returns.std()
+            return MetricsAccumulator.from_profits(df['profit'], risk_free_rate).sharpe_ratio()
 
         except Exception as e:
             logging.error(f"Error calculating Sharpe ratio: {str(e)}")
@@ -237,47 +162,49 @@ class TradingStats:
     def calculate_risk_reward_ratio(self, df):
         """Calculate risk/reward ratio"""
         try:
-            if df.empty:
-                return 0.0
-
-            avg_win = df[df['profit'] > 0]['profit'].mean()
-            avg_loss = abs(df[df['profit'] < 0]['profit'].mean())
-            
-            if avg_loss == 0:
-                return 0.0
-                
-            return avg_win / avg_loss
+            return MetricsAccumulator.from_profits(df['profit']).risk_reward_ratio()
 
         except Exception as e:
             logging.error(f"Error calculating risk/reward ratio: {str(e)}")
             return 0.0
 
-    def save_stats(self):
-        """Save statistics to file"""
+    def record(self, period, key, stats):
+        """Store the stats of one period, journaling the change instead of rewriting the file"""
+        if self.journal is None:
+            self.period_stats(period)[key] = stats
+            return
         try:
-            stats = {
-                'daily': self.daily_stats,
-                'weekly': self.weekly_stats,
-                'monthly': self.monthly_stats
-            }
-            
-            filename = os.path.join(self.stats_dir, f'trading_stats_{self.login}.json')
-            with open(filename, 'w') as f:
-                json.dump(stats, f, indent=4)
-
+            self.journal.append({'period': period, 'key': key, 'stats': stats})
         except Exception as e:
             logging.error(f"Error saving stats: {str(e)}")
 
+    def period_stats(self, period):
+        return {'daily': self.daily_stats, 'weekly': self.weekly_stats, 'monthly': self.monthly_stats}[period]
+
+    def fold_record(self, state, record):
+        """Latest stats of a period replace the earlier ones"""
+        state.setdefault(record['period'], {})[record['key']] = record['stats']
+
+    def save_stats(self):
+        """Write a snapshot of the statistics and truncate the journal"""
+        if self.journal is not None:
+            self.journal.compact()
+
+    def close(self):
+        """Snapshot outstanding records and close the journal"""
+        if self.journal is not None:
+            self.journal.close()
+
     def load_stats(self):
-        """Load statistics from file"""
+        """Load the snapshot and replay the journal written since"""
         try:
             filename = os.path.join(self.stats_dir, f'trading_stats_{self.login}.json')
-            if os.path.exists(filename):
-                with open(filename, 'r') as f:
-                    stats = json.load(f)
-                    self.daily_stats = stats.get('daily', {})
-                    self.weekly_stats = stats.get('weekly', {})
-                    self.monthly_stats = stats.get('monthly', {})
+            self.journal = TradeJournal(filename, self.fold_record, lambda: {period: {} for period in PERIODS})
+            for period in PERIODS:
+                self.journal.state.setdefault(period, {})
+            self.daily_stats = self.journal.state['daily']
+            self.weekly_stats = self.journal.state['weekly']
+            self.monthly_stats = self.journal.state['monthly']
 
         except Exception as e:
             logging.error(f"Error loading stats: {str(e)}")